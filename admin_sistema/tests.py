@@ -1,3 +1,52 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
+from products.models import Category, Product
+from settings.models import Settings
 
-# Create your tests here.
+
+class CatalogCloneViewTests(TestCase):
+    """
+    Cópia de cardápio pelo painel do sistema (CatalogCloneView).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='senha', is_staff=True)
+        cls.source = cls.create_restaurant('origem')
+        cls.target = cls.create_restaurant('destino')
+        category = Category.objects.create(restaurant=cls.source, name='Lanches')
+        Product.objects.create(restaurant=cls.source, category=category, name='Burger', description='', price='20.00')
+
+    @staticmethod
+    def create_restaurant(username):
+        return Settings.objects.create(
+            owner=User.objects.create_user(username, password='senha'), business_name=username.title(),
+            business_phone='', business_address='', business_email=f'{username}@example.com',
+            opening_time='08:00', closing_time='18:00',
+        )
+
+    def url(self, pk=None):
+        return f'/api/admin/empresas/{pk or self.target.pk}/clone-catalog/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_clone(self):
+        response = self.client.post(self.url(), {'source_id': self.source.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['products'], response.data['products_skipped']), (1, []))
+        self.assertTrue(Product.objects.filter(restaurant=self.target, name='Burger').exists())
+        # Destino já tem cardápio: só com replace
+        self.assertEqual(self.client.post(self.url(), {'source_id': self.source.pk}, format='json').status_code, 400)
+        response = self.client.post(self.url(), {'source_id': self.source.pk, 'replace': True}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Product.objects.filter(restaurant=self.target).count(), 1)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post(self.url(), {}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url(), {'source_id': 999999}, format='json').status_code, 404)
+        self.assertEqual(self.client.post(self.url(999999), {'source_id': self.source.pk}, format='json').status_code, 404)
+        self.client.force_authenticate(self.source.owner)
+        self.assertEqual(self.client.post(self.url(), {'source_id': self.source.pk}, format='json').status_code, 403)
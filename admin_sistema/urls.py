@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import CompanyListView, CompanyRetrieveUpdateView, DashboardMetricsView, PlanListCreateView, PlanRetrieveUpdateDestroyView
+from .views import CompanyListView, CompanyRetrieveUpdateView, CatalogCloneView, DashboardMetricsView, PlanListCreateView, PlanRetrieveUpdateDestroyView
 
 urlpatterns = [
     path('empresas/', CompanyListView.as_view(), name='company-list'),
     path('empresas/<int:pk>/', CompanyRetrieveUpdateView.as_view(), name='company-detail'),
+    path('empresas/<int:pk>/clone-catalog/', CatalogCloneView.as_view(), name='company-clone-catalog'),
     path('dashboard/', DashboardMetricsView.as_view(), name='dashboard-metrics'),
     path('plans/', PlanListCreateView.as_view(), name='plan-list'),
     path('plans/<int:pk>/', PlanRetrieveUpdateDestroyView.as_view(), name='plan-detail'),
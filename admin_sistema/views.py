@@ -11,6 +11,8 @@ from assinaturas.models import Subscription
 from .serializers import CompanySerializer
 from assinaturas.models import Plan
 from assinaturas.serializers import PlanSerializer
+from assinaturas.snapshots import monthly_revenue_history
+from products.cloning import CatalogCloneError, clone_catalog
 
 # Create your views here.
 
@@ -102,6 +104,13 @@ class DashboardMetricsView(APIView):
                 'subscriptions': day_subscriptions
             })
         last_7_days.reverse()
+
+        # Curva mensal de faturamento a partir das fotografias diárias de assinaturas
+        try:
+            months = min(max(int(request.query_params.get('months', 12)), 1), 36)
+        except ValueError:
+            months = 12
+        revenue_history = monthly_revenue_history(months=months)
         
         return Response({
             'total_companies': total_companies,
@@ -114,6 +123,7 @@ class DashboardMetricsView(APIView):
             'current_month_revenue': round(current_month_revenue, 2),
             'current_year_revenue': round(current_year_revenue, 2),
             'trend_data': last_7_days,
+            'revenue_history': revenue_history,
             'period': period,
             'start_date': start_date,
             'end_date': end_date,
@@ -138,3 +148,26 @@ class PlanRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         if self.request.method in ['PUT', 'PATCH', 'DELETE']:
             return [permissions.IsAdminUser()]
         return super().get_permissions()
+
+
+class CatalogCloneView(APIView):
+    """
+    Copia o cardápio de outra empresa (source_id) para a empresa da URL, para
+    redes e franquias abrirem novas unidades sem recadastrar tudo.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, pk):
+        target = generics.get_object_or_404(Settings, pk=pk)
+        source_id = request.data.get('source_id')
+        if not source_id:
+            return Response({'error': 'source_id é obrigatório'}, status=status.HTTP_400_BAD_REQUEST)
+        source = Settings.objects.filter(pk=source_id).first() if str(source_id).isdigit() else None
+        if source is None:
+            return Response({'error': 'Empresa de origem não encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        replace = str(request.data.get('replace', '')).lower() in ('1', 'true')
+        try:
+            report = clone_catalog(source, target, replace=replace)
+        except CatalogCloneError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED)
@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from settings.tenants import request_tenant, resolve_user_access, resolve_user_tenant
+
+# Presente nos tokens emitidos com as claims abaixo; tokens antigos seguem o caminho com consulta
+TENANT_CLAIM = 'tenant_id'
+
+
+def token_claims(user):
+    """
+    Claims extras gravadas no token no login: flags de admin, o restaurante do
+    usuário, o bloqueio da empresa e a versão de acesso usada para revogação.
+    """
+    tenant = resolve_user_tenant(user.pk)
+    return {
+        'username': user.username,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        TENANT_CLAIM: tenant.id if tenant else None,
+        'is_active': tenant.is_active if tenant else user.is_active,
+        'auth_version': tenant.auth_version if tenant else 0,
+    }
+
+
+def _load_user(user_id):
+    try:
+        return get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id})
+    except get_user_model().DoesNotExist:
+        raise AuthenticationFailed('Usuário não encontrado', code='user_not_found')
+
+
+class TokenClaimsUser(SimpleLazyObject):
+    """
+    Usuário montado a partir das claims do token e do acesso em cache: id, username,
+    flags de admin e conta ativa não consultam o banco. Qualquer outro atributo (ou
+    usar o objeto como User, por exemplo em uma chave estrangeira) carrega o User uma
+    única vez.
+    """
+
+    def __init__(self, token, access):
+        user_id = token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: _load_user(user_id))
+        self.__dict__['_claims'] = {
+            'pk': user_id,
+            'username': token.get('username', ''),
+            'is_staff': access.is_staff,
+            'is_superuser': access.is_superuser,
+            'is_active': access.is_active,
+        }
+
+    pk = property(lambda self: self.__dict__['_claims']['pk'])
+    id = pk
+    username = property(lambda self: self.__dict__['_claims']['username'])
+    is_staff = property(lambda self: self.__dict__['_claims']['is_staff'])
+    is_superuser = property(lambda self: self.__dict__['_claims']['is_superuser'])
+    is_active = property(lambda self: self.__dict__['_claims']['is_active'])
+    is_authenticated = True
+    is_anonymous = False
+
+    def __bool__(self):
+        return True
+
+    def __str__(self):
+        return self.username
+
+
+def _token_is_current(token, access):
+    """
+    As claims de acesso do token ainda valem? Restaurante, bloqueio da empresa, versão
+    de acesso e flags de admin precisam bater com o estado atual em cache.
+    """
+    tenant = access.tenant
+    return (
+        token[TENANT_CLAIM] == (tenant.id if tenant else None)
+        and bool(token.get('is_active')) == (tenant.is_active if tenant else access.is_active)
+        and token.get('auth_version', 0) == (tenant.auth_version if tenant else 0)
+        and bool(token.get('is_staff')) == access.is_staff
+        and bool(token.get('is_superuser')) == access.is_superuser
+    )
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """
+    Autenticação JWT que já resolve o restaurante do usuário (request.tenant),
+    a partir do cache, para as views não consultarem user.settings.
+
+    Tokens com as claims de token_claims são autenticados sem ler o User: a conta
+    ativa, as flags de admin, o bloqueio e a versão de acesso da empresa vêm do mesmo
+    cache do restaurante e são comparados com as claims. Usuários inativos e empresas
+    bloqueadas são recusados, e tokens com claims desatualizadas são revogados.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+
+        stateless = TENANT_CLAIM in token and api_settings.USER_ID_CLAIM in token
+        # Tokens antigos, sem as claims, seguem o caminho com consulta ao usuário
+        user = None if stateless else self.get_user(token)
+        access = resolve_user_access(token[api_settings.USER_ID_CLAIM] if stateless else user.pk)
+        if access is None:
+            raise AuthenticationFailed('Usuário não encontrado', code='user_not_found')
+        if not access.is_active:
+            raise AuthenticationFailed('Usuário inativo', code='user_inactive')
+        if access.tenant is not None and not access.tenant.is_active:
+            raise AuthenticationFailed('Empresa bloqueada', code='company_blocked')
+        if stateless:
+            if not _token_is_current(token, access):
+                raise AuthenticationFailed('Token revogado, faça login novamente', code='token_revoked')
+            user = TokenClaimsUser(token, access)
+
+        request.tenant = access.tenant
+        request._request.tenant = access.tenant
+        return user, token
+
+
+def require_tenant(request):
+    """
+    Restaurante da requisição; 403 se o usuário não possui empresa associada.
+    """
+    tenant = request_tenant(request)
+    if tenant is None:
+        raise PermissionDenied('Usuário não possui empresa associada.')
+    return tenant
@@ -5,11 +5,19 @@ from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.tokens import RefreshToken
 from settings.models import Settings
 from assinaturas.models import Subscription
+from .authentication import token_claims
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # Claims usadas pela autenticação sem consulta ao banco (app.authentication)
+        token = super().get_token(user)
+        for claim, value in token_claims(user).items():
+            token[claim] = value
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
         # Apenas dados essenciais do usuário (removendo flags admin)
@@ -131,7 +139,8 @@ def register(request):
             active=True
         )
         
-        refresh = RefreshToken.for_user(user)
+        # Mesmas claims do login, para o token já valer na autenticação sem consulta
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
         access = str(refresh.access_token)
         user_data = {
             'id': user.id,
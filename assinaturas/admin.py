@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Subscription, Plan
+from .models import Subscription, Plan, SubscriptionSnapshot
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
@@ -10,3 +10,10 @@ class SubscriptionAdmin(admin.ModelAdmin):
 @admin.register(Plan)
 class PlanAdmin(admin.ModelAdmin):
     list_display = ('name', 'price', 'duration_days')
+
+
+@admin.register(SubscriptionSnapshot)
+class SubscriptionSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('date', 'plan', 'active_subscriptions', 'new_subscriptions', 'churned_subscriptions', 'mrr')
+    list_filter = ('plan',)
+    date_hierarchy = 'date'
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AssinaturasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assinaturas'
+
+    def ready(self):
+        # Registra os signals que descartam o restaurante em cache do usuário
+        from . import signals  # noqa: F401
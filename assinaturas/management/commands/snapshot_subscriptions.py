@@ -0,0 +1,49 @@
+from datetime import date, datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from assinaturas.snapshots import take_subscription_snapshot
+
+class Command(BaseCommand):
+    """
+    Registra a fotografia diária das assinaturas; com --days preenche dias anteriores.
+
+    Dias passados são aproximados: a assinatura não guarda quando foi desativada,
+    então conta como ativa até a data da sua última alteração (updated_at). Por isso
+    dias que já têm fotografia são mantidos, salvo com --overwrite, e o dia de hoje
+    é sempre atualizado.
+    """
+    help = (
+        'Registra a fotografia diária das assinaturas (MRR, ativas, novas e encerradas por plano). '
+        'Dias passados sem fotografia são reconstruídos de forma aproximada: uma assinatura desativada '
+        'conta como ativa até a data da sua última alteração (updated_at). Dias já registrados são '
+        'mantidos, salvo com --overwrite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Dia da fotografia no formato YYYY-MM-DD (padrão: hoje)')
+        parser.add_argument('--days', type=int, default=1, help='Quantidade de dias até --date para reprocessar')
+        parser.add_argument(
+            '--overwrite', action='store_true',
+            help='Recalcula também os dias passados que já têm fotografia',
+        )
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                end_day = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Data inválida, use o formato YYYY-MM-DD')
+        else:
+            end_day = date.today()
+
+        today = date.today()
+        days = max(options['days'], 1)
+        for offset in range(days - 1, -1, -1):
+            day = end_day - timedelta(days=offset)
+            snapshots = take_subscription_snapshot(day, overwrite=options['overwrite'] or day >= today)
+            if snapshots is None:
+                self.stdout.write(f'{day}: fotografia já registrada, mantida')
+                continue
+            mrr = sum(snapshot.mrr for snapshot in snapshots)
+            self.stdout.write(f'{day}: {len(snapshots)} planos registrados, MRR {mrr}')
+
+        self.stdout.write(self.style.SUCCESS('Fotografias de assinaturas registradas com sucesso!'))
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.10 on 2026-10-19 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assinaturas", "0003_auto_create_free_plan"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriptionSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Data")),
+                ("plan", models.CharField(max_length=50, verbose_name="Plano")),
+                (
+                    "active_subscriptions",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Assinaturas Ativas"
+                    ),
+                ),
+                (
+                    "new_subscriptions",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Novas Assinaturas"
+                    ),
+                ),
+                (
+                    "churned_subscriptions",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Assinaturas Encerradas"
+                    ),
+                ),
+                (
+                    "mrr",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Receita Recorrente Mensal",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Fotografia de Assinaturas",
+                "verbose_name_plural": "Fotografias de Assinaturas",
+                "ordering": ["-date", "plan"],
+                "unique_together": {("date", "plan")},
+            },
+        ),
+    ]
@@ -34,3 +34,28 @@ class Subscription(models.Model):
     def __str__(self):
         status = 'Ativa' if self.active else 'Inativa'
         return f"{self.company.business_name} - {self.plan} ({status})"
+
+
+class SubscriptionSnapshot(models.Model):
+    """
+    Fotografia diária das assinaturas de cada plano.
+    Guarda assinaturas ativas, MRR, novas e canceladas para que o painel
+    administrativo monte as curvas de faturamento sem reprocessar o histórico.
+    """
+    date = models.DateField(verbose_name='Data')
+    plan = models.CharField(max_length=50, verbose_name='Plano')
+    active_subscriptions = models.PositiveIntegerField(default=0, verbose_name='Assinaturas Ativas')
+    new_subscriptions = models.PositiveIntegerField(default=0, verbose_name='Novas Assinaturas')
+    churned_subscriptions = models.PositiveIntegerField(default=0, verbose_name='Assinaturas Encerradas')
+    mrr = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Receita Recorrente Mensal')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Fotografia de Assinaturas'
+        verbose_name_plural = 'Fotografias de Assinaturas'
+        unique_together = ('date', 'plan')
+        ordering = ['-date', 'plan']
+
+    def __str__(self):
+        return f"{self.date} - {self.plan} (MRR {self.mrr})"
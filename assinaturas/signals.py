@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from settings.models import Settings
+from settings.tenants import invalidate_user_tenant
+from .models import Subscription
+
+
+@receiver([post_save, post_delete], sender=Subscription)
+def subscription_changed(sender, instance, **kwargs):
+    # O plano vigente faz parte do restaurante resolvido por requisição
+    invalidate_user_tenant(*Settings.objects.filter(pk=instance.company_id).values_list('owner_id', flat=True))
@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from .models import Plan, Subscription, SubscriptionSnapshot
+
+# Os preços dos planos são normalizados para 30 dias no cálculo do MRR
+MRR_PERIOD_DAYS = 30
+
+
+def _monthly_price(plan):
+    """
+    Converte o preço do plano para o equivalente mensal (30 dias).
+    """
+    if not plan or not plan.duration_days:
+        return Decimal('0')
+    return plan.price * MRR_PERIOD_DAYS / plan.duration_days
+
+
+def take_subscription_snapshot(day=None, overwrite=True):
+    """
+    Registra a fotografia das assinaturas de um dia, agrupada por plano.
+    Usa uma única consulta agregada e substitui as linhas já existentes do dia,
+    então pode ser executada várias vezes sem duplicar dados.
+    Com overwrite=False, um dia que já tem fotografia é mantido e retorna None.
+
+    A assinatura não guarda a data em que foi desativada: para dias passados, uma
+    desativada conta como ativa até a data da sua última alteração (updated_at).
+    Por isso só a fotografia do próprio dia é exata; reprocessar dias passados
+    reflete alterações feitas depois deles.
+    """
+    day = day or date.today()
+    if not overwrite and SubscriptionSnapshot.objects.filter(date=day).exists():
+        return None
+
+    # Ativa no dia: já começou, ainda não terminou e não foi desativada antes do dia
+    # (aproximado por updated_at, ver acima).
+    active_q = (
+        Q(start_date__lte=day)
+        & (Q(end_date__isnull=True) | Q(end_date__gte=day))
+        & (Q(active=True) | Q(updated_at__date__gt=day))
+    )
+    churned_q = Q(end_date=day) | (
+        Q(active=False, updated_at__date=day)
+        & (Q(end_date__isnull=True) | Q(end_date__gt=day))
+    )
+
+    counts = (
+        Subscription.objects.values('plan')
+        .annotate(
+            active_count=Count('id', filter=active_q),
+            new_count=Count('id', filter=Q(start_date=day)),
+            churned_count=Count('id', filter=churned_q),
+        )
+        .order_by('plan')
+    )
+
+    plans = {plan.name.lower(): plan for plan in Plan.objects.all()}
+    snapshots = []
+    for row in counts:
+        if not (row['active_count'] or row['new_count'] or row['churned_count']):
+            continue
+        monthly_price = _monthly_price(plans.get((row['plan'] or '').lower()))
+        snapshots.append(SubscriptionSnapshot(
+            date=day,
+            plan=row['plan'],
+            active_subscriptions=row['active_count'],
+            new_subscriptions=row['new_count'],
+            churned_subscriptions=row['churned_count'],
+            mrr=(monthly_price * row['active_count']).quantize(Decimal('0.01')),
+        ))
+
+    with transaction.atomic():
+        SubscriptionSnapshot.objects.filter(date=day).delete()
+        SubscriptionSnapshot.objects.bulk_create(snapshots)
+    return snapshots
+
+
+def monthly_revenue_history(months=12, today=None):
+    """
+    Monta a curva mensal de faturamento a partir das fotografias diárias.
+    MRR e assinaturas ativas vêm do último dia registrado no mês; novas e
+    encerradas são somadas no mês. Todos os meses do período são retornados:
+    os sem nenhuma fotografia vêm zerados com has_snapshot=False.
+    """
+    today = today or date.today()
+    month_starts = [today.replace(day=1)]
+    for _ in range(months - 1):
+        month_starts.append((month_starts[-1] - timedelta(days=1)).replace(day=1))
+    month_starts.reverse()
+    first_month = month_starts[0]
+
+    history = {
+        key: {
+            'month': key,
+            'has_snapshot': False,
+            'mrr': 0,
+            'arr': 0,
+            'active_subscriptions': 0,
+            'new_subscriptions': 0,
+            'churned_subscriptions': 0,
+        }
+        for key in (month.strftime('%Y-%m') for month in month_starts)
+    }
+
+    daily = (
+        SubscriptionSnapshot.objects.filter(date__gte=first_month, date__lte=today)
+        .values('date')
+        .annotate(
+            mrr_total=Sum('mrr'),
+            active_total=Sum('active_subscriptions'),
+            new_total=Sum('new_subscriptions'),
+            churned_total=Sum('churned_subscriptions'),
+        )
+        .order_by('date')
+    )
+
+    for row in daily:
+        month = history[row['date'].strftime('%Y-%m')]
+        month['has_snapshot'] = True
+        # As linhas estão ordenadas por data, então o último dia sobrescreve os anteriores
+        month['mrr'] = round(float(row['mrr_total'] or 0), 2)
+        month['arr'] = round(month['mrr'] * 12, 2)
+        month['active_subscriptions'] = row['active_total'] or 0
+        month['new_subscriptions'] += row['new_total'] or 0
+        month['churned_subscriptions'] += row['churned_total'] or 0
+    return list(history.values())
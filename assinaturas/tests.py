@@ -1,3 +1,51 @@
+from datetime import date
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from settings.models import Settings
+from .models import Plan, Subscription, SubscriptionSnapshot
+from .snapshots import monthly_revenue_history
 
-# Create your tests here.
+
+class SubscriptionSnapshotTests(TestCase):
+    """
+    Fotografias diárias de assinaturas (assinaturas/snapshots.py): curva mensal
+    com meses sem fotografia e preenchimento de dias passados pelo comando.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Plan.objects.create(name='premium', price='90.00', duration_days=30)
+        company = Settings.objects.create(
+            owner=User.objects.create_user('loja', password='senha'), business_name='Loja', business_phone='',
+            business_address='', business_email='loja@example.com', opening_time='08:00', closing_time='18:00',
+        )
+        cls.subscription = Subscription.objects.create(company=company, plan='premium')
+
+    def snapshot(self, day, active=1, mrr='90.00'):
+        SubscriptionSnapshot.objects.create(date=day, plan='premium', active_subscriptions=active, mrr=mrr)
+
+    def test_history_reports_months_without_snapshot(self):
+        self.snapshot(date(2026, 1, 31))
+        self.snapshot(date(2026, 3, 10), active=2, mrr='180.00')
+        history = monthly_revenue_history(months=4, today=date(2026, 3, 15))
+        self.assertEqual([month['month'] for month in history], ['2025-12', '2026-01', '2026-02', '2026-03'])
+        self.assertEqual([month['has_snapshot'] for month in history], [False, True, False, True])
+        self.assertEqual([month['mrr'] for month in history], [0, 90.0, 0, 180.0])
+
+    def test_backfill_keeps_existing_days(self):
+        kept = date(2020, 1, 1)
+        self.snapshot(kept, active=5, mrr='450.00')
+        call_command('snapshot_subscriptions', date='2020-01-02', days=2, stdout=StringIO())
+        self.assertEqual(SubscriptionSnapshot.objects.get(date=kept).active_subscriptions, 5)
+        self.assertFalse(SubscriptionSnapshot.objects.filter(date=date(2020, 1, 2)).exists())
+
+        call_command('snapshot_subscriptions', date='2020-01-02', days=2, overwrite=True, stdout=StringIO())
+        self.assertFalse(SubscriptionSnapshot.objects.filter(date=kept).exists())
+
+    def test_today_is_always_refreshed(self):
+        self.snapshot(date.today(), active=5, mrr='450.00')
+        call_command('snapshot_subscriptions', stdout=StringIO())
+        snapshot = SubscriptionSnapshot.objects.get(date=date.today())
+        self.assertEqual((snapshot.active_subscriptions, snapshot.mrr), (1, 90))
@@ -2,6 +2,8 @@ from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from settings.models import Settings
+from settings.tenants import invalidate_user_tenant, request_tenant
 from .models import Subscription, Plan
 from .serializers import SubscriptionSerializer, PlanSerializer
 import logging
@@ -17,22 +19,22 @@ def debug_subscriptions(request):
     View de debug para verificar as assinaturas do usuário
     """
     user = request.user
-    settings = getattr(user, 'settings', None)
+    tenant = request_tenant(request)
     
     debug_info = {
         'user_id': user.id,
         'username': user.username,
-        'has_settings': settings is not None,
-        'settings_id': settings.id if settings else None,
-        'settings_name': settings.business_name if settings else None,
+        'has_settings': tenant is not None,
+        'settings_id': tenant.id if tenant else None,
+        'settings_name': Settings.objects.filter(pk=tenant.id).values_list('business_name', flat=True).first() if tenant else None,
         'total_subscriptions': 0,
         'subscriptions': [],
         'all_subscriptions_count': Subscription.objects.count(),
         'all_subscriptions': list(Subscription.objects.values('id', 'company__business_name', 'plan', 'start_date', 'end_date', 'active'))
     }
     
-    if settings:
-        subscriptions = Subscription.objects.filter(company=settings)
+    if tenant:
+        subscriptions = Subscription.objects.filter(company_id=tenant.id)
         debug_info['total_subscriptions'] = subscriptions.count()
         debug_info['subscriptions'] = list(subscriptions.values('id', 'plan', 'start_date', 'end_date', 'active'))
     
@@ -45,10 +47,9 @@ def create_test_subscription(request):
     """
     Cria uma assinatura de teste para debug
     """
-    user = request.user
-    settings = getattr(user, 'settings', None)
+    tenant = request_tenant(request)
     
-    if not settings:
+    if not tenant:
         return Response({'error': 'Usuário não possui settings'}, status=400)
     
     try:
@@ -56,7 +57,7 @@ def create_test_subscription(request):
         
         # Criar uma assinatura de teste
         subscription = Subscription.objects.create(
-            company=settings,
+            company_id=tenant.id,
             plan='Teste',
             start_date=date.today(),
             end_date=date.today() + timedelta(days=30),
@@ -82,16 +83,16 @@ class SubscriptionListCreateView(generics.ListCreateAPIView):
         ordenadas da mais recente para a mais antiga.
         """
         user = self.request.user
-        settings = getattr(user, 'settings', None)
+        tenant = request_tenant(self.request)
         
-        logger.info(f"Usuário: {user.username}, Settings: {settings}")
+        logger.info(f"Usuário: {user.username}, Settings: {tenant.id if tenant else None}")
         
-        if not settings:
+        if not tenant:
             logger.warning(f"Usuário {user.username} não possui settings")
             return Subscription.objects.none()
         
-        subscriptions = Subscription.objects.filter(company=settings).order_by('-start_date')
-        logger.info(f"Encontradas {subscriptions.count()} assinaturas para empresa {settings.business_name}")
+        subscriptions = Subscription.objects.filter(company_id=tenant.id).order_by('-start_date')
+        logger.info(f"Encontradas {subscriptions.count()} assinaturas para empresa {tenant.id}")
         
         # Log detalhado das assinaturas encontradas
         for sub in subscriptions:
@@ -118,14 +119,15 @@ class SubscriptionListCreateView(generics.ListCreateAPIView):
         - Encerra a assinatura ativa (se existir)
         - Define a data de término padrão (30 dias) para planos pagos
         """
-        user = self.request.user
-        settings = getattr(user, 'settings', None)
-        if not settings:
+        tenant = request_tenant(self.request)
+        if not tenant:
             from rest_framework.exceptions import ValidationError
             raise ValidationError('Usuário não possui empresa associada.')
 
-        # Tornar qualquer assinatura ativa anterior como inativa
-        Subscription.objects.filter(company=settings, active=True).update(active=False)
+        # Tornar qualquer assinatura ativa anterior como inativa; o update() não dispara
+        # o signal subscription_changed, então o plano em cache é descartado aqui
+        Subscription.objects.filter(company_id=tenant.id, active=True).update(active=False)
+        invalidate_user_tenant(self.request.user.pk)
 
         # Determinar data de término para planos pagos com base na duração do plano
         plan_code = self.request.data.get('plan', 'free')
@@ -136,7 +138,7 @@ class SubscriptionListCreateView(generics.ListCreateAPIView):
             duration = plan_obj.duration_days if plan_obj else 30
             end_date = date.today() + timedelta(days=duration)
 
-        serializer.save(company=settings, plan=plan_code, end_date=end_date, active=True)
+        serializer.save(company_id=tenant.id, plan=plan_code, end_date=end_date, active=True)
 
 class SubscriptionRetrieveUpdateView(generics.RetrieveUpdateAPIView):
     queryset = Subscription.objects.all()
@@ -150,15 +152,14 @@ class CurrentSubscriptionView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        user = self.request.user
-        settings = getattr(user, 'settings', None)
-        if not settings:
+        tenant = request_tenant(self.request)
+        if not tenant:
             # If user has no company settings, raise 404
             from rest_framework.exceptions import NotFound
             raise NotFound('Configurações da empresa não encontradas para o usuário.')
 
         subscription = (
-            Subscription.objects.filter(company=settings, active=True)
+            Subscription.objects.filter(company_id=tenant.id, active=True)
             .order_by('-end_date')
             .first()
         )
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import CreateClientOrderView
+from .views import CreateClientOrderView, QuoteClientOrderView
 
 urlpatterns = [
     path('create/', CreateClientOrderView.as_view(), name='client-order-create'),
+    path('quote/', QuoteClientOrderView.as_view(), name='client-order-quote'),
 ] 
\ No newline at end of file
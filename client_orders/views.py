@@ -1,9 +1,11 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render
 from rest_framework import views, permissions, status
 from rest_framework.response import Response
 from .models import ClientOrder
 from .serializers import ClientOrderCreateSerializer
-from settings.models import Settings
+from django.http import Http404
+from settings.tenants import resolve_slug_id
+from orders.pricing import PricingError, quote_cart, serialize_quote
 
 # Create your views here.
 
@@ -15,8 +17,11 @@ class CreateClientOrderView(views.APIView):
 
     def post(self, request, *args, **kwargs):
         slug = request.data.get('business_slug')
-        restaurant = get_object_or_404(Settings, business_slug=slug)
-        serializer = ClientOrderCreateSerializer(data=request.data, context={'restaurant': restaurant})
+        # Resolução do slug em cache: o pedido usa apenas o id do restaurante
+        restaurant_id = resolve_slug_id(slug)
+        if not restaurant_id:
+            raise Http404('Restaurante não encontrado')
+        serializer = ClientOrderCreateSerializer(data=request.data, context={'restaurant_id': restaurant_id})
         if serializer.is_valid():
             client_order = serializer.save()
             return Response({
@@ -25,3 +30,24 @@ class CreateClientOrderView(views.APIView):
                 'message': 'Pedido criado com sucesso'
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class QuoteClientOrderView(views.APIView):
+    """
+    Calcula no servidor o valor do carrinho (itens, adicionais, promoções e entrega)
+    sem criar o pedido. Retorna 400 com a lista de problemas se o carrinho for inválido.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        restaurant_id = resolve_slug_id(request.data.get('business_slug'))
+        if not restaurant_id:
+            raise Http404('Restaurante não encontrado')
+        delivery = request.data.get('delivery')
+        if delivery is not None:
+            delivery = delivery in (True, 'true', 'True', '1', 1)
+        try:
+            quote = quote_cart(restaurant_id, request.data.get('items') or [], delivery=delivery)
+        except PricingError as e:
+            return Response({'items': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serialize_quote(quote))
@@ -0,0 +1,165 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Prefetch
+from products.availability import (
+    availability_segment, build_availability_index, effective_availability, unavailable_at
+)
+from products.catalog import get_catalog_version
+from products.images import variant_urls
+from products.models import Category, Product, ProductIngredient, Promotion, PromotionItem, PromotionReward
+from settings.models import Settings
+from .serializers import SettingsSerializer, CategorySerializer, ProductSerializer
+
+# A chave inclui a versão do catálogo, então snapshots antigos apenas expiram
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(restaurant_id, version):
+    return f'clientes:menu:{restaurant_id}:{version}'
+
+
+def _unavailable_cache_key(restaurant_id, version, segment):
+    return f'clientes:menu:unavailable:{restaurant_id}:{version}:{segment}'
+
+
+def _product_ref(product):
+    return {'id': product.id, 'name': product.name, 'price': str(product.price)}
+
+
+def _promotion_entry(promotion):
+    """
+    Representação compacta de uma promoção: os produtos aparecem só com id, nome e
+    preço, e a economia em relação aos preços avulsos já vem calculada.
+    """
+    items = list(promotion.items.all())
+    regular_price = sum((item.product.price * item.quantity for item in items), Decimal('0'))
+    return {
+        'id': promotion.id,
+        'name': promotion.name,
+        'description': promotion.description,
+        'price': str(promotion.price),
+        'regular_price': str(regular_price),
+        'savings_amount': str(regular_price - promotion.price),
+        'image': promotion.image.url if promotion.image else None,
+        'image_variants': variant_urls(promotion.image_variants),
+        'items': [
+            {'product_id': item.product_id, 'quantity': item.quantity, 'product': _product_ref(item.product)}
+            for item in items
+        ],
+        'rewards': [
+            {'product_id': reward.product_id, 'product': _product_ref(reward.product)}
+            for reward in promotion.rewards.all()
+        ],
+    }
+
+
+def build_menu_snapshot(restaurant_id):
+    """
+    Monta o cardápio público de um restaurante em um único documento:
+    dados da loja, categorias ativas, produtos ativos com seus grupos de
+    ingredientes, promoções ativas e o índice de horários de disponibilidade.
+    Usa um número fixo de consultas, independente do tamanho do cardápio.
+    """
+    store = Settings.objects.prefetch_related('opening_hours').get(pk=restaurant_id)
+    categories = Category.objects.filter(restaurant_id=restaurant_id, is_active=True).order_by('name')
+    products = (
+        Product.objects.filter(restaurant_id=restaurant_id, is_active=True)
+        .select_related('category')
+        .prefetch_related(Prefetch(
+            'ingredients',
+            queryset=ProductIngredient.objects.select_related('ingredient', 'ingredient__category').order_by('id'),
+        ))
+        .order_by('created_at')
+    )
+    promotions = (
+        Promotion.objects.filter(restaurant_id=restaurant_id, is_active=True)
+        .prefetch_related(
+            Prefetch('items', queryset=PromotionItem.objects.select_related('product').order_by('id')),
+            Prefetch('rewards', queryset=PromotionReward.objects.select_related('product').order_by('id')),
+        )
+        .order_by('-created_at')
+    )
+    products = list(products)
+    # Sem request no contexto as imagens ficam com caminho relativo;
+    # a URL absoluta é montada na resposta de cada requisição.
+    return {
+        'store': dict(SettingsSerializer(store).data),
+        'accepting_orders': store.is_open,
+        'categories': list(CategorySerializer(categories, many=True).data),
+        'products': list(ProductSerializer(products, many=True).data),
+        'promotions': [_promotion_entry(promotion) for promotion in promotions],
+        'availability': build_availability_index({
+            product.id: effective_availability(product.availability, product.category.availability)
+            for product in products
+        }),
+    }
+
+
+def get_menu_snapshot(restaurant_id):
+    """
+    Retorna o snapshot do cardápio da versão atual do catálogo, reconstruindo-o se necessário.
+    """
+    version, _ = get_catalog_version(restaurant_id)
+    key = _cache_key(restaurant_id, version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_menu_snapshot(restaurant_id)
+        snapshot['version'] = version
+        cache.set(key, snapshot, MENU_CACHE_TIMEOUT)
+    return snapshot
+
+
+def get_unavailable_products(restaurant_id, snapshot, minute):
+    """
+    Retorna (trecho da semana, ids dos produtos fora do horário) para o minuto informado.
+    O trecho é achado por busca binária nas fronteiras do índice e o conjunto fica em
+    cache por trecho, então cada requisição custa um bisect e uma leitura de cache.
+    """
+    index = snapshot['availability']
+    segment = availability_segment(index, minute)
+    if not index['products']:
+        return segment, frozenset()
+    key = _unavailable_cache_key(restaurant_id, snapshot['version'], segment)
+    unavailable = cache.get(key)
+    if unavailable is None:
+        unavailable = unavailable_at(index, minute)
+        cache.set(key, unavailable, MENU_CACHE_TIMEOUT)
+    return segment, frozenset(unavailable)
+
+
+def with_availability(entries, unavailable):
+    """
+    Copia os produtos marcando `available_now` conforme o horário atual.
+    """
+    return [{**entry, 'available_now': entry['id'] not in unavailable} for entry in entries]
+
+
+def absolute_media_url(request, url):
+    if url and request is not None and url.startswith('/'):
+        return request.build_absolute_uri(url)
+    return url
+
+
+def _absolute_variants(request, variants):
+    if not variants:
+        return variants
+    return {
+        label: {key: absolute_media_url(request, value) if isinstance(value, str) else value for key, value in entry.items()}
+        for label, entry in variants.items()
+    }
+
+
+def with_absolute_images(request, entries, field='image'):
+    """
+    Copia as entradas do snapshot trocando o caminho da imagem (e das suas
+    derivadas, em <campo>_variants) pela URL absoluta.
+    """
+    variants_field = f'{field}_variants'
+    return [
+        {
+            **entry,
+            field: absolute_media_url(request, entry.get(field)),
+            variants_field: _absolute_variants(request, entry.get(variants_field)),
+        }
+        for entry in entries
+    ]
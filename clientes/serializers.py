@@ -2,6 +2,7 @@ from rest_framework import serializers
 from settings.models import Settings, OpeningHour
 from products.models import Category, Product, ProductIngredient, Ingredient, IngredientCategory
 from django.conf import settings as django_settings
+from products.images import variant_urls
 
 class OpeningHourSerializer(serializers.ModelSerializer):
     day_of_week_display = serializers.CharField(source='get_day_of_week_display', read_only=True)
@@ -11,6 +12,7 @@ class OpeningHourSerializer(serializers.ModelSerializer):
 
 class SettingsSerializer(serializers.ModelSerializer):
     business_photo = serializers.SerializerMethodField()
+    business_photo_variants = serializers.SerializerMethodField()
     business_slug = serializers.CharField(read_only=True)
     opening_hours = OpeningHourSerializer(many=True, read_only=True)
 
@@ -22,6 +24,7 @@ class SettingsSerializer(serializers.ModelSerializer):
             'business_address',
             'business_email',
             'business_photo',
+            'business_photo_variants',
             'business_slug',
             'opening_hours',
             'delivery_available',
@@ -39,10 +42,13 @@ class SettingsSerializer(serializers.ModelSerializer):
             return f"{django_settings.MEDIA_URL}{obj.business_photo}"
         return None
 
+    def get_business_photo_variants(self, obj):
+        return variant_urls(obj.business_photo_variants, self.context.get('request'))
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name', 'emoji', 'description']
+        fields = ['id', 'name', 'emoji', 'description', 'availability']
 
 class ProductIngredientSerializer(serializers.ModelSerializer):
     ingredient = serializers.SerializerMethodField()
@@ -68,11 +74,12 @@ class ProductIngredientSerializer(serializers.ModelSerializer):
 class ProductSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     ingredients = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'price', 'image', 'category_name', 'is_active', 'ingredients']
+        fields = ['id', 'name', 'description', 'price', 'image', 'image_variants', 'category_id', 'category_name', 'is_active', 'availability', 'ingredients']
 
     def get_image(self, obj):
         if obj.image:
@@ -82,6 +89,13 @@ class ProductSerializer(serializers.ModelSerializer):
             return f"{django_settings.MEDIA_URL}{obj.image}"
         return None
 
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants, self.context.get('request'))
+
     def get_ingredients(self, obj):
-        product_ingredients = ProductIngredient.objects.filter(product=obj).select_related('ingredient', 'ingredient__category')
+        # Usa os ingredientes pré-carregados (prefetch) quando disponíveis
+        if 'ingredients' in getattr(obj, '_prefetched_objects_cache', {}):
+            product_ingredients = obj.ingredients.all()
+        else:
+            product_ingredients = ProductIngredient.objects.filter(product=obj).select_related('ingredient', 'ingredient__category')
         return ProductIngredientSerializer(product_ingredients, many=True).data 
\ No newline at end of file
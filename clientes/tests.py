@@ -1,3 +1,128 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from products.models import Category, Product, Promotion, PromotionItem, PromotionReward
+from settings.models import Settings
 
-# Create your tests here.
+
+class StorefrontTestCase(TestCase):
+    """
+    Loja com um combo (Burger + Batata por 12,00, Refri de brinde) para os testes da vitrine.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Settings.objects.create(
+            owner=User.objects.create_user('loja', password='senha'), business_name='Loja Teste',
+            business_phone='', business_address='', business_email='loja@example.com',
+            opening_time='08:00', closing_time='18:00',
+        )
+        cls.slug = cls.restaurant.business_slug
+        cls.category = Category.objects.create(restaurant=cls.restaurant, name='Lanches')
+        cls.burger = cls.product('Burger', '10.00')
+        cls.fries = cls.product('Batata', '5.00')
+        cls.soda = cls.product('Refri', '4.00')
+        cls.combo = Promotion.objects.create(restaurant=cls.restaurant, name='Combo', description='', price='12.00')
+        PromotionItem.objects.create(promotion=cls.combo, product=cls.burger, quantity=1)
+        PromotionItem.objects.create(promotion=cls.combo, product=cls.fries, quantity=1)
+        PromotionReward.objects.create(promotion=cls.combo, product=cls.soda)
+
+    @classmethod
+    def product(cls, name, price):
+        return Product.objects.create(
+            restaurant=cls.restaurant, category=cls.category, name=name, description='', price=price
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+
+class StorePromotionMatchTests(StorefrontTestCase):
+    """
+    Sugestão das promoções que o carrinho da vitrine já fecha.
+    """
+
+    def match(self, items, slug=None):
+        return self.client.post(f'/api/clientes/{slug or self.slug}/promotions/match/', {'items': items}, format='json')
+
+    def test_suggests_completed_promotions(self):
+        response = self.match([
+            {'product_id': self.burger.pk, 'quantity': 2},
+            {'product_id': self.fries.pk, 'quantity': 3},
+            {'product_id': 'x'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        match, = response.data['promotions']
+        self.assertEqual((match['promotion_id'], match['bundles']), (self.combo.pk, 2))
+        self.assertEqual((match['price'], match['savings']), ('24.00', '6.00'))
+        self.assertEqual(match['reward_choices'], [self.soda.pk])
+
+    def test_incomplete_cart_and_bad_requests(self):
+        self.assertEqual(self.match([{'product_id': self.burger.pk, 'quantity': 5}]).data['promotions'], [])
+        self.assertEqual(self.client.post(f'/api/clientes/{self.slug}/promotions/match/', {}, format='json').status_code, 400)
+        self.assertEqual(self.match([], slug='nao-existe').status_code, 404)
+
+
+class StorefrontConditionalGetTests(StorefrontTestCase):
+    """
+    Cardápio e bootstrap da vitrine: ETag pela versão do catálogo, 304 com
+    If-None-Match e snapshot reconstruído depois de uma alteração no catálogo.
+    """
+
+    def menu_url(self):
+        return f'/api/clientes/products/?business_slug={self.slug}'
+
+    def bootstrap_url(self):
+        return f'/api/clientes/{self.slug}/bootstrap/'
+
+    def rename_burger(self):
+        self.burger.name = 'Burger Duplo'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.burger.save()
+
+    def assertNotModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_menu_not_modified(self):
+        response = self.client.get(self.menu_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({product['name'] for product in response.data}, {'Burger', 'Batata', 'Refri'})
+        # Versão, slug e snapshot em cache: o 304 sai sem consultar o banco
+        with self.assertNumQueries(0):
+            self.assertNotModified(self.menu_url(), response['ETag'])
+
+    def test_menu_changes_after_catalog_edit(self):
+        etag = self.client.get(self.menu_url())['ETag']
+        self.rename_burger()
+        response = self.client.get(self.menu_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Burger Duplo', {product['name'] for product in response.data})
+
+    def test_categories_not_modified(self):
+        url = f'/api/clientes/categories/?business_slug={self.slug}'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotModified(url, response['ETag'])
+
+    def test_bootstrap_not_modified(self):
+        response = self.client.get(self.bootstrap_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['store']['business_name'], 'Loja Teste')
+        self.assertEqual([promotion['name'] for promotion in response.data['promotions']], ['Combo'])
+        self.assertEqual(len(response.data['products']), 3)
+        self.assertNotModified(self.bootstrap_url(), response['ETag'])
+
+    def test_bootstrap_changes_after_catalog_edit(self):
+        response = self.client.get(self.bootstrap_url())
+        etag, version = response['ETag'], response.data['version']
+        self.rename_burger()
+        response = self.client.get(self.bootstrap_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertGreater(response.data['version'], version)
+        self.assertIn('Burger Duplo', {product['name'] for product in response.data['products']})
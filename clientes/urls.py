@@ -10,4 +10,7 @@ urlpatterns = [
     path('', include(router.urls)),
     path('store-info/', views.get_store_info, name='store-info'),
     path('<slug:business_slug>/', views.get_store_by_slug, name='store-by-slug'),
+    path('<slug:business_slug>/bootstrap/', views.get_store_bootstrap, name='store-bootstrap'),
+    path('<slug:business_slug>/promotions/', views.get_store_promotions, name='store-promotions'),
+    path('<slug:business_slug>/promotions/match/', views.match_store_promotions, name='store-promotions-match'),
 ] 
\ No newline at end of file
@@ -1,12 +1,23 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render
 from rest_framework import viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.pagination import PageNumberPagination
 from settings.models import Settings
-from products.models import Category, Product
+from settings.tenants import resolve_slug_id
+from django.db.models import Prefetch
+from products.models import Category, Product, ProductIngredient
 from .serializers import SettingsSerializer, CategorySerializer, ProductSerializer
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from products.catalog import get_catalog_version
+from products.search import rank_match, tokenize
+from settings.schedule import local_now, minute_of_week
+from .menu import get_menu_snapshot, get_unavailable_products, with_absolute_images, with_availability
+from orders.pricing import get_price_table, serialize_promotion_matches
+from orders.promotions import applicable_promotions, cart_quantities
+import hashlib
 
 # Create your views here.
 
@@ -24,17 +35,172 @@ def get_store_info(request):
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
+# Tempo que navegadores e proxies podem reutilizar uma resposta antes de revalidar pelo ETag
+STOREFRONT_MAX_AGE = 60
+
+# Limites da busca do cardápio
+SEARCH_MAX_TERMS = 8
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
+
+def _restaurant_id_for_slug(slug):
+    # Resolução em cache (local + compartilhado), invalidada em Settings.save
+    return resolve_slug_id(slug)
+
+
+def _catalog_validators(request, restaurant_id):
+    """
+    ETag forte e Last-Modified derivados da versão do catálogo do restaurante.
+    A URL completa entra no ETag porque filtros, paginação e host mudam o corpo.
+    """
+    version, updated_at = get_catalog_version(restaurant_id)
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()[:12]
+    etag = f'"{restaurant_id}-{version}-{digest}"'
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+    return etag, last_modified
+
+
+def _not_modified(request, validators):
+    """
+    Retorna a resposta 304 quando o cliente já possui a versão atual, ou None.
+    """
+    etag, last_modified = validators
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        _apply_cache_headers(response, validators)
+    return response
+
+
+def _availability_now(restaurant_id, snapshot):
+    """
+    Produtos fora do horário agora. O trecho da semana entra no ETag, porque a
+    disponibilidade muda com o horário mesmo sem mudar o catálogo.
+    """
+    return get_unavailable_products(restaurant_id, snapshot, minute_of_week(local_now()))
+
+
+def _with_suffix(validators, suffix):
+    etag, last_modified = validators
+    return f'{etag[:-1]}-{suffix}"', last_modified
+
+
+def _apply_cache_headers(response, validators):
+    etag, last_modified = validators
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=STOREFRONT_MAX_AGE)
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_store_by_slug(request, business_slug):
     """Retorna as informações da loja pelo slug"""
     try:
-        settings = get_object_or_404(Settings, business_slug=business_slug)
-        serializer = SettingsSerializer(settings, context={'request': request})
-        return Response(serializer.data)
+        restaurant_id = _restaurant_id_for_slug(business_slug)
+        if not restaurant_id:
+            return Response({'error': 'Loja não encontrada'}, status=404)
+
+        validators = _catalog_validators(request, restaurant_id)
+        not_modified = _not_modified(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        store = get_menu_snapshot(restaurant_id)['store']
+        data = with_absolute_images(request, [store], field='business_photo')[0]
+        return _apply_cache_headers(Response(data), validators)
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_store_bootstrap(request, business_slug):
+    """
+    Retorna em uma única resposta tudo que a vitrine precisa para abrir:
+    dados da loja, se está aberta agora, categorias, produtos e promoções ativas.
+    """
+    try:
+        restaurant_id = _restaurant_id_for_slug(business_slug)
+        if not restaurant_id:
+            return Response({'error': 'Loja não encontrada'}, status=404)
+
+        snapshot = get_menu_snapshot(restaurant_id)
+        # Agenda semanal compilada e em cache: nenhuma consulta para saber se está aberta
+        store = Settings(pk=restaurant_id)
+        is_open = bool(snapshot['accepting_orders']) and store.is_open_now()
+        segment, unavailable = _availability_now(restaurant_id, snapshot)
+
+        # O estado aberto/fechado muda com o horário, então também compõe o ETag
+        validators = _with_suffix(_catalog_validators(request, restaurant_id), f'{int(is_open)}-{segment}')
+        not_modified = _not_modified(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        data = {
+            'version': snapshot['version'],
+            'store': with_absolute_images(request, [snapshot['store']], field='business_photo')[0],
+            'is_open': is_open,
+            'next_opening': store.next_opening(),
+            'next_closing': store.next_closing(),
+            'categories': snapshot['categories'],
+            'products': with_availability(with_absolute_images(request, snapshot['products']), unavailable),
+            'promotions': with_absolute_images(request, snapshot['promotions']),
+        }
+        return _apply_cache_headers(Response(data), validators)
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_store_promotions(request, business_slug):
+    """
+    Retorna as promoções ativas da loja com referências compactas aos produtos
+    e a economia já calculada, a partir do snapshot do cardápio.
+    """
+    try:
+        restaurant_id = _restaurant_id_for_slug(business_slug)
+        if not restaurant_id:
+            return Response({'error': 'Loja não encontrada'}, status=404)
+
+        validators = _catalog_validators(request, restaurant_id)
+        not_modified = _not_modified(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        promotions = get_menu_snapshot(restaurant_id)['promotions']
+        return _apply_cache_headers(Response(with_absolute_images(request, promotions)), validators)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def match_store_promotions(request, business_slug):
+    """
+    Recebe o carrinho (`items` com product_id e quantity) e retorna as promoções
+    que ele já fecha, com a economia e os brindes disponíveis.
+    """
+    restaurant_id = _restaurant_id_for_slug(business_slug)
+    if not restaurant_id:
+        return Response({'error': 'Loja não encontrada'}, status=404)
+    items = request.data.get('items') if isinstance(request.data, dict) else None
+    if not isinstance(items, list):
+        return Response({'error': 'Envie os itens do carrinho em "items"'}, status=400)
+
+    pairs = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            pairs.append((int(item.get('product_id')), int(item.get('quantity', 1))))
+        except (TypeError, ValueError):
+            continue
+    table = get_price_table(restaurant_id)
+    matches = applicable_promotions(table, cart_quantities(pairs))
+    return Response({'promotions': serialize_promotion_matches(matches)})
+
 class NoPagination(PageNumberPagination):
     page_size = None
 
@@ -48,9 +214,30 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         queryset = Category.objects.filter(is_active=True)
         slug = self.request.query_params.get('business_slug')
         if slug:
-            queryset = queryset.filter(restaurant__business_slug=slug)
+            queryset = queryset.filter(restaurant_id=_restaurant_id_for_slug(slug))
         return queryset.order_by('name')
 
+    def list(self, request, *args, **kwargs):
+        slug = request.query_params.get('business_slug')
+        if not slug:
+            return super().list(request, *args, **kwargs)
+
+        # Cardápio da loja servido pelo snapshot, sem consultar as tabelas do catálogo
+        restaurant_id = _restaurant_id_for_slug(slug)
+        if not restaurant_id:
+            return super().list(request, *args, **kwargs)
+
+        validators = _catalog_validators(request, restaurant_id)
+        not_modified = _not_modified(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        categories = get_menu_snapshot(restaurant_id)['categories']
+        page = self.paginate_queryset(categories)
+        if page is not None:
+            return _apply_cache_headers(self.get_paginated_response(page), validators)
+        return _apply_cache_headers(Response(categories), validators)
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
@@ -67,11 +254,85 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         queryset = super().get_queryset()
         slug = self.request.query_params.get('business_slug')
         if slug:
-            queryset = queryset.filter(restaurant__business_slug=slug)
+            queryset = queryset.filter(restaurant_id=_restaurant_id_for_slug(slug))
         category_id = self.request.query_params.get('category', None)
         if category_id:
             queryset = queryset.filter(category_id=category_id)
-        return queryset.order_by('created_at')
+        return queryset.select_related('category').prefetch_related(
+            Prefetch('ingredients', queryset=ProductIngredient.objects.select_related('ingredient', 'ingredient__category').order_by('id'))
+        ).order_by('created_at')
+
+    def list(self, request, *args, **kwargs):
+        slug = request.query_params.get('business_slug')
+        if not slug:
+            return super().list(request, *args, **kwargs)
+
+        # Cardápio da loja servido pelo snapshot, sem consultar as tabelas do catálogo
+        restaurant_id = _restaurant_id_for_slug(slug)
+        if not restaurant_id:
+            return super().list(request, *args, **kwargs)
+
+        snapshot = get_menu_snapshot(restaurant_id)
+        segment, unavailable = _availability_now(restaurant_id, snapshot)
+        validators = _with_suffix(_catalog_validators(request, restaurant_id), segment)
+        not_modified = _not_modified(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        products = snapshot['products']
+        category_id = request.query_params.get('category', None)
+        if category_id:
+            products = [product for product in products if str(product['category_id']) == str(category_id)]
+        # ?available=1 lista só o que pode ser pedido agora
+        if request.query_params.get('available') in ('1', 'true'):
+            products = [product for product in products if product['id'] not in unavailable]
+        products = with_availability(with_absolute_images(request, products), unavailable)
+        return _apply_cache_headers(Response(products), validators)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Busca produtos da loja por nome, categoria, ingredientes e descrição,
+        ignorando acentos e maiúsculas. Cada termo casa com o início das palavras
+        ("frang" encontra "Frango") e os resultados que batem no nome vêm primeiro.
+        """
+        restaurant_id = _restaurant_id_for_slug(request.query_params.get('business_slug'))
+        if not restaurant_id:
+            return Response({'error': 'Loja não encontrada'}, status=404)
+
+        terms = tokenize(request.query_params.get('q', ''))[:SEARCH_MAX_TERMS]
+        try:
+            limit = int(request.query_params.get('limit', SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            limit = SEARCH_DEFAULT_LIMIT
+        limit = min(max(limit, 1), SEARCH_MAX_LIMIT)
+        if not terms:
+            return Response([])
+
+        snapshot = get_menu_snapshot(restaurant_id)
+        segment, unavailable = _availability_now(restaurant_id, snapshot)
+        validators = _with_suffix(_catalog_validators(request, restaurant_id), segment)
+        not_modified = _not_modified(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        # O documento começa com espaço: ' termo' só casa no início de uma palavra
+        queryset = Product.objects.filter(restaurant_id=restaurant_id, is_active=True)
+        for term in terms:
+            queryset = queryset.filter(search_document__contains=f' {term}')
+        matches = queryset.values_list('id', 'name', 'search_document')
+
+        scores = {
+            product_id: rank_match(terms, name, document)
+            for product_id, name, document in matches
+        }
+        products = [
+            product for product in snapshot['products']
+            if product['id'] in scores
+        ]
+        products.sort(key=lambda product: (-scores[product['id']], product['name'].lower()))
+        products = with_availability(with_absolute_images(request, products[:limit]), unavailable)
+        return _apply_cache_headers(Response(products), validators)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
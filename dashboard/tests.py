@@ -1,3 +1,44 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from orders.models import Order
+from settings.models import Settings
 
-# Create your tests here.
+
+class DashboardTenantTests(TestCase):
+    """
+    Os relatórios do dashboard usam só o restaurante do usuário; sem empresa, 403.
+    """
+    reports = ('summary', 'order_distribution', 'ingredient_usage', 'promotion_stats')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('loja', password='senha')
+        restaurant = Settings.objects.create(
+            owner=cls.user, business_name='Loja', business_phone='', business_address='',
+            business_email='loja@example.com', opening_time='08:00', closing_time='18:00',
+        )
+        other = Settings.objects.create(
+            owner=User.objects.create_user('outra', password='senha'), business_name='Outra', business_phone='',
+            business_address='', business_email='outra@example.com', opening_time='08:00', closing_time='18:00',
+        )
+        Order.objects.create(restaurant=restaurant, customer_name='A', customer_phone='1', status='delivered', total_amount=10)
+        Order.objects.create(restaurant=other, customer_name='B', customer_phone='2', status='delivered', total_amount=99)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_user_without_company_is_forbidden(self):
+        self.client.force_authenticate(User.objects.create_user('sem_empresa', password='senha'))
+        for report in self.reports:
+            response = self.client.get(f'/api/dashboard/{report}/')
+            self.assertEqual(response.status_code, 403, report)
+
+    def test_reports_only_count_own_orders(self):
+        self.client.force_authenticate(self.user)
+        for report in self.reports:
+            self.assertEqual(self.client.get(f'/api/dashboard/{report}/').status_code, 200, report)
+        response = self.client.get('/api/dashboard/order_distribution/', {'period': 'month'})
+        self.assertEqual((response.data['order_count'], response.data['total_revenue']), (1, 10))
@@ -2,16 +2,172 @@ from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Count, Avg, Q
+from django.db.models import Sum, Count, Avg, Q, F, DecimalField
+from django.db.models.functions import Coalesce, TruncDate
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
+from array import array
+from collections import Counter
 from .models import DailyStats, ProductStats, CategoryStats
 from .serializers import (
     DailyStatsSerializer, ProductStatsSerializer,
     CategoryStatsSerializer, DashboardSummarySerializer
 )
-from orders.models import Order, OrderItem
+from orders.models import Order, OrderItem, OrderItemIngredient
 from products.models import Product, Category
+from app.authentication import require_tenant
+
+ACCEPTED_STATUSES = ['confirmed', 'preparing', 'ready', 'delivered']
+COMPARE_MODES = ('previous', 'year_ago')
+
+
+def _parse_date(value):
+    year, month, day = map(int, value.split('-'))
+    return date(year, month, day)
+
+
+def _month_range(value):
+    """
+    Converte um mês no formato YYYY-MM no primeiro e último dia do mês.
+    """
+    year, month = map(int, value.split('-'))
+    first_day = date(year, month, 1)
+    if month == 12:
+        last_day = date(year + 1, 1, 1) - timedelta(days=1)
+    else:
+        last_day = date(year, month + 1, 1) - timedelta(days=1)
+    return first_day, last_day
+
+
+def _resolve_period(params, today):
+    """
+    Interpreta os parâmetros period/start_date/end_date/month.
+    Retorna (period, start_date, end_date); datas None significam todo o histórico.
+    """
+    period = params.get('period', 'today')
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+
+    if period == 'today':
+        return period, today, today
+    if period == 'week':
+        return period, week_ago, today
+    if period == 'month':
+        return period, month_ago, today
+    if period == 'lastMonth':
+        last_day_last = today.replace(day=1) - timedelta(days=1)
+        return period, last_day_last.replace(day=1), last_day_last
+    if period == 'custom':
+        start_param = params.get('start_date')  # YYYY-MM-DD
+        end_param = params.get('end_date')      # YYYY-MM-DD
+        custom_month = params.get('month')      # YYYY-MM
+        if start_param and end_param:
+            try:
+                return period, _parse_date(start_param), _parse_date(end_param)
+            except Exception:
+                return period, month_ago, today
+        if custom_month:
+            try:
+                return (period,) + _month_range(custom_month)
+            except ValueError:
+                pass
+        return period, month_ago, today
+    if period == 'all':
+        return period, None, None
+    return period, week_ago, today
+
+
+def _year_ago(value):
+    try:
+        return value.replace(year=value.year - 1)
+    except ValueError:
+        # 29 de fevereiro
+        return value.replace(year=value.year - 1, day=28)
+
+
+def _comparison_range(start_date, end_date, compare):
+    """
+    Calcula o período de comparação: o intervalo imediatamente anterior de mesmo
+    tamanho ('previous') ou o mesmo intervalo um ano antes ('year_ago').
+    """
+    if compare not in COMPARE_MODES or not start_date or not end_date:
+        return None, None
+    if compare == 'year_ago':
+        return _year_ago(start_date), _year_ago(end_date)
+    length = (end_date - start_date).days + 1
+    previous_end = start_date - timedelta(days=1)
+    return previous_end - timedelta(days=length - 1), previous_end
+
+
+def _deltas(current, previous, keys):
+    """
+    Diferença absoluta e percentual de cada métrica entre os dois períodos.
+    """
+    deltas = {}
+    for key in keys:
+        cur = current.get(key) or 0
+        prev = previous.get(key) or 0
+        deltas[key] = {
+            'absolute': round(cur - prev, 2),
+            'percent': round((cur - prev) / prev * 100, 2) if prev else None,
+        }
+    return deltas
+
+
+def _date_range_q(start_date, end_date):
+    if start_date and end_date:
+        return Q(created_at__date__gte=start_date, created_at__date__lte=end_date)
+    # Sem período definido: todos os pedidos
+    return Q(created_at__isnull=False)
+
+
+def _period_aggregates(prefix, range_q):
+    """
+    Agregações condicionais de um período, para compor uma única consulta.
+    """
+    accepted_q = Q(status__in=ACCEPTED_STATUSES)
+    return {
+        f'{prefix}_orders': Count('id', filter=range_q),
+        f'{prefix}_revenue': Sum('total_amount', filter=range_q & accepted_q),
+        f'{prefix}_pending': Count('id', filter=range_q & Q(status='pending')),
+        f'{prefix}_cancelled': Count('id', filter=range_q & Q(status='cancelled')),
+        f'{prefix}_completed': Count('id', filter=range_q & accepted_q),
+    }
+
+
+def _percentile(sorted_values, fraction):
+    """
+    Percentil com interpolação linear sobre uma sequência já ordenada.
+    """
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * weight
+
+
+def _histogram(sorted_values, bins):
+    """
+    Histograma de faixas de mesmo tamanho entre o menor e o maior valor.
+    """
+    if not sorted_values:
+        return []
+    low, high = sorted_values[0], sorted_values[-1]
+    width = (high - low) / bins if high > low else 1
+    counts = [0] * bins
+    for value in sorted_values:
+        counts[min(int((value - low) / width), bins - 1)] += 1
+    return [
+        {
+            'start': round(low + width * index, 2),
+            'end': round(low + width * (index + 1), 2),
+            'count': count,
+        }
+        for index, count in enumerate(counts)
+    ]
+
 
 class DashboardViewSet(viewsets.ViewSet):
     """
@@ -22,142 +178,74 @@ class DashboardViewSet(viewsets.ViewSet):
     def summary(self, request):
         """
         Retorna um resumo das estatísticas do dashboard.
+        Com ?compare=previous|year_ago inclui o período de comparação e as variações,
+        calculados na mesma consulta agregada.
         """
+        restaurant_id = require_tenant(request).id
         try:
-            # Parâmetros de período personalizados
-            custom_month = request.query_params.get('month')  # Formato esperado YYYY-MM
-            
-            # Buscar configurações do restaurante (fallback se não autenticado)
-            try:
-                restaurant = request.user.settings if hasattr(request, 'user') and request.user.is_authenticated else None
-            except:
-                restaurant = None
-                
-            # Se não tem restaurante específico, usar todos os pedidos
-            if not restaurant:
-                from settings.models import Settings
-                restaurant = Settings.objects.first()
-            
             today = timezone.now().date()
             week_ago = today - timedelta(days=7)
             month_ago = today - timedelta(days=30)
 
             # Se o usuário solicitar um mês específico no formato YYYY-MM
-            from datetime import date
+            custom_month = request.query_params.get('month')
+            month_filter_start, month_filter_end = month_ago, today
             if custom_month:
                 try:
-                    year, month = map(int, custom_month.split('-'))
-                    first_day_custom = date(year, month, 1)
-                    # calcular último dia do mês
-                    if month == 12:
-                        last_day_custom = date(year + 1, 1, 1) - timedelta(days=1)
-                    else:
-                        last_day_custom = date(year, month + 1, 1) - timedelta(days=1)
-                    month_filter_start = first_day_custom
-                    month_filter_end = last_day_custom
+                    month_filter_start, month_filter_end = _month_range(custom_month)
                 except ValueError:
-                    custom_month = None  # formato inválido, ignorar
-
-            if not custom_month:
-                month_filter_start = month_ago
-                month_filter_end = today
+                    pass  # formato inválido, ignorar
 
             # Base queryset por restaurante
-            accepted_statuses = ['confirmed', 'preparing', 'ready', 'delivered']
-            base_qs = Order.objects.all()
-            if restaurant:
-                base_qs = base_qs.filter(restaurant=restaurant)
-
-            # Determinar período solicitado
-            period = request.query_params.get('period', 'today')
-            start_param = request.query_params.get('start_date')  # YYYY-MM-DD
-            end_param = request.query_params.get('end_date')      # YYYY-MM-DD
-
-            # Datas padrão
-            start_date = None
-            end_date = None
-
-            if period == 'today':
-                start_date, end_date = today, today
-            elif period == 'week':
-                start_date, end_date = week_ago, today
-            elif period == 'month':
-                start_date, end_date = month_ago, today
-            elif period == 'lastMonth':
-                from datetime import date
-                first_day_last = date(today.year, today.month - 1 if today.month > 1 else 12, 1)
-                if today.month == 1:
-                    last_day_last = date(today.year, 1, 1) - timedelta(days=1)
-                else:
-                    last_day_last = date(today.year, today.month, 1) - timedelta(days=1)
-                start_date, end_date = first_day_last, last_day_last
-            elif period == 'custom':
-                if start_param and end_param:
-                    try:
-                        y1, m1, d1 = map(int, start_param.split('-'))
-                        y2, m2, d2 = map(int, end_param.split('-'))
-                        from datetime import date
-                        start_date = date(y1, m1, d1)
-                        end_date = date(y2, m2, d2)
-                    except Exception:
-                        start_date, end_date = month_ago, today
-                elif custom_month:
-                    start_date, end_date = month_filter_start, month_filter_end
-                else:
-                    start_date, end_date = month_ago, today
-            elif period == 'all':
-                start_date, end_date = None, None
-            else:
-                start_date, end_date = week_ago, today
-
-            # Queryset do período
-            period_qs = base_qs
-            if start_date and end_date:
-                period_qs = period_qs.filter(created_at__date__gte=start_date, created_at__date__lte=end_date)
+            base_qs = Order.objects.filter(restaurant_id=restaurant_id)
 
-            # Estatísticas auxiliares (hoje/semana/mês) para cards laterais
-            today_qs = base_qs.filter(created_at__date=today)
-            week_qs = base_qs.filter(created_at__date__gte=week_ago)
-            month_qs = base_qs.filter(created_at__date__gte=month_filter_start, created_at__date__lte=month_filter_end)
+            # Determinar período solicitado e o período de comparação
+            period, start_date, end_date = _resolve_period(request.query_params, today)
+            compare = request.query_params.get('compare')
+            compare_start, compare_end = _comparison_range(start_date, end_date, compare)
 
-            today_stats = {
-                'orders': today_qs.count(),
-                'revenue': float(today_qs.filter(status__in=accepted_statuses).aggregate(total=Sum('total_amount'))['total'] or 0)
-            }
-            week_stats = {
-                'orders': week_qs.count(),
-                'revenue': float(week_qs.filter(status__in=accepted_statuses).aggregate(total=Sum('total_amount'))['total'] or 0)
-            }
-            month_stats = {
-                'orders': month_qs.count(),
-                'revenue': float(month_qs.filter(status__in=accepted_statuses).aggregate(total=Sum('total_amount'))['total'] or 0)
+            accepted_q = Q(status__in=ACCEPTED_STATUSES)
+            today_q = Q(created_at__date=today)
+            week_q = Q(created_at__date__gte=week_ago)
+            month_q = Q(created_at__date__gte=month_filter_start, created_at__date__lte=month_filter_end)
+
+            # Todas as métricas em uma única consulta com agregações condicionais
+            aggregates = {
+                'today_orders': Count('id', filter=today_q),
+                'today_revenue': Sum('total_amount', filter=today_q & accepted_q),
+                'week_orders': Count('id', filter=week_q),
+                'week_revenue': Sum('total_amount', filter=week_q & accepted_q),
+                'month_orders': Count('id', filter=month_q),
+                'month_revenue': Sum('total_amount', filter=month_q & accepted_q),
+                'total_orders': Count('id'),
+                'total_revenue': Sum('total_amount', filter=accepted_q),
+                'cancelled_orders': Count('id', filter=Q(status='cancelled')),
             }
+            aggregates.update(_period_aggregates('period', _date_range_q(start_date, end_date)))
+            if compare_start:
+                aggregates.update(_period_aggregates('compare', _date_range_q(compare_start, compare_end)))
+            totals = base_qs.aggregate(**aggregates)
+            for key, value in totals.items():
+                if key.endswith('_revenue'):
+                    totals[key] = float(value or 0)
 
             # Paginação para pedidos recentes do período
             limit = int(request.query_params.get('limit', 10))
             page = int(request.query_params.get('page', 1))
             offset = (page - 1) * limit
+            period_qs = base_qs
+            if start_date and end_date:
+                period_qs = period_qs.filter(created_at__date__gte=start_date, created_at__date__lte=end_date)
             recent_orders = period_qs.order_by('-created_at')[offset:offset+limit]
 
-            # Totais
-            total_orders = base_qs.count()
-            total_revenue = float(base_qs.filter(status__in=accepted_statuses).aggregate(total=Sum('total_amount'))['total'] or 0)
-
-            # Totais do período
-            period_orders = period_qs.count()
-            period_revenue = float(period_qs.filter(status__in=accepted_statuses).aggregate(total=Sum('total_amount'))['total'] or 0)
-            period_pending = period_qs.filter(status='pending').count()
-            period_cancelled = period_qs.filter(status='cancelled').count()
-            period_completed = period_qs.filter(status__in=accepted_statuses).count()
-
             data = {
-                'today_orders': today_stats['orders'],
-                'today_revenue': today_stats['revenue'],
-                'week_orders': week_stats['orders'],
-                'week_revenue': week_stats['revenue'],
-                'month_orders': month_stats['orders'],
-                'month_revenue': month_stats['revenue'],
-                'cancelled_orders': base_qs.filter(status='cancelled').count(),
+                'today_orders': totals['today_orders'],
+                'today_revenue': totals['today_revenue'],
+                'week_orders': totals['week_orders'],
+                'week_revenue': totals['week_revenue'],
+                'month_orders': totals['month_orders'],
+                'month_revenue': totals['month_revenue'],
+                'cancelled_orders': totals['cancelled_orders'],
                 'recent_orders': [
                     {
                         'id': order.id,
@@ -168,18 +256,30 @@ class DashboardViewSet(viewsets.ViewSet):
                     }
                     for order in recent_orders
                 ],
-                'total_orders': total_orders,
-                'total_revenue': total_revenue,
+                'total_orders': totals['total_orders'],
+                'total_revenue': totals['total_revenue'],
                 'period': period,
-                'period_orders': period_orders,
-                'period_revenue': period_revenue,
-                'period_pending': period_pending,
-                'period_completed': period_completed,
-                'period_cancelled': period_cancelled,
+                'period_orders': totals['period_orders'],
+                'period_revenue': totals['period_revenue'],
+                'period_pending': totals['period_pending'],
+                'period_completed': totals['period_completed'],
+                'period_cancelled': totals['period_cancelled'],
                 'period_start_date': str(start_date) if start_date else None,
                 'period_end_date': str(end_date) if end_date else None,
             }
 
+            if compare_start:
+                metrics = ('orders', 'revenue', 'pending', 'completed', 'cancelled')
+                current = {key: totals[f'period_{key}'] for key in metrics}
+                previous = {key: totals[f'compare_{key}'] for key in metrics}
+                data['comparison'] = {
+                    'compare': compare,
+                    'start_date': str(compare_start),
+                    'end_date': str(compare_end),
+                    **previous,
+                    'deltas': _deltas(current, previous, metrics),
+                }
+
             return Response(data)
         except Exception as e:
             return Response(
@@ -187,21 +287,287 @@ class DashboardViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['get'])
+    def order_distribution(self, request):
+        """
+        Retorna a distribuição dos valores dos pedidos do período: percentis do ticket,
+        histograma dos totais e distribuição da quantidade de itens por pedido.
+        Os valores são lidos em lotes com values_list, sem instanciar os pedidos.
+        """
+        restaurant_id = require_tenant(request).id
+        try:
+            today = timezone.now().date()
+            period, start_date, end_date = _resolve_period(request.query_params, today)
+            try:
+                bins = min(max(int(request.query_params.get('bins', 10)), 1), 50)
+            except ValueError:
+                bins = 10
+
+            orders_qs = Order.objects.filter(restaurant_id=restaurant_id, status__in=ACCEPTED_STATUSES)
+            if start_date and end_date:
+                orders_qs = orders_qs.filter(created_at__date__gte=start_date, created_at__date__lte=end_date)
+
+            values = array('d')
+            for amount in orders_qs.values_list('total_amount', flat=True).order_by().iterator(chunk_size=2000):
+                values.append(float(amount or 0))
+            values = sorted(values)
+
+            item_counts = Counter(
+                OrderItem.objects.filter(order__in=orders_qs.values('id'))
+                .values('order_id')
+                .annotate(items=Sum('quantity'))
+                .order_by()
+                .values_list('items', flat=True)
+                .iterator(chunk_size=2000)
+            )
+
+            # Pedidos sem itens registrados entram na faixa de zero itens
+            without_items = len(values) - sum(item_counts.values())
+            if without_items > 0:
+                item_counts[0] += without_items
+
+            total = sum(values)
+            return Response({
+                'period': period,
+                'period_start_date': str(start_date) if start_date else None,
+                'period_end_date': str(end_date) if end_date else None,
+                'order_count': len(values),
+                'total_revenue': round(total, 2),
+                'average_order_value': round(total / len(values), 2) if values else 0,
+                'min': values[0] if values else None,
+                'max': values[-1] if values else None,
+                'percentiles': {
+                    f'p{int(fraction * 100)}': round(_percentile(values, fraction), 2) if values else None
+                    for fraction in (0.25, 0.5, 0.75, 0.9)
+                },
+                'histogram': _histogram(values, bins),
+                'item_count_distribution': [
+                    {'items': items, 'orders': count}
+                    for items, count in sorted(item_counts.items())
+                ],
+            })
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'])
+    def ingredient_usage(self, request):
+        """
+        Retorna o consumo de ingredientes do período, agrupado por grupo e ingrediente:
+        vezes adicionado, adicionado como extra, removido e receita de extras.
+        Com ?granularity=day o resultado é quebrado por dia.
+        """
+        restaurant_id = require_tenant(request).id
+        try:
+            today = timezone.now().date()
+            period, start_date, end_date = _resolve_period(request.query_params, today)
+            daily = request.query_params.get('granularity') == 'day'
+
+            usage_qs = OrderItemIngredient.objects.filter(order_item__order__restaurant_id=restaurant_id).exclude(
+                order_item__order__status='cancelled'
+            )
+            if start_date and end_date:
+                usage_qs = usage_qs.filter(
+                    order_item__order__created_at__date__gte=start_date,
+                    order_item__order__created_at__date__lte=end_date,
+                )
+
+            group_fields = ['group_name', 'ingredient_id', 'ingredient__name']
+            ordering = ['group_name', 'ingredient__name']
+            if daily:
+                usage_qs = usage_qs.annotate(day=TruncDate('order_item__order__created_at'))
+                group_fields.insert(0, 'day')
+                ordering.insert(0, 'day')
+
+            added_q = Q(is_added=True)
+            extra_q = Q(is_added=True, is_extra=True)
+            money = DecimalField(max_digits=12, decimal_places=2)
+            rows = (
+                usage_qs.values(*group_fields)
+                .annotate(
+                    times_added=Count('id', filter=added_q),
+                    times_added_as_extra=Count('id', filter=extra_q),
+                    times_removed=Count('id', filter=Q(is_added=False)),
+                    units_added=Sum('order_item__quantity', filter=added_q),
+                    # O preço do extra é por unidade do item, como na cotação (orders/pricing.py)
+                    extra_revenue=Sum(F('price') * F('order_item__quantity'), filter=extra_q, output_field=money),
+                )
+                .order_by(*ordering)
+            )
+
+            results = []
+            for row in rows:
+                entry = {
+                    'group_name': row['group_name'],
+                    'ingredient_id': row['ingredient_id'],
+                    'ingredient_name': row['ingredient__name'],
+                    'times_added': row['times_added'],
+                    'times_added_as_extra': row['times_added_as_extra'],
+                    'times_removed': row['times_removed'],
+                    'units_added': row['units_added'] or 0,
+                    'extra_revenue': float(row['extra_revenue'] or 0),
+                }
+                if daily:
+                    entry = {'date': str(row['day']), **entry}
+                results.append(entry)
+
+            return Response({
+                'period': period,
+                'period_start_date': str(start_date) if start_date else None,
+                'period_end_date': str(end_date) if end_date else None,
+                'granularity': 'day' if daily else 'period',
+                'results': results,
+            })
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'])
+    def promotion_stats(self, request):
+        """
+        Retorna o desempenho de cada promoção no período, por dia: resgates, receita,
+        brindes entregues e taxa de adesão (pedidos com a promoção / pedidos do dia).
+        """
+        restaurant_id = require_tenant(request).id
+        try:
+            today = timezone.now().date()
+            period, start_date, end_date = _resolve_period(request.query_params, today)
+
+            orders_qs = Order.objects.filter(restaurant_id=restaurant_id).exclude(status='cancelled')
+            if start_date and end_date:
+                orders_qs = orders_qs.filter(created_at__date__gte=start_date, created_at__date__lte=end_date)
+
+            promotion_q = Q(item_type='promotion')
+            reward_q = Q(item_type='reward')
+            money = DecimalField(max_digits=12, decimal_places=2)
+            rows = (
+                OrderItem.objects.filter(promotion__isnull=False, order__in=orders_qs.values('id'))
+                .annotate(day=TruncDate('order__created_at'))
+                .values('promotion_id', 'promotion__name', 'day')
+                .annotate(
+                    orders=Count('order', distinct=True),
+                    redemptions=Count('order', distinct=True, filter=promotion_q),
+                    # Valor rateado do combo gravado no item (total_price); unit_price é arredondado
+                    revenue=Sum(
+                        Coalesce('total_price', F('unit_price') * F('quantity'), output_field=money),
+                        filter=promotion_q, output_field=money,
+                    ),
+                    reward_items=Sum('quantity', filter=reward_q),
+                    # Valor do brinde pelo preço avulso gravado no pedido, não o preço atual do produto;
+                    # pedidos sem esse registro usam o preço unitário gravado na época
+                    reward_value=Sum(
+                        Coalesce('regular_price', 'unit_price') * F('quantity'),
+                        filter=reward_q, output_field=money,
+                    ),
+                )
+                .order_by('promotion_id', 'day')
+            )
+
+            # Total de pedidos por dia, denominador da taxa de adesão
+            orders_per_day = dict(
+                orders_qs.annotate(day=TruncDate('created_at'))
+                .values('day')
+                .annotate(total=Count('id'))
+                .order_by()
+                .values_list('day', 'total')
+            )
+
+            promotions = {}
+            for row in rows:
+                promotion = promotions.setdefault(row['promotion_id'], {
+                    'promotion_id': row['promotion_id'],
+                    'promotion_name': row['promotion__name'],
+                    'orders': 0,
+                    'redemptions': 0,
+                    'revenue': 0.0,
+                    'reward_items': 0,
+                    'reward_value': 0.0,
+                    'days': [],
+                })
+                day_orders = orders_per_day.get(row['day']) or 0
+                day = {
+                    'date': str(row['day']),
+                    'orders': row['orders'],
+                    'redemptions': row['redemptions'],
+                    'revenue': float(row['revenue'] or 0),
+                    'reward_items': row['reward_items'] or 0,
+                    'reward_value': float(row['reward_value'] or 0),
+                    'attach_rate': round(row['orders'] / day_orders * 100, 2) if day_orders else 0,
+                }
+                promotion['days'].append(day)
+                for key in ('orders', 'redemptions', 'revenue', 'reward_items', 'reward_value'):
+                    promotion[key] += day[key]
+
+            period_orders = sum(orders_per_day.values())
+            results = []
+            for promotion in promotions.values():
+                promotion['revenue'] = round(promotion['revenue'], 2)
+                promotion['reward_value'] = round(promotion['reward_value'], 2)
+                promotion['attach_rate'] = round(promotion['orders'] / period_orders * 100, 2) if period_orders else 0
+                results.append(promotion)
+            results.sort(key=lambda promotion: promotion['revenue'], reverse=True)
+
+            return Response({
+                'period': period,
+                'period_start_date': str(start_date) if start_date else None,
+                'period_end_date': str(end_date) if end_date else None,
+                'period_orders': period_orders,
+                'results': results,
+            })
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     @action(detail=False, methods=['get'])
     def daily_stats(self, request):
         """
         Retorna estatísticas diárias.
+        Com ?compare=previous|year_ago retorna também a série do período de comparação,
+        lida na mesma consulta.
         """
         try:
             days = int(request.query_params.get('days', 7))
-            start_date = timezone.now().date() - timedelta(days=days)
+            today = timezone.now().date()
+            start_date = today - timedelta(days=days)
+            compare = request.query_params.get('compare')
+            compare_start, compare_end = _comparison_range(start_date, today, compare)
+
+            if not compare_start:
+                stats = DailyStats.objects.filter(
+                    date__gte=start_date
+                ).order_by('date')
+
+                serializer = DailyStatsSerializer(stats, many=True)
+                return Response(serializer.data)
 
             stats = DailyStats.objects.filter(
-                date__gte=start_date
+                Q(date__gte=start_date) | Q(date__gte=compare_start, date__lte=compare_end)
             ).order_by('date')
+            current = [row for row in stats if row.date >= start_date]
+            previous = [row for row in stats if compare_start <= row.date <= compare_end]
 
-            serializer = DailyStatsSerializer(stats, many=True)
-            return Response(serializer.data)
+            def totals(rows):
+                return {
+                    'total_orders': sum(row.total_orders for row in rows),
+                    'total_revenue': float(sum(row.total_revenue for row in rows)),
+                }
+
+            current_totals = totals(current)
+            previous_totals = totals(previous)
+            return Response({
+                'compare': compare,
+                'current': DailyStatsSerializer(current, many=True).data,
+                'previous': DailyStatsSerializer(previous, many=True).data,
+                'current_totals': current_totals,
+                'previous_totals': previous_totals,
+                'deltas': _deltas(current_totals, previous_totals, ('total_orders', 'total_revenue')),
+            })
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-19 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0005_alter_order_created_at_alter_order_order_number_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="orderitem",
+            index=models.Index(
+                fields=["promotion", "item_type"], name="orders_orde_promoti_3f4b5b_idx"
+            ),
+        ),
+    ]
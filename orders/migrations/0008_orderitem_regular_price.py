@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-19 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0007_orderitem_total_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="regular_price",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                max_digits=10,
+                null=True,
+                verbose_name="Preço Avulso",
+            ),
+        ),
+    ]
@@ -69,6 +69,10 @@ class OrderItem(models.Model):
     product_name = models.CharField(max_length=100, default='Produto', verbose_name='Nome do Produto')
     quantity = models.PositiveIntegerField(default=1, verbose_name='Quantidade')
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Preço Unitário')
+    # Total do item gravado na criação; vazio nos pedidos anteriores à cotação no servidor
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Preço Total')
+    # Preço avulso do produto na data do pedido (valor de referência de brindes e combos)
+    regular_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Preço Avulso')
     notes = models.CharField(max_length=200, blank=True, verbose_name='Observações')
     customization_details = models.JSONField(null=True, blank=True, verbose_name='Detalhes de Personalização')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -77,6 +81,9 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = 'Item de Pedido'
         verbose_name_plural = 'Itens de Pedido'
+        indexes = [
+            models.Index(fields=['promotion', 'item_type']),
+        ]
 
     def __str__(self):
         if self.item_type == 'promotion':
@@ -0,0 +1,479 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.core.cache import cache
+from products.availability import effective_availability, is_available_at
+from products.catalog import get_catalog_version
+from products.models import Ingredient, Product, ProductIngredient, Promotion, PromotionItem, PromotionReward
+from settings.models import Settings
+from settings.schedule import local_now, minute_of_week
+from .models import OrderItem, OrderItemIngredient
+from .promotions import applicable_promotions, build_promotion_index, cart_quantities, match_promotions
+
+# A chave inclui a versão do catálogo, então tabelas antigas apenas expiram
+PRICE_TABLE_TIMEOUT = 60 * 60 * 24
+
+CENTS = Decimal('0.01')
+ZERO = Decimal('0')
+
+ITEM_TYPES = {choice for choice, _ in OrderItem.ITEM_TYPE_CHOICES}
+
+
+class PricingError(Exception):
+    """
+    Carrinho inválido. `errors` traz uma mensagem por problema encontrado.
+    """
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def _cache_key(restaurant_id, version):
+    return f'orders:price_table:{restaurant_id}:{version}'
+
+
+def _money(value):
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def build_price_table(restaurant_id):
+    """
+    Carrega em memória tudo que é preciso para precificar um carrinho do restaurante:
+    produtos (e o índice por nome), opções de ingredientes (com grupos), ingredientes
+    do restaurante, promoções (com o índice produto → promoções) e taxa de entrega.
+    Usa um número fixo de consultas, independente do tamanho do cardápio.
+    """
+    store = (
+        Settings.objects.filter(pk=restaurant_id)
+        .values('delivery_available', 'delivery_fee', 'minimum_order_value')
+        .first()
+    ) or {'delivery_available': False, 'delivery_fee': ZERO, 'minimum_order_value': ZERO}
+
+    products = {}
+    for product_id, name, price, is_active, availability, category_availability in (
+        Product.objects.filter(restaurant_id=restaurant_id)
+        .values_list('id', 'name', 'price', 'is_active', 'availability', 'category__availability')
+    ):
+        products[product_id] = {
+            'name': name,
+            'price': price,
+            'is_active': is_active,
+            # Intervalos semanais em que pode ser pedido (None = sempre)
+            'availability': effective_availability(availability, category_availability),
+            'options': {},
+            'groups': {},
+        }
+
+    # Pedidos no formato antigo da vitrine identificam o produto só pelo nome;
+    # nomes repetidos ficam ambíguos (None)
+    product_names = {}
+    for product_id, product in products.items():
+        key = product['name'].strip().lower()
+        product_names[key] = None if key in product_names else product_id
+
+    ingredients = {
+        ingredient_id: {'name': name, 'price': price or ZERO}
+        for ingredient_id, name, price in (
+            Ingredient.objects.filter(restaurant_id=restaurant_id).values_list('id', 'name', 'price')
+        )
+    }
+
+    for row in (
+        ProductIngredient.objects.filter(product__restaurant_id=restaurant_id)
+        .order_by('id')
+        .values(
+            'product_id', 'ingredient_id', 'ingredient__name', 'group_name',
+            'is_required', 'max_quantity', 'price', 'is_extra',
+        )
+    ):
+        product = products.get(row['product_id'])
+        if product is None:
+            continue
+        group_key = row['group_name'].strip().lower()
+        product['options'].setdefault(row['ingredient_id'], []).append({
+            'name': row['ingredient__name'],
+            'group_name': row['group_name'].strip(),
+            'group_key': group_key,
+            'price': row['price'],
+            'is_extra': row['is_extra'],
+        })
+        # Regras do grupo: obrigatório se alguma linha for, limite pelo maior max_quantity
+        group = product['groups'].setdefault(group_key, {
+            'name': row['group_name'].strip(),
+            'is_required': False,
+            'max_quantity': 0,
+        })
+        group['is_required'] = group['is_required'] or row['is_required']
+        group['max_quantity'] = max(group['max_quantity'], row['max_quantity'])
+
+    promotions = {
+        promotion_id: {'name': name, 'price': price, 'items': {}, 'rewards': set()}
+        for promotion_id, name, price in (
+            Promotion.objects.filter(restaurant_id=restaurant_id, is_active=True)
+            .values_list('id', 'name', 'price')
+        )
+    }
+    for promotion_id, product_id, quantity in (
+        PromotionItem.objects.filter(promotion_id__in=promotions)
+        .values_list('promotion_id', 'product_id', 'quantity')
+    ):
+        promotions[promotion_id]['items'][product_id] = quantity
+    for promotion_id, product_id in (
+        PromotionReward.objects.filter(promotion_id__in=promotions)
+        .values_list('promotion_id', 'product_id')
+    ):
+        promotions[promotion_id]['rewards'].add(product_id)
+
+    return {
+        'delivery_available': store['delivery_available'],
+        'delivery_fee': store['delivery_fee'] or ZERO,
+        'minimum_order_value': store['minimum_order_value'] or ZERO,
+        'products': products,
+        'product_names': product_names,
+        'ingredients': ingredients,
+        'promotions': promotions,
+        'promotion_index': build_promotion_index(promotions, products),
+    }
+
+
+def get_price_table(restaurant_id):
+    """
+    Retorna a tabela de preços da versão atual do catálogo, reconstruindo-a se necessário.
+    """
+    version, _ = get_catalog_version(restaurant_id)
+    key = _cache_key(restaurant_id, version)
+    table = cache.get(key)
+    if table is None:
+        table = build_price_table(restaurant_id)
+        table['version'] = version
+        cache.set(key, table, PRICE_TABLE_TIMEOUT)
+    return table
+
+
+def _to_int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _line_product_id(item, table):
+    """
+    Produto do item: product_id no item, senão o enviado dentro dos ingredientes
+    (pedido personalizado da vitrine), senão pelo product_name (formato antigo,
+    usado para produtos sem personalização).
+    """
+    product_id = item.get('product_id') or item.get('product')
+    if not product_id:
+        for ingredient in item.get('ingredients') or []:
+            if isinstance(ingredient, dict) and ingredient.get('product_id'):
+                product_id = ingredient['product_id']
+                break
+    if not product_id and item.get('product_name'):
+        product_id = table['product_names'].get(str(item['product_name']).strip().lower())
+    return _to_int(product_id)
+
+
+def _loose_option(ingredient, selection):
+    """
+    Opção para um ingrediente do restaurante que não está vinculado ao produto, como o
+    formato antigo da vitrine aceitava: preço base do ingrediente, no grupo informado.
+    """
+    group_name = (selection.get('group_name') or selection.get('groupName') or 'Auto').strip() or 'Auto'
+    return {
+        'name': ingredient['name'],
+        'group_name': group_name,
+        'group_key': group_name.lower(),
+        'price': ingredient['price'],
+        'is_extra': bool(selection.get('is_extra', False)),
+    }
+
+
+def _match_option(options, selection):
+    """
+    Escolhe a opção do produto para o ingrediente selecionado: pelo grupo informado,
+    senão pela marcação de extra, senão a primeira cadastrada.
+    """
+    group_name = (selection.get('group_name') or selection.get('groupName') or '').strip().lower()
+    if group_name:
+        return next((option for option in options if option['group_key'] == group_name), None)
+    if 'is_extra' in selection:
+        is_extra = bool(selection.get('is_extra'))
+        for option in options:
+            if option['is_extra'] == is_extra:
+                return option
+    return options[0]
+
+
+def _price_line(index, item, table, errors, minute):
+    label = f'Item {index + 1}'
+    product_id = _line_product_id(item, table)
+    product = table['products'].get(product_id)
+    if product is None:
+        errors.append(f'{label}: produto não encontrado')
+        return None
+    if not product['is_active']:
+        errors.append(f'{label}: o produto "{product["name"]}" não está disponível')
+        return None
+    if not is_available_at(product['availability'], minute):
+        errors.append(f'{label}: o produto "{product["name"]}" não está disponível neste horário')
+        return None
+
+    quantity = _to_int(item.get('quantity', 1))
+    if not quantity or quantity < 1:
+        errors.append(f'{label}: quantidade inválida')
+        return None
+
+    item_type = item.get('item_type') or 'regular'
+    if item_type not in ITEM_TYPES:
+        errors.append(f'{label}: tipo de item inválido')
+        return None
+    promotion_id = _to_int(item.get('promotion_id')) if item_type != 'regular' else None
+    if item_type != 'regular' and promotion_id not in table['promotions']:
+        errors.append(f'{label}: promoção não encontrada')
+        return None
+
+    ingredients = {}
+    selected_per_group = {}
+    extras_price = ZERO
+    for selection in item.get('ingredients') or []:
+        if not isinstance(selection, dict):
+            continue
+        ingredient_id = _to_int(selection.get('ingredient') or selection.get('ingredient_id'))
+        options = product['options'].get(ingredient_id)
+        option = _match_option(options, selection) if options else None
+        if option is None:
+            if ingredient_id not in table['ingredients']:
+                # Ingrediente inexistente (ou de outro restaurante): ignorado, como antes
+                continue
+            option = _loose_option(table['ingredients'][ingredient_id], selection)
+        is_added = bool(selection.get('is_added', True))
+        price = option['price'] if is_added else ZERO
+        if is_added:
+            selected_per_group[option['group_key']] = selected_per_group.get(option['group_key'], 0) + 1
+            extras_price += price
+        # Seleções repetidas (ex.: bacon duas vezes) viram uma entrada com o preço somado,
+        # a mesma chave do unique_together de OrderItemIngredient
+        key = (ingredient_id, option['group_name'], option['is_extra'])
+        entry = ingredients.get(key)
+        if entry is None:
+            ingredients[key] = {
+                'ingredient_id': ingredient_id,
+                'name': option['name'],
+                'group_name': option['group_name'],
+                'is_extra': option['is_extra'],
+                'is_added': is_added,
+                'price': price,
+            }
+        else:
+            entry['is_added'] = entry['is_added'] or is_added
+            entry['price'] += price
+
+    for group_key, group in product['groups'].items():
+        selected = selected_per_group.get(group_key, 0)
+        if group['is_required'] and not selected:
+            errors.append(f'{label}: escolha ao menos uma opção em "{group["name"]}"')
+        elif group['max_quantity'] and selected > group['max_quantity']:
+            errors.append(f'{label}: no máximo {group["max_quantity"]} opção(ões) em "{group["name"]}"')
+
+    # Itens de promoção e brindes recebem o preço na distribuição do combo
+    unit_price = product['price'] if item_type == 'regular' else ZERO
+    return {
+        'index': index,
+        'product_id': product_id,
+        'product_name': product['name'],
+        'regular_price': product['price'],
+        'item_type': item_type,
+        'promotion_id': promotion_id,
+        'quantity': quantity,
+        'unit_price': unit_price,
+        'extras_price': extras_price,
+        'notes': (item.get('notes') or '')[:200],
+        'customization_details': item.get('customization_details'),
+        'ingredients': list(ingredients.values()),
+    }
+
+
+def _price_promotions(lines, table, errors):
+    """
+    Cobra o preço do combo por combo montado e distribui o valor entre os itens da
+    promoção proporcionalmente ao preço avulso; brindes saem a custo zero.
+    Os itens marcados para a promoção precisam fechar combos completos.
+    """
+    by_promotion = {}
+    for line in lines:
+        if line['promotion_id']:
+            by_promotion.setdefault(line['promotion_id'], []).append(line)
+
+    for promotion_id, promotion_lines in by_promotion.items():
+        promotion = table['promotions'][promotion_id]
+        items = [line for line in promotion_lines if line['item_type'] == 'promotion']
+        rewards = [line for line in promotion_lines if line['item_type'] == 'reward']
+
+        for line in items:
+            if line['product_id'] not in promotion['items']:
+                errors.append(f'Item {line["index"] + 1}: o produto não faz parte da promoção "{promotion["name"]}"')
+        for line in rewards:
+            if line['product_id'] not in promotion['rewards']:
+                errors.append(f'Item {line["index"] + 1}: o produto não é um brinde da promoção "{promotion["name"]}"')
+        if not items:
+            errors.append(f'Promoção "{promotion["name"]}": nenhum item da promoção no carrinho')
+            continue
+
+        quantities = cart_quantities((line['product_id'], line['quantity']) for line in items)
+        bundles = match_promotions(table, quantities).get(promotion_id, 0)
+        if not bundles or any(
+            quantities.get(product_id, 0) != quantity * bundles
+            for product_id, quantity in promotion['items'].items()
+        ):
+            errors.append(f'Promoção "{promotion["name"]}": os itens não formam combos completos')
+            continue
+        if sum(line['quantity'] for line in rewards) > bundles:
+            errors.append(f'Promoção "{promotion["name"]}": brindes acima do permitido')
+
+        bundle_total = _money(promotion['price'] * bundles)
+        regular_total = sum((line['regular_price'] * line['quantity'] for line in items), ZERO)
+        remaining = bundle_total
+        # O rateio é feito no total de cada linha e a última absorve o arredondamento,
+        # então a soma sempre bate com o combo; o preço unitário é só informativo
+        items.sort(key=lambda line: line['quantity'], reverse=True)
+        for position, line in enumerate(items):
+            if position == len(items) - 1:
+                share = remaining
+            else:
+                share = _money(bundle_total * line['regular_price'] * line['quantity'] / regular_total) if regular_total else ZERO
+                remaining -= share
+            line['base_total'] = share
+            line['unit_price'] = _money(share / line['quantity'])
+
+
+def quote_cart(restaurant_id, items, delivery=None, table=None):
+    """
+    Precifica o carrinho a partir da tabela de preços em memória, sem consultas por item.
+    Ignora os preços enviados pelo cliente e levanta PricingError se o carrinho for inválido
+    (inclusive com produtos fora da janela de disponibilidade).
+    delivery: True exige entrega, False é retirada e None cobra a taxa se a loja entrega.
+    """
+    table = table or get_price_table(restaurant_id)
+    errors = []
+    if not items:
+        raise PricingError(['O pedido não possui itens'])
+
+    lines = []
+    minute = minute_of_week(local_now())
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append(f'Item {index + 1}: formato inválido')
+            continue
+        line = _price_line(index, item, table, errors, minute)
+        if line is not None:
+            lines.append(line)
+    _price_promotions(lines, table, errors)
+
+    if delivery is None:
+        delivery = table['delivery_available']
+    elif delivery and not table['delivery_available']:
+        errors.append('A loja não está realizando entregas')
+    if errors:
+        raise PricingError(errors)
+
+    subtotal = ZERO
+    for line in lines:
+        base_total = line.get('base_total', line['unit_price'] * line['quantity'])
+        line['line_total'] = _money(base_total + line['extras_price'] * line['quantity'])
+        subtotal += line['line_total']
+    delivery_fee = table['delivery_fee'] if delivery else ZERO
+    # Promoções que os itens avulsos já fecham, para a vitrine sugerir a troca
+    regular = cart_quantities(
+        (line['product_id'], line['quantity']) for line in lines if line['item_type'] == 'regular'
+    )
+    return {
+        'catalog_version': table.get('version'),
+        'lines': lines,
+        'subtotal': subtotal,
+        'delivery_fee': delivery_fee,
+        'total': subtotal + delivery_fee,
+        'minimum_order_value': table['minimum_order_value'],
+        'meets_minimum': subtotal >= table['minimum_order_value'],
+        'applicable_promotions': applicable_promotions(table, regular),
+    }
+
+
+def serialize_quote(quote):
+    """
+    Representação JSON da cotação (valores monetários como string, como nos serializers).
+    """
+    def money(value):
+        return str(_money(value))
+
+    return {
+        'catalog_version': quote['catalog_version'],
+        'items': [
+            {
+                'product_id': line['product_id'],
+                'product_name': line['product_name'],
+                'item_type': line['item_type'],
+                'promotion_id': line['promotion_id'],
+                'quantity': line['quantity'],
+                'unit_price': money(line['unit_price']),
+                'extras_price': money(line['extras_price']),
+                'line_total': money(line['line_total']),
+                'ingredients': [
+                    {**ingredient, 'price': money(ingredient['price'])}
+                    for ingredient in line['ingredients']
+                ],
+            }
+            for line in sorted(quote['lines'], key=lambda line: line['index'])
+        ],
+        'subtotal': money(quote['subtotal']),
+        'delivery_fee': money(quote['delivery_fee']),
+        'total': money(quote['total']),
+        'minimum_order_value': money(quote['minimum_order_value']),
+        'meets_minimum': quote['meets_minimum'],
+        'applicable_promotions': serialize_promotion_matches(quote['applicable_promotions']),
+    }
+
+
+def serialize_promotion_matches(matches):
+    return [
+        {**match, **{field: str(match[field]) for field in ('price', 'regular_price', 'savings')}}
+        for match in matches
+    ]
+
+
+def create_order_items(order, quote):
+    """
+    Grava os itens e ingredientes da cotação no pedido com dois bulk_create.
+    """
+    lines = sorted(quote['lines'], key=lambda line: line['index'])
+    order_items = OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            product_id=line['product_id'],
+            promotion_id=line['promotion_id'],
+            item_type=line['item_type'],
+            product_name=line['product_name'][:100],
+            quantity=line['quantity'],
+            unit_price=line['unit_price'],
+            total_price=line['line_total'],
+            regular_price=line['regular_price'],
+            notes=line['notes'],
+            customization_details=line['customization_details'],
+        )
+        for line in lines
+    ])
+
+    # Os ingredientes da cotação já vêm agrupados pela chave do unique_together, com o
+    # preço somado das seleções repetidas, então a soma das linhas fecha com o cobrado
+    OrderItemIngredient.objects.bulk_create([
+        OrderItemIngredient(
+            order_item=order_item,
+            ingredient_id=ingredient['ingredient_id'],
+            group_name=ingredient['group_name'],
+            is_extra=ingredient['is_extra'],
+            is_added=ingredient['is_added'],
+            price=ingredient['price'],
+        )
+        for order_item, line in zip(order_items, lines)
+        for ingredient in line['ingredients']
+    ])
+    return order_items
@@ -0,0 +1,96 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+CENTS = Decimal('0.01')
+ZERO = Decimal('0')
+
+
+def build_promotion_index(promotions, products):
+    """
+    Índice invertido produto → promoções em que ele é item, com a quantidade exigida:
+    {product_id: ((promotion_id, quantidade), ...)}. Promoções sem itens ou com algum
+    item inativo ficam fora, porque não podem ser montadas.
+    """
+    index = {}
+    for promotion_id, promotion in promotions.items():
+        items = promotion['items']
+        if not items or any(not products.get(product_id, {}).get('is_active') for product_id in items):
+            continue
+        for product_id, quantity in items.items():
+            index.setdefault(product_id, []).append((promotion_id, quantity))
+    return {product_id: tuple(entries) for product_id, entries in index.items()}
+
+
+def cart_quantities(items):
+    """
+    Soma as unidades por produto a partir de pares (product_id, quantidade).
+    """
+    quantities = {}
+    for product_id, quantity in items:
+        if product_id and quantity and quantity > 0:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def match_promotions(table, quantities):
+    """
+    Retorna {promotion_id: combos completos} das promoções que o carrinho fecha.
+    Percorre só os produtos do carrinho e, para cada um, as promoções do índice,
+    então o custo é linear no tamanho do carrinho.
+    """
+    index = table['promotion_index']
+    progress = {}
+    for product_id, units in quantities.items():
+        for promotion_id, required in index.get(product_id, ()):
+            matched, bundles = progress.get(promotion_id, (0, None))
+            times = units // required
+            progress[promotion_id] = (matched + 1, times if bundles is None else min(bundles, times))
+
+    promotions = table['promotions']
+    return {
+        promotion_id: bundles
+        for promotion_id, (matched, bundles) in progress.items()
+        if bundles and matched == len(promotions[promotion_id]['items'])
+    }
+
+
+def describe_match(table, promotion_id, bundles):
+    """
+    Detalha uma promoção aplicável: preço dos combos, valor avulso, economia
+    e os brindes disponíveis para escolha.
+    """
+    promotion = table['promotions'][promotion_id]
+    products = table['products']
+    regular_price = sum(
+        (products[product_id]['price'] * quantity for product_id, quantity in promotion['items'].items()),
+        ZERO,
+    )
+    price = promotion['price']
+    return {
+        'promotion_id': promotion_id,
+        'name': promotion['name'],
+        'bundles': bundles,
+        'price': (price * bundles).quantize(CENTS, rounding=ROUND_HALF_UP),
+        'regular_price': (regular_price * bundles).quantize(CENTS, rounding=ROUND_HALF_UP),
+        'savings': (max(regular_price - price, ZERO) * bundles).quantize(CENTS, rounding=ROUND_HALF_UP),
+        'items': [
+            {'product_id': product_id, 'quantity': quantity * bundles}
+            for product_id, quantity in sorted(promotion['items'].items())
+        ],
+        'reward_choices': sorted(
+            product_id for product_id in promotion['rewards']
+            if products.get(product_id, {}).get('is_active')
+        ),
+    }
+
+
+def applicable_promotions(table, quantities):
+    """
+    Promoções que o carrinho fecha, da maior para a menor economia. Cada uma é
+    avaliada sozinha: duas sugestões podem disputar os mesmos itens.
+    """
+    matches = [
+        describe_match(table, promotion_id, bundles)
+        for promotion_id, bundles in match_promotions(table, quantities).items()
+    ]
+    matches.sort(key=lambda match: (-match['savings'], match['promotion_id']))
+    return matches
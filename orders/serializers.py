@@ -1,8 +1,10 @@
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from .models import Order, OrderItem, OrderItemIngredient
+from .pricing import PricingError, create_order_items, quote_cart
 from products.serializers import ProductSerializer, IngredientSerializer
-from products.models import Product, Ingredient, ProductIngredient
+from products.models import Product, Ingredient
 
 class OrderItemIngredientSerializer(serializers.ModelSerializer):
     """
@@ -62,8 +64,11 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
     def get_total_price(self, obj):
         """
-        Calcula o preço total do item incluindo ingredientes personalizados.
+        Preço total do item: o gravado na criação do pedido (cotação em orders/pricing.py)
+        ou, nos pedidos antigos, a fórmula da época, para o histórico não mudar.
         """
+        if obj.total_price is not None:
+            return obj.total_price
         base_price = obj.unit_price * obj.quantity
         ingredients_price = sum(ing.price for ing in obj.ingredients.all())
         return base_price + ingredients_price
@@ -119,120 +124,42 @@ class OrderCreateSerializer(serializers.ModelSerializer):
     )
     payment_method = serializers.CharField(required=False, allow_null=True, allow_blank=True)
     change_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    # None: cobra a taxa de entrega quando há endereço e a loja entrega
+    delivery = serializers.BooleanField(required=False, allow_null=True, default=None, write_only=True)
 
     class Meta:
         model = Order
-        fields = ('customer_name', 'customer_phone', 'customer_address', 'notes', 'items', 'total_amount', 'payment_method', 'change_amount')
+        fields = ('customer_name', 'customer_phone', 'customer_address', 'notes', 'items', 'total_amount', 'payment_method', 'change_amount', 'delivery')
         read_only_fields = ('id', 'created_at', 'updated_at', 'status')
 
+    def validate(self, attrs):
+        """
+        Recalcula os preços do pedido no servidor; valores enviados são ignorados.
+        """
+        delivery = attrs.pop('delivery', None)
+        if delivery is None and not attrs.get('customer_address'):
+            delivery = False
+        try:
+            attrs['quote'] = quote_cart(self.context.get('restaurant_id'), attrs.get('items'), delivery=delivery)
+        except PricingError as e:
+            raise ValidationError({'items': e.errors})
+        return attrs
+
     def create(self, validated_data):
-        items_data = validated_data.pop('items')
-        total_amount = validated_data.pop('total_amount', 0)
-        payment_method = validated_data.get('payment_method')
-        change_amount = validated_data.get('change_amount')
-        
-        # Validação extra: todo item deve ter product_id
-        for idx, item in enumerate(items_data):
-            if not item.get('product_id'):
-                raise ValidationError(f"O item {idx+1} do pedido está sem produto associado (product_id). Corrija antes de prosseguir.")
-        
-        print("[DEBUG] Criando pedido com items:", items_data)
-        
-        order = Order.objects.create(
-            **validated_data,
-            total_amount=total_amount,
-            status='pending',
-            payment_method=payment_method,
-            change_amount=change_amount
-        )
-        
-        for item_data in items_data:
-            # Buscar o produto correto
-            product_id = item_data.get('product_id')
-            print(f"[DEBUG] Processando item. product_id recebido: {product_id}")
-            
-            try:
-                product_obj = Product.objects.get(id=product_id)
-                print(f"[DEBUG] Produto encontrado: {product_obj.name} (id: {product_obj.id})")
-                
-                # --- PATCH: CAMPOS DE PROMOÇÃO ---
-                promotion_id = item_data.get('promotion_id')
-                item_type = item_data.get('item_type', 'regular')
-                customization_details = item_data.get('customization_details')
-                promotion_obj = None
-                if promotion_id:
-                    from products.models import Promotion
-                    try:
-                        promotion_obj = Promotion.objects.get(id=promotion_id)
-                    except Promotion.DoesNotExist:
-                        promotion_obj = None
-                # ----------------------------------
-
-                # Criar o item do pedido com o produto associado
-                order_item = OrderItem.objects.create(
-                    order=order,
-                    product=product_obj,  # Garantindo que o produto seja associado
-                    product_name=product_obj.name,  # Usando o nome do produto do banco
-                    quantity=item_data.get('quantity', 1),
-                    unit_price=item_data.get('unit_price', 0),
-                    notes=item_data.get('notes', ''),
-                    # PATCH: campos de promoção
-                    promotion=promotion_obj,
-                    item_type=item_type,
-                    customization_details=customization_details
-                )
-                print(f"[DEBUG] OrderItem criado: id={order_item.id}, product={order_item.product}, product_name={order_item.product_name}, item_type={order_item.item_type}, promotion={order_item.promotion}, customization_details={order_item.customization_details}")
-                
-                # Adicionar ingredientes se houver
-                if 'ingredients' in item_data:
-                    print(f"[DEBUG] Processando {len(item_data['ingredients'])} ingredientes")
-                    for ingredient_data in item_data['ingredients']:
-                        try:
-                            ingrediente = Ingredient.objects.get(id=ingredient_data['ingredient'])
-                            print(f"[DEBUG] Ingrediente encontrado: {ingrediente.name} (id: {ingrediente.id})")
-                            
-                            # Tenta buscar o grupo correto informado no payload
-                            group_name_input = ingredient_data.get('group_name') or ingredient_data.get('groupName')
-                            pi_qs = ProductIngredient.objects.filter(product=product_obj, ingredient=ingrediente)
-                            if group_name_input:
-                                pi_qs = pi_qs.filter(group_name__iexact=group_name_input.strip())
-                            pi = pi_qs.first()
-
-                            if pi:
-                                # Atualiza flag extra se veio marcada no payload e não estiver no banco
-                                if ingredient_data.get('is_extra') and not pi.is_extra:
-                                    pi.is_extra = True
-                                    pi.save(update_fields=['is_extra'])
-                                print(f"[DEBUG] Grupo do ingrediente encontrado: {pi.group_name}")
-                            else:
-                                # Fallback: cria automaticamente usando group_name_input ou 'Auto'
-                                auto_group = group_name_input or 'Auto'
-                                print(f"[DEBUG] AVISO: Ingrediente {ingrediente.name} não encontrado no produto {product_obj.name} para grupo '{auto_group}', criando ProductIngredient automaticamente!")
-                                pi = ProductIngredient.objects.create(
-                                    product=product_obj,
-                                    ingredient=ingrediente,
-                                    group_name=auto_group,
-                                    is_required=False,
-                                    max_quantity=1,
-                                    is_extra=ingredient_data.get('is_extra', False)
-                                )
-                            
-                            group_for_item = (pi.group_name if pi else (group_name_input or 'Auto')).strip()
-                            OrderItemIngredient.objects.create(
-                                order_item=order_item,
-                                ingredient=ingrediente,
-                                group_name=group_for_item,
-                                is_extra=ingredient_data.get('is_extra', False),
-                                is_added=ingredient_data.get('is_added', True),
-                                price=ingredient_data.get('price', ingrediente.price or 0)
-                            )
-                        except Ingredient.DoesNotExist:
-                            print(f"[DEBUG] ERRO: Ingrediente não encontrado com id: {ingredient_data['ingredient']}")
-                            continue
-            except Product.DoesNotExist:
-                print(f"[DEBUG] ERRO: Produto não encontrado com id: {product_id}")
-                continue
-                
+        """
+        Cria o pedido (restaurante informado em save()) com os itens da cotação.
+        """
+        quote = validated_data.pop('quote')
+        validated_data.pop('items')
+        validated_data.pop('total_amount', None)
+
+        with transaction.atomic():
+            order = Order.objects.create(
+                **validated_data,
+                total_amount=quote['total'],
+                status='pending',
+            )
+            create_order_items(order, quote)
         return order
 
 class OrderUpdateSerializer(serializers.ModelSerializer):
@@ -1,3 +1,236 @@
-from django.test import TestCase
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from products.models import Category, Ingredient, Product, ProductIngredient, Promotion, PromotionItem, PromotionReward
+from settings.models import Settings
+from .models import Order
+from .pricing import PricingError, create_order_items, quote_cart
+from .promotions import applicable_promotions, build_promotion_index, cart_quantities, match_promotions
+from .serializers import OrderItemSerializer
 
-# Create your tests here.
+
+class QuoteCartTests(TestCase):
+    """
+    Cotação do carrinho no servidor (orders/pricing.py): preços, adicionais,
+    combos de promoção com o rateio do preço e os carrinhos recusados.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('loja', password='senha')
+        cls.restaurant = Settings.objects.create(
+            owner=user, business_name='Loja', business_phone='', business_address='',
+            business_email='loja@example.com', opening_time='08:00', closing_time='18:00',
+            delivery_available=False,
+        )
+        category = Category.objects.create(restaurant=cls.restaurant, name='Lanches')
+
+        def product(name, price, **kwargs):
+            return Product.objects.create(
+                restaurant=cls.restaurant, category=category, name=name, description='', price=price, **kwargs
+            )
+
+        cls.burger = product('Burger', '10.00')
+        cls.fries = product('Batata', '5.00')
+        cls.soda = product('Refri', '5.00')
+        cls.juice = product('Suco', '4.00')
+        cls.off = product('Esgotado', '7.00', is_active=False)
+        cls.salad = product('Salada', '12.00')
+        cls.coffee = product('Café', '6.00', availability=[{'days': list(range(7)), 'start': '06:00', 'end': '10:00'}])
+
+        cls.bacon = Ingredient.objects.create(restaurant=cls.restaurant, name='Bacon', price='3.00')
+        cls.onion = Ingredient.objects.create(restaurant=cls.restaurant, name='Cebola', price='0')
+        cls.sauce = Ingredient.objects.create(restaurant=cls.restaurant, name='Molho', price='0')
+        ProductIngredient.objects.create(product=cls.burger, ingredient=cls.bacon, group_name='Extras', price='2.00', is_extra=True, max_quantity=2)
+        ProductIngredient.objects.create(product=cls.burger, ingredient=cls.onion, group_name='Extras', price='0')
+        ProductIngredient.objects.create(product=cls.salad, ingredient=cls.sauce, group_name='Molho', is_required=True)
+
+        # Combo: 1 Burger + 1 Batata por 12,00, com Refri de brinde
+        cls.combo = Promotion.objects.create(restaurant=cls.restaurant, name='Combo', description='', price='12.00')
+        PromotionItem.objects.create(promotion=cls.combo, product=cls.burger, quantity=1)
+        PromotionItem.objects.create(promotion=cls.combo, product=cls.fries, quantity=1)
+        PromotionReward.objects.create(promotion=cls.combo, product=cls.soda)
+        # 2 Refri + 3 Suco por 10,05: nenhuma linha tem quantidade 1
+        cls.drinks = Promotion.objects.create(restaurant=cls.restaurant, name='Bebidas', description='', price='10.05')
+        PromotionItem.objects.create(promotion=cls.drinks, product=cls.soda, quantity=2)
+        PromotionItem.objects.create(promotion=cls.drinks, product=cls.juice, quantity=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def quote(self, *items, delivery=False):
+        return quote_cart(self.restaurant.pk, list(items), delivery=delivery)
+
+    def assertRejected(self, message, *items, **kwargs):
+        with self.assertRaises(PricingError) as context:
+            self.quote(*items, **kwargs)
+        self.assertTrue(
+            any(message in error for error in context.exception.errors),
+            context.exception.errors,
+        )
+
+    def test_plain_items_ignore_client_prices(self):
+        quote = self.quote(
+            {'product_id': self.burger.pk, 'quantity': 2, 'unit_price': '0.01'},
+            {'product_name': 'batata', 'quantity': 1},
+        )
+        self.assertEqual([line['line_total'] for line in quote['lines']], [Decimal('20.00'), Decimal('5.00')])
+        self.assertEqual(quote['subtotal'], Decimal('25.00'))
+        self.assertEqual(quote['total'], Decimal('25.00'))
+
+    def test_extras_are_charged_per_unit(self):
+        quote = self.quote({
+            'product_id': self.burger.pk, 'quantity': 2,
+            'ingredients': [
+                {'ingredient': self.bacon.pk, 'group_name': 'Extras'},
+                {'ingredient': self.onion.pk, 'group_name': 'Extras', 'is_added': False},
+                {'ingredient': 999999},
+            ],
+        })
+        line = quote['lines'][0]
+        self.assertEqual(line['extras_price'], Decimal('2.00'))
+        self.assertEqual(line['line_total'], Decimal('24.00'))
+        # Ingrediente inexistente é ignorado; o removido não é cobrado
+        self.assertEqual([(i['name'], i['price']) for i in line['ingredients']], [('Bacon', Decimal('2.00')), ('Cebola', Decimal('0'))])
+
+    def test_repeated_selection_is_stored_as_charged(self):
+        quote = self.quote({
+            'product_id': self.burger.pk, 'quantity': 2,
+            'ingredients': [
+                {'ingredient': self.bacon.pk, 'group_name': 'Extras'},
+                {'ingredient': self.bacon.pk, 'group_name': 'Extras'},
+            ],
+        })
+        line = quote['lines'][0]
+        self.assertEqual(line['line_total'], Decimal('28.00'))
+        self.assertEqual([(i['name'], i['price']) for i in line['ingredients']], [('Bacon', Decimal('4.00'))])
+
+        order = Order.objects.create(restaurant=self.restaurant, customer_name='Cliente', customer_phone='1')
+        order_item, = create_order_items(order, quote)
+        stored = list(order_item.ingredients.values_list('price', flat=True))
+        self.assertEqual(stored, [Decimal('4.00')])
+        self.assertEqual((order_item.unit_price + sum(stored)) * order_item.quantity, line['line_total'])
+        self.assertEqual(Decimal(OrderItemSerializer(order_item).data['total_price']), line['line_total'])
+
+    def test_matched_promotion(self):
+        quote = self.quote(
+            {'product_id': self.burger.pk, 'item_type': 'promotion', 'promotion_id': self.combo.pk},
+            {'product_id': self.fries.pk, 'item_type': 'promotion', 'promotion_id': self.combo.pk},
+            {'product_id': self.soda.pk, 'item_type': 'reward', 'promotion_id': self.combo.pk},
+        )
+        self.assertEqual([line['line_total'] for line in sorted(quote['lines'], key=lambda l: l['index'])], [Decimal('8.00'), Decimal('4.00'), Decimal('0.00')])
+        self.assertEqual(quote['subtotal'], Decimal('12.00'))
+
+    def test_regular_items_suggest_promotion(self):
+        quote = self.quote({'product_id': self.burger.pk}, {'product_id': self.fries.pk})
+        self.assertEqual(quote['subtotal'], Decimal('15.00'))
+        self.assertEqual([(m['promotion_id'], m['savings']) for m in quote['applicable_promotions']], [(self.combo.pk, Decimal('3.00'))])
+
+    def test_bundle_rounding_with_quantities_above_one(self):
+        quote = self.quote(
+            {'product_id': self.soda.pk, 'quantity': 2, 'item_type': 'promotion', 'promotion_id': self.drinks.pk},
+            {'product_id': self.juice.pk, 'quantity': 3, 'item_type': 'promotion', 'promotion_id': self.drinks.pk},
+        )
+        totals = {line['product_id']: line['line_total'] for line in quote['lines']}
+        # Refri 10,00 e Suco 12,00 avulsos: 10,05 rateado em 4,57 e 5,48
+        self.assertEqual(totals, {self.soda.pk: Decimal('4.57'), self.juice.pk: Decimal('5.48')})
+        self.assertEqual(quote['subtotal'], Decimal('10.05'))
+
+    def test_rejects_unknown_and_inactive_products(self):
+        self.assertRejected('produto não encontrado', {'product_id': 999999})
+        self.assertRejected('não está disponível', {'product_id': self.off.pk})
+        self.assertRejected('quantidade inválida', {'product_id': self.burger.pk, 'quantity': 0})
+
+    def test_rejects_items_outside_their_window(self):
+        with mock.patch('orders.pricing.local_now', return_value=datetime(2026, 10, 19, 9, 59)):
+            self.assertEqual(self.quote({'product_id': self.coffee.pk})['total'], Decimal('6.00'))
+        with mock.patch('orders.pricing.local_now', return_value=datetime(2026, 10, 19, 10, 0)):
+            self.assertRejected('não está disponível neste horário', {'product_id': self.coffee.pk})
+
+    def test_rejects_group_rules(self):
+        self.assertRejected('escolha ao menos uma opção em "Molho"', {'product_id': self.salad.pk})
+        self.assertRejected('no máximo 2 opção(ões) em "Extras"', {
+            'product_id': self.burger.pk,
+            'ingredients': [
+                {'ingredient': self.bacon.pk, 'group_name': 'Extras'},
+                {'ingredient': self.onion.pk, 'group_name': 'Extras'},
+                {'ingredient': self.bacon.pk, 'group_name': 'Extras'},
+            ],
+        })
+
+    def test_rejects_incomplete_promotion(self):
+        self.assertRejected(
+            'os itens não formam combos completos',
+            {'product_id': self.burger.pk, 'item_type': 'promotion', 'promotion_id': self.combo.pk},
+        )
+        self.assertRejected(
+            'brindes acima do permitido',
+            {'product_id': self.burger.pk, 'item_type': 'promotion', 'promotion_id': self.combo.pk},
+            {'product_id': self.fries.pk, 'item_type': 'promotion', 'promotion_id': self.combo.pk},
+            {'product_id': self.soda.pk, 'quantity': 2, 'item_type': 'reward', 'promotion_id': self.combo.pk},
+        )
+
+    def test_rejects_empty_cart_and_unavailable_delivery(self):
+        self.assertRejected('O pedido não possui itens')
+        self.assertRejected('não está realizando entregas', {'product_id': self.burger.pk}, delivery=True)
+
+
+class PromotionMatchTests(SimpleTestCase):
+    """
+    Casamento do carrinho com as promoções pelo índice invertido (orders/promotions.py).
+    """
+
+    def setUp(self):
+        products = {
+            1: {'price': Decimal('10.00'), 'is_active': True},   # Burger
+            2: {'price': Decimal('5.00'), 'is_active': True},    # Batata
+            3: {'price': Decimal('4.00'), 'is_active': True},    # Refri
+            4: {'price': Decimal('6.00'), 'is_active': False},   # Suco (inativo)
+        }
+        promotions = {
+            # Burger + Batata por 12,00, com Refri ou Suco de brinde
+            10: {'name': 'Combo', 'price': Decimal('12.00'), 'items': {1: 1, 2: 1}, 'rewards': {3, 4}},
+            # 2 Burgers por 16,00: disputa os burgers com o Combo
+            11: {'name': 'Dupla', 'price': Decimal('16.00'), 'items': {1: 2}, 'rewards': set()},
+            # 3 Refri por 10,00
+            12: {'name': 'Refris', 'price': Decimal('10.00'), 'items': {3: 3}, 'rewards': set()},
+            # Tem item inativo: nunca fecha
+            13: {'name': 'Suco', 'price': Decimal('1.00'), 'items': {1: 1, 4: 1}, 'rewards': set()},
+        }
+        self.table = {
+            'products': products,
+            'promotions': promotions,
+            'promotion_index': build_promotion_index(promotions, products),
+        }
+
+    def test_index_skips_promotions_with_inactive_items(self):
+        self.assertEqual(self.table['promotion_index'], {1: ((10, 1), (11, 2)), 2: ((10, 1),), 3: ((12, 3),)})
+
+    def test_cart_quantities(self):
+        self.assertEqual(cart_quantities([(1, 1), (2, 2), (1, 2), (3, 0), (None, 1)]), {1: 3, 2: 2})
+
+    def test_overlapping_promotions_are_counted_independently(self):
+        self.assertEqual(match_promotions(self.table, {1: 3, 2: 1}), {10: 1, 11: 1})
+
+    def test_quantities_above_one(self):
+        self.assertEqual(match_promotions(self.table, {3: 2}), {})
+        self.assertEqual(match_promotions(self.table, {3: 7}), {12: 2})
+        self.assertEqual(match_promotions(self.table, {1: 4, 2: 5}), {10: 4, 11: 2})
+
+    def test_incomplete_promotion_is_not_matched(self):
+        self.assertEqual(match_promotions(self.table, {2: 3}), {})
+
+    def test_suggestions_sorted_by_savings(self):
+        matches = applicable_promotions(self.table, {1: 2, 2: 1, 3: 3})
+        self.assertEqual(
+            [(m['promotion_id'], m['bundles'], m['savings']) for m in matches],
+            [(11, 1, Decimal('4.00')), (10, 1, Decimal('3.00')), (12, 1, Decimal('2.00'))],
+        )
+        combo = matches[1]
+        self.assertEqual((combo['price'], combo['regular_price']), (Decimal('12.00'), Decimal('15.00')))
+        # Brinde inativo não é oferecido
+        self.assertEqual(combo['reward_choices'], [3])
+        self.assertEqual(applicable_promotions(self.table, {4: 1}), [])
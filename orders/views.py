@@ -11,6 +11,7 @@ from .serializers import (
     OrderUpdateSerializer, OrderItemSerializer
 )
 from settings.models import Settings
+from settings.tenants import request_tenant
 from rest_framework.pagination import PageNumberPagination
 
 
@@ -35,17 +36,16 @@ class CreateOrderView(views.APIView):
     View para criar pedidos.
     """
     def post(self, request, *args, **kwargs):
-        serializer = OrderCreateSerializer(data=request.data)
+        # Restaurante do usuário, já resolvido na autenticação
+        tenant = request_tenant(request)
+        if not tenant:
+            return Response(
+                {'error': 'Nenhuma configuração encontrada'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = OrderCreateSerializer(data=request.data, context={'request': request, 'restaurant_id': tenant.id})
         if serializer.is_valid():
-            # Pegar as configurações do sistema
-            settings = request.user.settings  # utiliza settings do usuário
-            if not settings:
-                return Response(
-                    {'error': 'Nenhuma configuração encontrada'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            order = serializer.save()
+            order = serializer.save(restaurant_id=tenant.id)
             return Response(
                 OrderSerializer(order).data,
                 status=status.HTTP_201_CREATED
@@ -108,17 +108,16 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         Cria um novo pedido.
         """
-        serializer = self.get_serializer(data=request.data)
+        # Restaurante do usuário, já resolvido na autenticação
+        tenant = request_tenant(request)
+        if not tenant:
+            return Response(
+                {'error': 'Nenhuma configuração encontrada'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = self.get_serializer(data=request.data, context={**self.get_serializer_context(), 'restaurant_id': tenant.id})
         if serializer.is_valid():
-            # Pegar as configurações do sistema
-            settings = request.user.settings
-            if not settings:
-                return Response(
-                    {'error': 'Nenhuma configuração encontrada'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            order = serializer.save()
+            order = serializer.save(restaurant_id=tenant.id)
             return Response(
                 OrderSerializer(order).data,
                 status=status.HTTP_201_CREATED
@@ -136,8 +135,9 @@ class OrderViewSet(viewsets.ModelViewSet):
             order = Order.objects.get(pk=pk)
             
             # Verificar se o usuário tem acesso ao pedido
-            if hasattr(request.user, 'settings') and request.user.settings:
-                if order.restaurant != request.user.settings:
+            tenant = request_tenant(request)
+            if tenant:
+                if order.restaurant_id != tenant.id:
                     return Response(
                         {'error': 'Acesso negado a este pedido'},
                         status=status.HTTP_403_FORBIDDEN
@@ -10,13 +10,13 @@ class IngredientCategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
-    list_display = ('name', 'price', 'category', 'is_extra', 'is_active')
-    list_filter = ('category', 'is_extra', 'is_active')
+    list_display = ('name', 'restaurant', 'price', 'category', 'is_extra', 'is_active')
+    list_filter = ('restaurant', 'category', 'is_extra', 'is_active')
     search_fields = ('name', 'description')
     list_editable = ('price', 'is_extra', 'is_active')
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('category')
+        return super().get_queryset(request).select_related('category', 'restaurant')
 
 class ProductIngredientInline(admin.TabularInline):
     model = ProductIngredient
@@ -0,0 +1,126 @@
+from bisect import bisect_right
+from datetime import time
+from settings.schedule import compile_intervals, is_open_at
+
+# Janela de disponibilidade: {"days": [0..6] (0 = segunda), "start": "HH:MM", "end": "HH:MM"}.
+# Fim menor ou igual ao início atravessa a meia-noite. Lista vazia = sempre disponível.
+MAX_WINDOWS = 14
+
+
+def _parse_time(value, field):
+    try:
+        hour, minute = (int(part) for part in str(value).split(':'))
+        return time(hour, minute)
+    except (TypeError, ValueError):
+        raise ValueError(f'Horário inválido em "{field}" (use HH:MM)')
+
+
+def parse_availability(value):
+    """
+    Valida e normaliza as janelas de disponibilidade enviadas pelo admin.
+    Levanta ValueError com a mensagem do primeiro problema encontrado.
+    """
+    if value in (None, ''):
+        return []
+    if not isinstance(value, list):
+        raise ValueError('Envie uma lista de janelas de horário')
+    if len(value) > MAX_WINDOWS:
+        raise ValueError(f'No máximo {MAX_WINDOWS} janelas de horário')
+    windows = []
+    for window in value:
+        if not isinstance(window, dict):
+            raise ValueError('Formato inválido da janela de horário')
+        days = window.get('days')
+        if not isinstance(days, list) or not days:
+            raise ValueError('Informe os dias da semana da janela')
+        try:
+            days = sorted({int(day) for day in days})
+        except (TypeError, ValueError):
+            raise ValueError('Dia da semana inválido')
+        if days[0] < 0 or days[-1] > 6:
+            raise ValueError('Dia da semana inválido')
+        start = _parse_time(window.get('start'), 'start')
+        end = _parse_time(window.get('end'), 'end')
+        windows.append({'days': days, 'start': start.strftime('%H:%M'), 'end': end.strftime('%H:%M')})
+    return windows
+
+
+def compile_availability(windows):
+    """
+    Intervalos semanais [início, fim) das janelas, no mesmo formato da agenda da loja.
+    None quando não há janelas (sempre disponível).
+    """
+    if not windows:
+        return None
+    rows = []
+    for window in windows:
+        start = _parse_time(window['start'], 'start')
+        end = _parse_time(window['end'], 'end')
+        for day in window['days']:
+            # Fim igual ao início vale o dia inteiro
+            rows.append((day, start, end, end <= start))
+    return compile_intervals(rows)
+
+
+def intersect_intervals(first, second):
+    """
+    Interseção de duas listas ordenadas de intervalos, em uma passada.
+    """
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        end = min(first[i][1], second[j][1])
+        if start < end:
+            result.append((start, end))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def effective_availability(product_windows, category_windows):
+    """
+    Intervalos em que o produto pode ser pedido: os do produto limitados pelos da
+    categoria. None quando nenhum dos dois restringe.
+    """
+    product_intervals = compile_availability(product_windows)
+    category_intervals = compile_availability(category_windows)
+    if product_intervals is None:
+        return category_intervals
+    if category_intervals is None:
+        return product_intervals
+    return intersect_intervals(product_intervals, category_intervals)
+
+
+def is_available_at(intervals, minute):
+    return intervals is None or is_open_at(intervals, minute)
+
+
+def build_availability_index(intervals_by_product):
+    """
+    Índice por restaurante: intervalos dos produtos com restrição de horário e as
+    fronteiras (minutos em que algo muda) ordenadas. Entre duas fronteiras o conjunto
+    de produtos disponíveis é o mesmo, então ele pode ser calculado uma vez por trecho.
+    """
+    products = {
+        product_id: intervals
+        for product_id, intervals in intervals_by_product.items() if intervals is not None
+    }
+    boundaries = sorted({minute for intervals in products.values() for interval in intervals for minute in interval})
+    return {'boundaries': boundaries, 'products': products}
+
+
+def availability_segment(index, minute):
+    """
+    Trecho da semana em que o minuto cai (busca binária nas fronteiras).
+    """
+    return bisect_right(index['boundaries'], minute)
+
+
+def unavailable_at(index, minute):
+    return sorted(
+        product_id for product_id, intervals in index['products'].items()
+        if not is_open_at(intervals, minute)
+    )
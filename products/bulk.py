@@ -0,0 +1,98 @@
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+from .catalog import bump_catalog_version
+
+PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+# O multiplicador não pode ser arredondado para centavos (8,5% viraria 8%)
+RATE_FIELD = DecimalField(max_digits=12, decimal_places=6)
+
+
+class BulkUpdateError(Exception):
+    pass
+
+
+def _decimal(value, field):
+    try:
+        number = Decimal(str(value).replace(',', '.'))
+    except (InvalidOperation, ValueError):
+        number = None
+    if number is None or not number.is_finite():
+        raise BulkUpdateError(f'Valor inválido em "{field}"')
+    return number
+
+
+def _ids(value, field):
+    values = value if isinstance(value, (list, tuple)) else str(value).split(',')
+    try:
+        return [int(item) for item in values if str(item).strip()]
+    except (TypeError, ValueError):
+        raise BulkUpdateError(f'Valor inválido em "{field}"')
+
+
+def filter_products(queryset, data):
+    """
+    Aplica os filtros da operação em massa: `category` (id ou lista de ids), `ids`
+    (lista de produtos) e `name` (trecho do nome, sem diferenciar maiúsculas).
+    Sem nenhum filtro é preciso enviar `all=true`, para não alterar o cardápio inteiro por engano.
+    """
+    filtered = False
+    if data.get('category') not in (None, '', []):
+        queryset = queryset.filter(category_id__in=_ids(data['category'], 'category'))
+        filtered = True
+    if data.get('ids') not in (None, '', []):
+        queryset = queryset.filter(pk__in=_ids(data['ids'], 'ids'))
+        filtered = True
+    name = str(data.get('name') or '').strip()
+    if name:
+        queryset = queryset.filter(name__icontains=name)
+        filtered = True
+    if not filtered and str(data.get('all', '')).lower() not in ('1', 'true'):
+        raise BulkUpdateError('Informe category, ids ou name (ou all=true para todos os produtos)')
+    return queryset
+
+
+def bulk_adjust_prices(queryset, restaurant_id, percent=None, amount=None):
+    """
+    Reajusta os preços dos produtos filtrados em um único UPDATE: `percent` aplica
+    um percentual (8 para +8%) e `amount` soma um valor fixo (negativo para reduzir).
+    O arredondamento para centavos é feito no próprio banco e o preço nunca fica negativo.
+    Produtos cujo preço não muda após o arredondamento não são tocados.
+    """
+    if (percent is None) == (amount is None):
+        raise BulkUpdateError('Informe percent ou amount')
+    if percent is not None:
+        percent = _decimal(percent, 'percent')
+        if percent <= -100:
+            raise BulkUpdateError('O percentual deve ser maior que -100')
+        expression = F('price') * Value(1 + percent / 100, output_field=RATE_FIELD)
+    else:
+        expression = F('price') + Value(_decimal(amount, 'amount'), output_field=PRICE_FIELD)
+    new_price = Greatest(
+        Round(expression, 2, output_field=PRICE_FIELD),
+        Value(Decimal('0'), output_field=PRICE_FIELD),
+        output_field=PRICE_FIELD,
+    )
+    with transaction.atomic():
+        updated = (
+            queryset.alias(new_price=new_price)
+            .exclude(price=F('new_price'))
+            .update(price=new_price, updated_at=timezone.now())
+        )
+        if updated:
+            bump_catalog_version(restaurant_id)
+    return updated
+
+
+def bulk_set_active(queryset, restaurant_id, is_active):
+    """
+    Ativa ou desativa (esgotado) os produtos filtrados em um único UPDATE.
+    Produtos que já estão no estado pedido não são tocados.
+    """
+    with transaction.atomic():
+        updated = queryset.exclude(is_active=is_active).update(is_active=is_active, updated_at=timezone.now())
+        if updated:
+            bump_catalog_version(restaurant_id)
+    return updated
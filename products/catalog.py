@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from settings.models import Settings
+import threading
+
+# A versão só muda por bump_catalog_version, que limpa o cache; o timeout é só uma rede de segurança
+CATALOG_VERSION_TIMEOUT = 60 * 60 * 24
+
+
+_signals_state = threading.local()
+
+
+def _cache_key(restaurant_id):
+    return f'products:catalog_version:{restaurant_id}'
+
+
+def get_catalog_version(restaurant_id):
+    """
+    Retorna (versão, data da última alteração) do catálogo do restaurante.
+    Lê do cache e só consulta o banco quando a versão ainda não foi carregada.
+    """
+    key = _cache_key(restaurant_id)
+    cached = cache.get(key)
+    if cached is None:
+        cached = (
+            Settings.objects.filter(pk=restaurant_id)
+            .values_list('catalog_version', 'catalog_updated_at')
+            .first()
+        ) or (0, None)
+        cache.set(key, cached, CATALOG_VERSION_TIMEOUT)
+    return cached
+
+
+def bump_catalog_version(*restaurant_ids):
+    """
+    Incrementa a versão do catálogo dos restaurantes informados em um único UPDATE.
+    O cache é limpo após o commit para que nenhuma leitura concorrente guarde a versão antiga.
+    """
+    restaurant_ids = {restaurant_id for restaurant_id in restaurant_ids if restaurant_id}
+    if not restaurant_ids:
+        return
+    Settings.objects.filter(pk__in=restaurant_ids).update(
+        catalog_version=F('catalog_version') + 1,
+        catalog_updated_at=timezone.now(),
+    )
+    keys = [_cache_key(restaurant_id) for restaurant_id in restaurant_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@contextmanager
+def catalog_signals_muted():
+    """
+    Silencia os signals do catálogo (versão e índice de busca) durante operações em
+    massa; quem usa fica responsável por chamar bump_catalog_version e
+    refresh_search_documents uma única vez ao final.
+    """
+    previous = getattr(_signals_state, 'muted', False)
+    _signals_state.muted = True
+    try:
+        yield
+    finally:
+        _signals_state.muted = previous
+
+
+def signals_muted():
+    return getattr(_signals_state, 'muted', False)
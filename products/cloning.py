@@ -0,0 +1,141 @@
+from django.db import transaction
+from django.db.models import Q
+from .catalog import bump_catalog_version, catalog_signals_muted
+from .models import (
+    Category, Product, Ingredient, ProductIngredient,
+    Promotion, PromotionItem, PromotionReward
+)
+from .search import normalize_ingredient_name
+
+BATCH_SIZE = 500
+
+
+class CatalogCloneError(Exception):
+    pass
+
+
+def _copy(instance, **overrides):
+    """
+    Cópia em memória do registro, sem id, pronta para bulk_create.
+    """
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if not field.primary_key
+    }
+    values.update(overrides)
+    return type(instance)(**values)
+
+
+def _bulk_copy(model, rows, **remap):
+    """
+    Copia os registros com bulk_create e devolve {id antigo: id novo}.
+    `remap` recebe, por campo, uma função que converte o valor antigo no novo.
+    """
+    copies = []
+    for row in rows:
+        overrides = {field: convert(getattr(row, field)) for field, convert in remap.items()}
+        copies.append(_copy(row, **overrides))
+    created = model.objects.bulk_create(copies, batch_size=BATCH_SIZE)
+    return {row.pk: copy.pk for row, copy in zip(rows, created)}
+
+
+def clone_catalog(source, target, replace=False):
+    """
+    Copia o cardápio de um restaurante para outro: categorias, produtos, ingredientes,
+    grupos de ingredientes e promoções. Usa um bulk_create por tabela, remapeando os ids,
+    e as imagens são reaproveitadas pelo mesmo arquivo (sem novo upload).
+
+    O destino precisa estar sem cardápio, a não ser com replace=True, que remove as
+    categorias, produtos e promoções atuais dele. Ingredientes do destino nunca são
+    removidos (os pedidos antigos apontam para eles): os de mesmo nome são reaproveitados.
+    Produtos cuja categoria não é do restaurante de origem não podem ser remapeados e
+    ficam de fora, junto com os seus ingredientes e itens de promoção (contados no relatório).
+    """
+    if source.pk == target.pk:
+        raise CatalogCloneError('Origem e destino devem ser restaurantes diferentes')
+
+    with transaction.atomic(), catalog_signals_muted():
+        has_catalog = (
+            Category.objects.filter(restaurant=target).exists()
+            or Promotion.objects.filter(restaurant=target).exists()
+        )
+        if has_catalog and not replace:
+            raise CatalogCloneError('O restaurante de destino já possui cardápio')
+        if replace:
+            Promotion.objects.filter(restaurant=target).delete()
+            Product.objects.filter(restaurant=target).delete()
+            Category.objects.filter(restaurant=target).delete()
+
+        categories = list(Category.objects.filter(restaurant=source).order_by('id'))
+        category_ids = _bulk_copy(Category, categories, restaurant_id=lambda _: target.pk)
+
+        products, skipped_products = [], []
+        for product in Product.objects.filter(restaurant=source).order_by('id'):
+            (products if product.category_id in category_ids else skipped_products).append(product)
+        product_ids = _bulk_copy(
+            Product, products,
+            restaurant_id=lambda _: target.pk,
+            category_id=category_ids.__getitem__,
+        )
+
+        # Ingredientes do destino são casados pelo nome normalizado; os que faltam são criados
+        product_ingredients = list(ProductIngredient.objects.filter(product_id__in=product_ids).order_by('id'))
+        used_ids = {row.ingredient_id for row in product_ingredients}
+        ingredients = list(
+            Ingredient.objects.filter(Q(restaurant=source) | Q(pk__in=used_ids)).order_by('id')
+        )
+        existing = dict(
+            Ingredient.objects.filter(restaurant=target).values_list('normalized_name', 'id')
+        )
+        # A mesma chave em todo o casamento: registros antigos podem ter normalized_name vazio
+        keys = {
+            ingredient.pk: ingredient.normalized_name or normalize_ingredient_name(ingredient.name)
+            for ingredient in ingredients
+        }
+        ingredient_ids, missing, by_name = {}, [], {}
+        for ingredient in ingredients:
+            key = keys[ingredient.pk]
+            if key in existing:
+                ingredient_ids[ingredient.pk] = existing[key]
+            elif key not in by_name:
+                by_name[key] = ingredient.pk
+                missing.append(ingredient)
+        for ingredient in missing:
+            ingredient.normalized_name = keys[ingredient.pk]
+        created = _bulk_copy(Ingredient, missing, restaurant_id=lambda _: target.pk)
+        for ingredient in ingredients:
+            if ingredient.pk not in ingredient_ids:
+                ingredient_ids[ingredient.pk] = created[by_name[keys[ingredient.pk]]]
+
+        _bulk_copy(
+            ProductIngredient, product_ingredients,
+            product_id=product_ids.get,
+            ingredient_id=ingredient_ids.get,
+        )
+
+        promotions = list(Promotion.objects.filter(restaurant=source).order_by('id'))
+        promotion_ids = _bulk_copy(Promotion, promotions, restaurant_id=lambda _: target.pk)
+        _bulk_copy(
+            PromotionItem,
+            list(PromotionItem.objects.filter(promotion__restaurant=source, product_id__in=product_ids).order_by('id')),
+            promotion_id=promotion_ids.get,
+            product_id=product_ids.get,
+        )
+        _bulk_copy(
+            PromotionReward,
+            list(PromotionReward.objects.filter(promotion__restaurant=source, product_id__in=product_ids).order_by('id')),
+            promotion_id=promotion_ids.get,
+            product_id=product_ids.get,
+        )
+
+        bump_catalog_version(target.pk)
+
+    return {
+        'categories': len(categories),
+        'products': len(products),
+        'products_skipped': [product.name for product in skipped_products],
+        'ingredients_created': len(missing),
+        'product_ingredients': len(product_ingredients),
+        'promotions': len(promotions),
+    }
@@ -0,0 +1,154 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import hashlib
+import logging
+import posixpath
+
+from django.conf import settings as django_settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Maior lado (em pixels) de cada derivada; imagens menores não são ampliadas
+VARIANT_SIZES = {
+    'thumbnail': 160,
+    'card': 480,
+    'full': 1280,
+}
+
+# (extensão, formato do Pillow, opções de gravação)
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+# Fundo usado ao remover a transparência (JPEG não tem canal alfa)
+BACKGROUND_COLOR = (255, 255, 255)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-variants')
+
+
+def _flatten(image):
+    """
+    Aplica a orientação do EXIF e converte para RGB sobre fundo branco.
+    Os metadados não são copiados para as derivadas.
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, BACKGROUND_COLOR)
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _store(content, directory, label, extension):
+    """
+    Grava a derivada com nome baseado no conteúdo; arquivos idênticos são reaproveitados.
+    """
+    digest = hashlib.sha256(content).hexdigest()[:20]
+    name = posixpath.join(directory, f'{digest}_{label}.{extension}')
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def generate_variants(name):
+    """
+    Gera as derivadas (thumbnail, card e full em WebP e JPEG) do arquivo informado
+    e retorna o dicionário que é gravado no campo *_variants do modelo.
+    """
+    with default_storage.open(name, 'rb') as source:
+        image = _flatten(Image.open(source))
+    directory = posixpath.join(posixpath.dirname(name), 'variants')
+
+    variants = {'source': name}
+    for label, size in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        entry = {'width': resized.width, 'height': resized.height}
+        for extension, image_format, options in VARIANT_FORMATS:
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            entry[extension] = _store(buffer.getvalue(), directory, label, extension)
+        variants[label] = entry
+    return variants
+
+
+def variant_urls(variants, request=None):
+    """
+    Converte os nomes gravados em URLs (absolutas quando há request).
+    """
+    if not variants:
+        return None
+    urls = {}
+    for label in VARIANT_SIZES:
+        entry = variants.get(label)
+        if not entry:
+            continue
+        urls[label] = {'width': entry['width'], 'height': entry['height']}
+        for extension, _, _ in VARIANT_FORMATS:
+            url = default_storage.url(entry[extension])
+            urls[label][extension] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def needs_variants(instance, field_name):
+    """
+    Indica se a imagem atual ainda não tem derivadas (ou se elas são de outra imagem).
+    """
+    image = getattr(instance, field_name)
+    variants = getattr(instance, f'{field_name}_variants') or {}
+    if not image:
+        return bool(variants)
+    return variants.get('source') != image.name
+
+
+def process_variants(model, pk, field_name, restaurant_id):
+    """
+    Gera e grava as derivadas da imagem atual do registro (ou limpa, se não houver imagem).
+    """
+    from .catalog import bump_catalog_version
+
+    name = model.objects.filter(pk=pk).values_list(field_name, flat=True).first()
+    variants = {}
+    if name:
+        try:
+            variants = generate_variants(name)
+        except Exception:
+            logger.exception('Falha ao gerar derivadas de %s', name)
+            return
+    # Só grava se a imagem não mudou enquanto as derivadas eram geradas
+    current = Q(**{field_name: name}) if name else Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''})
+    updated = model.objects.filter(current, pk=pk).update(**{f'{field_name}_variants': variants})
+    if updated:
+        bump_catalog_version(restaurant_id)
+
+
+def _process_in_background(*args):
+    # A thread usa a própria conexão com o banco, que é fechada ao final
+    close_old_connections()
+    try:
+        process_variants(*args)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(instance, field_name, restaurant_id):
+    """
+    Agenda a geração das derivadas para depois do commit, fora da requisição.
+    """
+    model, pk = type(instance), instance.pk
+
+    def run():
+        # Com IMAGE_VARIANTS_ASYNC = False as derivadas são geradas logo após o commit
+        if getattr(django_settings, 'IMAGE_VARIANTS_ASYNC', True):
+            _executor.submit(_process_in_background, model, pk, field_name, restaurant_id)
+        else:
+            process_variants(model, pk, field_name, restaurant_id)
+
+    transaction.on_commit(run)
@@ -0,0 +1,182 @@
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from .catalog import bump_catalog_version, catalog_signals_muted
+from .models import Ingredient, ProductIngredient
+from .search import normalize_ingredient_name, refresh_search_documents
+import json
+
+# Campos de ProductIngredient comparados para decidir se uma linha precisa ser atualizada
+SYNC_FIELDS = ('is_required', 'max_quantity', 'is_extra', 'price')
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value if value not in (None, '') else 0)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def _int(value, default=1):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_ingredient_rows(data):
+    """
+    Lê os campos `ingredients[...]` enviados pelo formulário do produto (um JSON por
+    ingrediente com name, groupName, isRequired, maxQuantity, isExtra e price) e
+    devolve as linhas normalizadas. As regras do grupo vêm do primeiro ingrediente dele.
+    Retorna None quando nenhum ingrediente foi enviado.
+    """
+    raw_rows = [data[key] for key in data if key.startswith('ingredients[')]
+    if not raw_rows:
+        return None
+
+    groups = {}
+    rows = []
+    for raw in raw_rows:
+        try:
+            payload = json.loads(raw) if isinstance(raw, str) else raw
+        except ValueError:
+            continue
+        if not isinstance(payload, dict):
+            continue
+        name = (payload.get('name') or '').strip()
+        group_name = (payload.get('groupName') or '').strip()
+        price = _decimal(payload.get('price', 0))
+        if not name or not group_name or price is None:
+            continue
+        group = groups.setdefault(group_name, {
+            'is_required': bool(payload.get('isRequired', False)),
+            'max_quantity': max(_int(payload.get('maxQuantity')), 1),
+            'is_extra': bool(payload.get('isExtra', False)),
+        })
+        rows.append({'name': name, 'group_name': group_name, 'price': price, **group})
+    return rows
+
+
+def _resolve_ingredients(restaurant_id, rows):
+    """
+    Resolve os nomes nos ingredientes do restaurante com uma consulta IN sobre o
+    índice (restaurant, normalized_name), criando os que faltam com bulk_create e
+    atualizando preço/extra apenas dos que mudaram.
+    Retorna {nome normalizado: ingrediente}.
+    """
+    wanted = {}
+    for row in rows:
+        wanted.setdefault(normalize_ingredient_name(row['name']), row)
+
+    by_name = {
+        ingredient.normalized_name: ingredient
+        for ingredient in Ingredient.objects.filter(restaurant_id=restaurant_id, normalized_name__in=list(wanted))
+    }
+
+    missing = [
+        Ingredient(
+            restaurant_id=restaurant_id,
+            name=row['name'],
+            normalized_name=normalized_name,
+            category=None,
+            price=row['price'],
+            is_extra=row['is_extra'],
+        )
+        for normalized_name, row in wanted.items() if normalized_name not in by_name
+    ]
+    for ingredient in Ingredient.objects.bulk_create(missing):
+        by_name[ingredient.normalized_name] = ingredient
+
+    changed = []
+    for normalized_name, row in wanted.items():
+        ingredient = by_name[normalized_name]
+        if ingredient.price != row['price'] or ingredient.is_extra != row['is_extra']:
+            ingredient.price = row['price']
+            ingredient.is_extra = row['is_extra']
+            changed.append(ingredient)
+    if changed:
+        Ingredient.objects.bulk_update(changed, ['price', 'is_extra'])
+    return by_name
+
+
+def sync_ingredients(entries):
+    """
+    Sincroniza os ingredientes de vários produtos de uma vez. `entries` é uma lista de
+    (produto, linhas) no formato de parse_ingredient_rows; as linhas enviadas passam a
+    ser exatamente os ingredientes do produto.
+
+    Compara com as linhas existentes e grava só a diferença: um bulk_create, um
+    bulk_update e um único DELETE, tudo na mesma transação. Como as operações em massa
+    não disparam signals, a versão do catálogo e o índice de busca são atualizados aqui.
+    """
+    entries = [(product, rows) for product, rows in entries if rows is not None]
+    if not entries:
+        return
+
+    with transaction.atomic(), catalog_signals_muted():
+        rows_by_restaurant = {}
+        for product, rows in entries:
+            rows_by_restaurant.setdefault(product.restaurant_id, []).extend(rows)
+        ingredients = {
+            restaurant_id: _resolve_ingredients(restaurant_id, rows)
+            for restaurant_id, rows in rows_by_restaurant.items()
+        }
+        product_ids = [product.pk for product, _ in entries]
+        existing = {}
+        for product_ingredient in ProductIngredient.objects.filter(product_id__in=product_ids).order_by('id'):
+            key = (product_ingredient.product_id, product_ingredient.ingredient_id, product_ingredient.group_name)
+            # Linhas repetidas (mesmo ingrediente no mesmo grupo) ficam para remoção
+            existing.setdefault(key, []).append(product_ingredient)
+
+        to_create, to_update, keep = [], [], set()
+        for product, rows in entries:
+            for row in rows:
+                ingredient = ingredients[product.restaurant_id][normalize_ingredient_name(row['name'])]
+                key = (product.pk, ingredient.pk, row['group_name'])
+                if key in keep:
+                    continue
+                keep.add(key)
+                current = existing.get(key)
+                if current is None:
+                    to_create.append(ProductIngredient(
+                        product=product,
+                        ingredient=ingredient,
+                        group_name=row['group_name'],
+                        **{field: row[field] for field in SYNC_FIELDS}
+                    ))
+                    continue
+                product_ingredient = current[0]
+                if any(getattr(product_ingredient, field) != row[field] for field in SYNC_FIELDS):
+                    for field in SYNC_FIELDS:
+                        setattr(product_ingredient, field, row[field])
+                    to_update.append(product_ingredient)
+
+        stale = [
+            product_ingredient.pk
+            for key, rows in existing.items()
+            for index, product_ingredient in enumerate(rows)
+            if key not in keep or index > 0
+        ]
+        if stale:
+            ProductIngredient.objects.filter(pk__in=stale).delete()
+        if to_update:
+            ProductIngredient.objects.bulk_update(to_update, SYNC_FIELDS)
+        if to_create:
+            ProductIngredient.objects.bulk_create(to_create)
+
+        bump_catalog_version(*rows_by_restaurant)
+        refresh_search_documents(product_ids)
+
+
+def sync_product_ingredients(product, rows):
+    """
+    Sincroniza os ingredientes de um produto e já deixa as linhas pré-carregadas
+    para a resposta do serializer.
+    """
+    sync_ingredients([(product, rows)])
+    getattr(product, '_prefetched_objects_cache', {}).pop('ingredients', None)
+    prefetch_related_objects([product], Prefetch(
+        'ingredients',
+        queryset=ProductIngredient.objects.select_related('ingredient', 'ingredient__category').order_by('id'),
+    ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.cloning import CatalogCloneError, clone_catalog
+from products.management.commands.import_menu import get_restaurant
+
+class Command(BaseCommand):
+    help = 'Copia o cardápio completo (categorias, produtos, ingredientes e promoções) de um restaurante para outro'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Id ou business_slug do restaurante de origem')
+        parser.add_argument('target', help='Id ou business_slug do restaurante de destino')
+        parser.add_argument('--replace', action='store_true', help='Substitui o cardápio atual do destino')
+
+    def handle(self, *args, **options):
+        source = get_restaurant(options['source'])
+        target = get_restaurant(options['target'])
+        try:
+            report = clone_catalog(source, target, replace=options['replace'])
+        except CatalogCloneError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['categories']} categorias, {report['products']} produtos, "
+            f"{report['ingredients_created']} ingredientes novos e {report['promotions']} promoções copiados"
+        ))
+        if report['products_skipped']:
+            self.stdout.write(self.style.WARNING(
+                'Produtos ignorados (categoria de outro restaurante): ' + ', '.join(report['products_skipped'])
+            ))
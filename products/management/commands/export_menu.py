@@ -0,0 +1,22 @@
+import sys
+from django.core.management.base import BaseCommand
+from products.menu_io import FORMATS, detect_format, render_menu_export
+from products.management.commands.import_menu import get_restaurant
+
+class Command(BaseCommand):
+    help = 'Exporta o cardápio de um restaurante em CSV, JSON Lines ou JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant', help='Id ou business_slug do restaurante')
+        parser.add_argument('--output', help='Arquivo de saída (padrão: saída padrão)')
+        parser.add_argument('--format', choices=FORMATS, help='Formato (padrão: pela extensão ou csv)')
+
+    def handle(self, *args, **options):
+        restaurant = get_restaurant(options['restaurant'])
+        file_format = options['format'] or detect_format(options['output'])
+        if not options['output']:
+            sys.stdout.writelines(render_menu_export(restaurant, file_format))
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            output.writelines(render_menu_export(restaurant, file_format))
+        self.stdout.write(self.style.SUCCESS(f'Cardápio exportado para {options["output"]}'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from products.images import needs_variants, process_variants
+from products.models import Product, Promotion
+from settings.models import Settings
+
+class Command(BaseCommand):
+    help = 'Gera as derivadas redimensionadas (WebP e JPEG) das imagens já enviadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help='Processa apenas o restaurante informado (id)')
+        parser.add_argument('--force', action='store_true', help='Gera novamente mesmo as imagens que já têm derivadas')
+
+    def handle(self, *args, **options):
+        restaurant_id = options['restaurant']
+        sources = (
+            (Product, 'image', 'restaurant_id'),
+            (Promotion, 'image', 'restaurant_id'),
+            (Settings, 'business_photo', 'pk'),
+        )
+        for model, field_name, restaurant_field in sources:
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            if restaurant_id:
+                queryset = queryset.filter(**{restaurant_field: restaurant_id})
+
+            processed = 0
+            for instance in queryset.iterator(chunk_size=200):
+                if not options['force'] and not needs_variants(instance, field_name):
+                    continue
+                process_variants(model, instance.pk, field_name, getattr(instance, restaurant_field))
+                processed += 1
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {processed} imagens processadas')
+
+        self.stdout.write(self.style.SUCCESS('Derivadas de imagens geradas com sucesso!'))
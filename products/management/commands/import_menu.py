@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.menu_io import FORMATS, MenuImportError, detect_format, import_menu, iter_menu_rows
+from settings.models import Settings
+
+class Command(BaseCommand):
+    help = 'Importa o cardápio de um restaurante a partir de um arquivo CSV, JSON Lines ou JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant', help='Id ou business_slug do restaurante')
+        parser.add_argument('path', help='Arquivo do cardápio')
+        parser.add_argument('--format', choices=FORMATS, help='Formato do arquivo (padrão: pela extensão)')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas valida, sem gravar')
+
+    def handle(self, *args, **options):
+        restaurant = get_restaurant(options['restaurant'])
+        file_format = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = import_menu(restaurant, iter_menu_rows(stream, file_format), dry_run=options['dry_run'])
+        except (OSError, MenuImportError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"Linha {error['row']}: {error['error']}")
+        self.stdout.write(
+            f"{report['rows']} linhas lidas: {report['categories_created']} categorias criadas, "
+            f"{report['products_created']} produtos criados, {report['products_updated']} atualizados, "
+            f"{len(report['errors'])} erros"
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Simulação: nada foi gravado'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Cardápio importado com sucesso!'))
+
+
+def get_restaurant(value):
+    lookup = {'pk': value} if str(value).isdigit() else {'business_slug': value}
+    try:
+        return Settings.objects.get(**lookup)
+    except Settings.DoesNotExist:
+        raise CommandError(f'Restaurante não encontrado: {value}')
@@ -0,0 +1,288 @@
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from .catalog import bump_catalog_version, catalog_signals_muted
+from .ingredients import sync_ingredients
+from .models import Category, Product, ProductIngredient
+from .search import refresh_search_documents
+import codecs
+import csv
+import json
+
+# Uma linha por opção de ingrediente; produtos sem ingredientes ocupam uma linha só
+MENU_COLUMNS = (
+    'category', 'category_emoji', 'product', 'description', 'price', 'is_active',
+    'group', 'ingredient', 'ingredient_price', 'is_required', 'max_quantity', 'is_extra',
+)
+
+FORMATS = ('csv', 'jsonl', 'json')
+
+TRUE_VALUES = {'1', 'true', 'sim', 'yes', 's', 'y', 'x'}
+
+EXPORT_CHUNK_SIZE = 200
+
+
+class MenuImportError(Exception):
+    pass
+
+
+def detect_format(filename, default='csv'):
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    return extension if extension in FORMATS else default
+
+
+def _bool(value, default=False):
+    if value in (None, ''):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _decimal(value, field):
+    try:
+        number = Decimal(str(value if value not in (None, '') else 0).replace(',', '.')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f'valor inválido em "{field}"')
+    if number < 0:
+        raise ValueError(f'valor negativo em "{field}"')
+    return number
+
+
+def _text(row, field, max_length=None):
+    value = row.get(field)
+    value = '' if value is None else str(value).strip()
+    if max_length and len(value) > max_length:
+        raise ValueError(f'"{field}" passa de {max_length} caracteres')
+    return value
+
+
+def iter_menu_rows(stream, file_format):
+    """
+    Lê o arquivo como fluxo e produz (número da linha, dict). CSV e JSON Lines são lidos
+    linha a linha; JSON (uma lista de objetos) precisa ser carregado inteiro.
+    """
+    if file_format == 'json':
+        try:
+            rows = json.load(codecs.getreader('utf-8-sig')(stream))
+        except ValueError as e:
+            raise MenuImportError(f'JSON inválido: {e}')
+        if not isinstance(rows, list):
+            raise MenuImportError('O JSON deve ser uma lista de linhas do cardápio')
+        yield from enumerate(rows, start=1)
+        return
+
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    if file_format == 'csv':
+        # Linha 1 é o cabeçalho
+        yield from enumerate(csv.DictReader(lines), start=2)
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def _parse_row(row):
+    """
+    Valida uma linha e retorna (dados do produto, opção de ingrediente ou None).
+    """
+    if not isinstance(row, dict):
+        raise ValueError('linha não é um objeto')
+    product = {
+        'category': _text(row, 'category', 100),
+        'category_emoji': _text(row, 'category_emoji', Category._meta.get_field('emoji').max_length),
+        'name': _text(row, 'product', 100),
+        'description': _text(row, 'description'),
+        'price': _decimal(row.get('price'), 'price'),
+        'is_active': _bool(row.get('is_active'), default=True),
+    }
+    if not product['category']:
+        raise ValueError('"category" é obrigatório')
+    if not product['name']:
+        raise ValueError('"product" é obrigatório')
+
+    ingredient = _text(row, 'ingredient', 100)
+    group = _text(row, 'group', 100)
+    if not ingredient and not group:
+        return product, None
+    if not ingredient or not group:
+        raise ValueError('"group" e "ingredient" devem ser informados juntos')
+    try:
+        max_quantity = max(int(row.get('max_quantity') or 1), 1)
+    except (TypeError, ValueError):
+        raise ValueError('valor inválido em "max_quantity"')
+    option = {
+        'name': ingredient,
+        'group_name': group,
+        'price': _decimal(row.get('ingredient_price'), 'ingredient_price'),
+        'is_required': _bool(row.get('is_required')),
+        'max_quantity': max_quantity,
+        'is_extra': _bool(row.get('is_extra')),
+    }
+    return product, option
+
+
+def import_menu(restaurant, rows, dry_run=False):
+    """
+    Importa o cardápio a partir de (número da linha, dict) e faz upsert de categorias,
+    produtos (pelo nome, sem diferenciar maiúsculas) e grupos de ingredientes, com
+    operações em massa em uma única transação. Linhas inválidas são ignoradas e
+    relatadas em `errors`; produtos com ingredientes no arquivo têm os grupos
+    substituídos pelos do arquivo, os demais mantêm os atuais.
+    """
+    errors = []
+    products = {}
+    total = 0
+    for number, row in rows:
+        total += 1
+        try:
+            product, option = _parse_row(row)
+        except ValueError as e:
+            errors.append({'row': number, 'error': str(e)})
+            continue
+        key = product['name'].lower()
+        entry = products.setdefault(key, {**product, 'options': None, 'groups': {}})
+        if option is not None:
+            # Regras do grupo (obrigatório, máximo, extra) vêm da primeira linha do grupo
+            group = entry['groups'].setdefault(option['group_name'], {
+                field: option[field] for field in ('is_required', 'max_quantity', 'is_extra')
+            })
+            entry['options'] = entry['options'] or []
+            entry['options'].append({**option, **group})
+
+    report = {
+        'rows': total,
+        'categories_created': 0,
+        'products_created': 0,
+        'products_updated': 0,
+        'errors': errors,
+    }
+    if not products:
+        return report
+
+    with transaction.atomic():
+        with catalog_signals_muted():
+            categories = {
+                category.name.lower(): category
+                for category in Category.objects.filter(restaurant=restaurant)
+            }
+            new_categories = {}
+            for entry in products.values():
+                key = entry['category'].lower()
+                if key not in categories and key not in new_categories:
+                    new_categories[key] = Category(
+                        restaurant=restaurant, name=entry['category'], emoji=entry['category_emoji'],
+                    )
+            for category in Category.objects.bulk_create(list(new_categories.values())):
+                categories[category.name.lower()] = category
+            report['categories_created'] = len(new_categories)
+
+            existing = {}
+            for product in Product.objects.filter(restaurant=restaurant).order_by('id'):
+                existing.setdefault(product.name.lower(), product)
+
+            to_create, to_update = [], []
+            now = timezone.now()
+            for key, entry in products.items():
+                category = categories[entry['category'].lower()]
+                product = existing.get(key)
+                if product is None:
+                    product = Product(restaurant=restaurant, name=entry['name'])
+                    to_create.append(product)
+                else:
+                    to_update.append(product)
+                product.category = category
+                product.description = entry['description']
+                product.price = entry['price']
+                product.is_active = entry['is_active']
+                product.updated_at = now
+                entry['instance'] = product
+            Product.objects.bulk_create(to_create)
+            Product.objects.bulk_update(to_update, ['category', 'description', 'price', 'is_active', 'updated_at'])
+            report['products_created'] = len(to_create)
+            report['products_updated'] = len(to_update)
+
+            sync_ingredients([
+                (entry['instance'], entry['options'])
+                for entry in products.values() if entry['options'] is not None
+            ])
+            bump_catalog_version(restaurant.pk)
+            refresh_search_documents([entry['instance'].pk for entry in products.values()])
+
+        if dry_run:
+            transaction.set_rollback(True)
+    return report
+
+
+def iter_menu_export(restaurant):
+    """
+    Produz as linhas do cardápio (mesmas colunas da importação) lendo os produtos em
+    blocos, com categoria e ingredientes carregados por bloco.
+    """
+    products = (
+        Product.objects.filter(restaurant=restaurant)
+        .select_related('category')
+        .prefetch_related(Prefetch(
+            'ingredients',
+            queryset=ProductIngredient.objects.select_related('ingredient').order_by('group_name', 'id'),
+        ))
+        .order_by('category__name', 'name')
+    )
+    for product in products.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        base = {
+            'category': product.category.name,
+            'category_emoji': product.category.emoji,
+            'product': product.name,
+            'description': product.description,
+            'price': str(product.price),
+            'is_active': product.is_active,
+        }
+        options = product.ingredients.all()
+        if not options:
+            yield {**base, 'group': '', 'ingredient': '', 'ingredient_price': '', 'is_required': '', 'max_quantity': '', 'is_extra': ''}
+            continue
+        for option in options:
+            yield {
+                **base,
+                'group': option.group_name,
+                'ingredient': option.ingredient.name,
+                'ingredient_price': str(option.price),
+                'is_required': option.is_required,
+                'max_quantity': option.max_quantity,
+                'is_extra': option.is_extra,
+            }
+
+
+class _Echo:
+    """
+    Buffer que só devolve o que recebe, para o csv.writer gerar texto sob demanda.
+    """
+
+    def write(self, value):
+        return value
+
+
+def render_menu_export(restaurant, file_format='csv'):
+    """
+    Gera o arquivo exportado em pedaços de texto (para StreamingHttpResponse ou arquivo).
+    """
+    rows = iter_menu_export(restaurant)
+    if file_format == 'csv':
+        writer = csv.DictWriter(_Echo(), fieldnames=MENU_COLUMNS)
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+    elif file_format == 'jsonl':
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+    else:
+        yield '['
+        for index, row in enumerate(rows):
+            yield (',\n' if index else '\n') + json.dumps(row, ensure_ascii=False)
+        yield '\n]\n'
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.10 on 2026-10-19 06:17
+
+from django.db import migrations, models
+from products.search import build_search_document
+
+
+def fill_search_documents(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductIngredient = apps.get_model("products", "ProductIngredient")
+
+    ingredient_names = {}
+    for product_id, ingredient_name in ProductIngredient.objects.order_by("id").values_list(
+        "product_id", "ingredient__name"
+    ):
+        ingredient_names.setdefault(product_id, []).append(ingredient_name)
+
+    products = []
+    for product_id, name, description, category_name in Product.objects.values_list(
+        "id", "name", "description", "category__name"
+    ).iterator():
+        products.append(
+            Product(
+                pk=product_id,
+                search_document=build_search_document(
+                    name, category_name, *ingredient_names.get(product_id, []), description
+                ),
+            )
+        )
+    Product.objects.bulk_update(products, ["search_document"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0005_productingredient_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_document",
+            field=models.TextField(
+                blank=True,
+                default="",
+                editable=False,
+                verbose_name="Documento de Busca",
+            ),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.10 on 2026-10-19 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0006_product_search_document"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name="Variações da Imagem",
+            ),
+        ),
+        migrations.AddField(
+            model_name="promotion",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name="Variações da Imagem",
+            ),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 4.2.10 on 2026-10-19 06:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import unicodedata
+
+
+def normalize_ingredient_name(name):
+    # Cópia de products.search.normalize_ingredient_name no momento desta migração,
+    # para que mudanças futuras no módulo não alterem o resultado dela
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    text = "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    return " ".join(text.split())[:100]
+
+
+def _repoint(ProductIngredient, OrderItemIngredient, old_id, new_id, restaurant_id):
+    ProductIngredient.objects.filter(
+        ingredient_id=old_id, product__restaurant_id=restaurant_id
+    ).update(ingredient_id=new_id)
+    order_ingredients = OrderItemIngredient.objects.filter(
+        ingredient_id=old_id, order_item__order__restaurant_id=restaurant_id
+    )
+    # Linha idêntica já existente no item (unique_together) torna a antiga redundante
+    for row in order_ingredients.values("id", "order_item_id", "group_name", "is_extra"):
+        duplicated = OrderItemIngredient.objects.filter(
+            order_item_id=row["order_item_id"],
+            ingredient_id=new_id,
+            group_name=row["group_name"],
+            is_extra=row["is_extra"],
+        ).exists()
+        if duplicated:
+            OrderItemIngredient.objects.filter(pk=row["id"]).delete()
+        else:
+            OrderItemIngredient.objects.filter(pk=row["id"]).update(ingredient_id=new_id)
+
+
+def split_ingredients_by_restaurant(apps, schema_editor):
+    """
+    Cada ingrediente compartilhado passa a pertencer a um restaurante. Os donos vêm
+    dos produtos (ProductIngredient) e dos pedidos (OrderItemIngredient): o de menor
+    id fica com a linha original e os demais recebem uma cópia, para a qual os
+    produtos e itens de pedido dele são apontados. Ingredientes sem nenhum uso não
+    têm dono e são removidos, em vez de copiados para todos os restaurantes. Depois,
+    ingredientes com o mesmo nome normalizado no mesmo restaurante são unidos no de
+    menor id.
+    """
+    Ingredient = apps.get_model("products", "Ingredient")
+    ProductIngredient = apps.get_model("products", "ProductIngredient")
+    OrderItemIngredient = apps.get_model("orders", "OrderItemIngredient")
+
+    usage = {}
+    for rows in (
+        ProductIngredient.objects.values_list("ingredient_id", "product__restaurant_id"),
+        OrderItemIngredient.objects.values_list("ingredient_id", "order_item__order__restaurant_id"),
+    ):
+        for ingredient_id, restaurant_id in rows.distinct():
+            usage.setdefault(ingredient_id, set()).add(restaurant_id)
+
+    for ingredient in Ingredient.objects.order_by("id"):
+        restaurant_ids = sorted(usage.get(ingredient.id, ()))
+        if not restaurant_ids:
+            ingredient.delete()
+            continue
+        ingredient.normalized_name = normalize_ingredient_name(ingredient.name)
+        ingredient.restaurant_id = restaurant_ids[0]
+        ingredient.save(update_fields=["normalized_name", "restaurant"])
+        for restaurant_id in restaurant_ids[1:]:
+            copy = Ingredient.objects.create(
+                restaurant_id=restaurant_id,
+                name=ingredient.name,
+                normalized_name=ingredient.normalized_name,
+                description=ingredient.description,
+                price=ingredient.price,
+                is_active=ingredient.is_active,
+                is_extra=ingredient.is_extra,
+                category_id=ingredient.category_id,
+            )
+            _repoint(ProductIngredient, OrderItemIngredient, ingredient.id, copy.id, restaurant_id)
+
+    kept = {}
+    for ingredient in Ingredient.objects.order_by("id"):
+        key = (ingredient.restaurant_id, ingredient.normalized_name)
+        if key not in kept:
+            kept[key] = ingredient.id
+            continue
+        _repoint(ProductIngredient, OrderItemIngredient, ingredient.id, kept[key], ingredient.restaurant_id)
+        ingredient.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("settings", "0004_business_photo_variants"),
+        ("products", "0007_image_variants"),
+        ("orders", "0006_orderitem_promotion_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="normalized_name",
+            field=models.CharField(
+                default="",
+                editable=False,
+                max_length=100,
+                verbose_name="Nome Normalizado",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ingredient",
+            name="restaurant",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="ingredients",
+                to="settings.settings",
+                verbose_name="Restaurante",
+            ),
+        ),
+        migrations.RunPython(split_ingredients_by_restaurant, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="ingredient",
+            constraint=models.UniqueConstraint(
+                fields=("restaurant", "normalized_name"),
+                name="unique_ingredient_per_restaurant",
+            ),
+        ),
+    ]
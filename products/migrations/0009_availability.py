@@ -0,0 +1,26 @@
+# Generated by Django 4.2.10 on 2026-10-19 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0008_ingredient_restaurant"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="availability",
+            field=models.JSONField(
+                blank=True, default=list, verbose_name="Disponibilidade"
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="availability",
+            field=models.JSONField(
+                blank=True, default=list, verbose_name="Disponibilidade"
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 from settings.models import Settings  # import para multi-tenancy
+from .search import normalize_ingredient_name
 
 class Category(models.Model):
     """
@@ -10,6 +11,8 @@ class Category(models.Model):
     emoji = models.CharField(max_length=2, blank=True, default='', verbose_name='Emoji')
     description = models.TextField(blank=True, verbose_name='Descrição')
     is_active = models.BooleanField(default=True, verbose_name='Ativo')
+    # Janelas de horário em que a categoria aparece para pedido (ver products/availability.py)
+    availability = models.JSONField(default=list, blank=True, verbose_name='Disponibilidade')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     restaurant = models.ForeignKey(Settings, on_delete=models.CASCADE, related_name='categories')  # separação por empresa
@@ -30,11 +33,17 @@ class Product(models.Model):
     description = models.TextField(verbose_name='Descrição')
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Preço')
     image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name='Imagem')
+    # Derivadas redimensionadas da imagem (ver products/images.py), geradas fora da requisição
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Variações da Imagem')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products', verbose_name='Categoria')
     is_active = models.BooleanField(default=True, verbose_name='Ativo')
+    # Janelas de horário em que o produto pode ser pedido; vazio = sempre
+    availability = models.JSONField(default=list, blank=True, verbose_name='Disponibilidade')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     restaurant = models.ForeignKey(Settings, on_delete=models.CASCADE, related_name='products')
+    # Texto normalizado (sem acentos, minúsculo) de nome, categoria, ingredientes e descrição
+    search_document = models.TextField(blank=True, default='', editable=False, verbose_name='Documento de Busca')
 
     class Meta:
         verbose_name = 'Produto'
@@ -65,8 +74,12 @@ class IngredientCategory(models.Model):
 class Ingredient(models.Model):
     """
     Modelo que representa um ingrediente.
+    Cada restaurante tem o seu catálogo de ingredientes; o nome é único por restaurante
+    (sem diferenciar acentos e maiúsculas) via normalized_name.
     """
+    restaurant = models.ForeignKey(Settings, on_delete=models.CASCADE, related_name='ingredients', verbose_name='Restaurante')
     name = models.CharField(max_length=100, verbose_name='Nome')
+    normalized_name = models.CharField(max_length=100, editable=False, default='', verbose_name='Nome Normalizado')
     description = models.TextField(blank=True, verbose_name='Descrição')
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='Preço')
     is_active = models.BooleanField(default=True, verbose_name='Ativo')
@@ -79,10 +92,20 @@ class Ingredient(models.Model):
         verbose_name = 'Ingrediente'
         verbose_name_plural = 'Ingredientes'
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['restaurant', 'normalized_name'], name='unique_ingredient_per_restaurant'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_ingredient_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'normalized_name'}
+        super().save(*args, **kwargs)
+
 class ProductIngredient(models.Model):
     """
     Modelo que relaciona produtos com ingredientes.
@@ -114,6 +137,7 @@ class Promotion(models.Model):
     description = models.TextField(verbose_name='Descrição')
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Preço')
     image = models.ImageField(upload_to='promotions/', blank=True, null=True, verbose_name='Imagem')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Variações da Imagem')
     is_active = models.BooleanField(default=True, verbose_name='Ativa')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,88 @@
+from django.db import transaction
+from .catalog import bump_catalog_version, catalog_signals_muted
+from .models import PromotionItem, PromotionReward
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_promotion_items(items):
+    """
+    Normaliza os itens enviados em {product_id: quantidade}; o mesmo produto
+    repetido tem as quantidades somadas. Levanta ValueError se algum item for inválido.
+    """
+    quantities = {}
+    for item in items:
+        product_id = _int(item.get('product_id'))
+        quantity = _int(item.get('quantity', 1))
+        if product_id is None:
+            raise ValueError('ID do produto inválido')
+        if quantity is None or quantity < 1:
+            raise ValueError('Quantidade inválida')
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def parse_promotion_rewards(rewards):
+    """
+    Normaliza os brindes enviados em uma lista de ids de produto, sem repetição.
+    """
+    product_ids = []
+    for reward in rewards:
+        product_id = _int(reward.get('product_id'))
+        if product_id is None:
+            raise ValueError('ID do produto inválido')
+        if product_id not in product_ids:
+            product_ids.append(product_id)
+    return product_ids
+
+
+def sync_promotion_products(promotion, items=None, rewards=None):
+    """
+    Faz os itens ({product_id: quantidade}) e os brindes (ids de produto) da promoção
+    ficarem iguais aos informados, gravando só a diferença: um DELETE, um bulk_update
+    e um bulk_create por tabela. None mantém o que já existe.
+    """
+    with transaction.atomic(), catalog_signals_muted():
+        if items is not None:
+            existing, stale = {}, []
+            for item in PromotionItem.objects.filter(promotion=promotion).order_by('id'):
+                # Linhas repetidas do mesmo produto ficam para remoção
+                if item.product_id in existing or item.product_id not in items:
+                    stale.append(item.pk)
+                else:
+                    existing[item.product_id] = item
+            changed = []
+            for product_id, quantity in items.items():
+                item = existing.get(product_id)
+                if item is not None and item.quantity != quantity:
+                    item.quantity = quantity
+                    changed.append(item)
+            if stale:
+                PromotionItem.objects.filter(pk__in=stale).delete()
+            if changed:
+                PromotionItem.objects.bulk_update(changed, ['quantity'])
+            PromotionItem.objects.bulk_create([
+                PromotionItem(promotion=promotion, product_id=product_id, quantity=quantity)
+                for product_id, quantity in items.items() if product_id not in existing
+            ])
+
+        if rewards is not None:
+            existing, stale = set(), []
+            for pk, product_id in PromotionReward.objects.filter(promotion=promotion).order_by('id').values_list('id', 'product_id'):
+                if product_id in existing or product_id not in rewards:
+                    stale.append(pk)
+                else:
+                    existing.add(product_id)
+            if stale:
+                PromotionReward.objects.filter(pk__in=stale).delete()
+            PromotionReward.objects.bulk_create([
+                PromotionReward(promotion=promotion, product_id=product_id)
+                for product_id in rewards if product_id not in existing
+            ])
+
+        bump_catalog_version(promotion.restaurant_id)
@@ -0,0 +1,88 @@
+import re
+import unicodedata
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize_text(text):
+    """
+    Remove acentos e converte para minúsculas ("Pão de Queijo" -> "pao de queijo").
+    """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def normalize_ingredient_name(name):
+    """
+    Chave de unicidade do ingrediente: sem acentos, minúsculo e com espaços simples.
+    """
+    return ' '.join(normalize_text(name).split())[:100]
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def build_search_document(*texts):
+    """
+    Documento de busca: tokens normalizados sem repetição, separados e cercados por
+    espaços, para que ' token' encontre prefixos no início de cada palavra.
+    """
+    tokens = []
+    seen = set()
+    for text in texts:
+        for token in tokenize(text):
+            if token not in seen:
+                seen.add(token)
+                tokens.append(token)
+    return f" {' '.join(tokens)} " if tokens else ''
+
+
+def rank_match(query_tokens, name, document):
+    """
+    Pontua um produto para a busca: termos que batem com o nome valem mais,
+    e palavras completas valem mais que prefixos.
+    """
+    name_tokens = tokenize(name)
+    score = 0
+    for token in query_tokens:
+        if token in name_tokens:
+            score += 4
+        elif any(name_token.startswith(token) for name_token in name_tokens):
+            score += 3
+        elif f' {token} ' in document:
+            score += 2
+        else:
+            score += 1
+    return score
+
+
+def refresh_search_documents(product_ids):
+    """
+    Recalcula o documento de busca dos produtos (nome, descrição, categoria e
+    ingredientes) com duas leituras e um bulk_update.
+    """
+    from .models import Product, ProductIngredient
+
+    product_ids = list({product_id for product_id in product_ids if product_id})
+    if not product_ids:
+        return
+    ingredient_names = {}
+    for product_id, ingredient_name in (
+        ProductIngredient.objects.filter(product_id__in=product_ids)
+        .order_by('id')
+        .values_list('product_id', 'ingredient__name')
+    ):
+        ingredient_names.setdefault(product_id, []).append(ingredient_name)
+
+    products = []
+    for product_id, name, description, category_name in (
+        Product.objects.filter(pk__in=product_ids).values_list('id', 'name', 'description', 'category__name')
+    ):
+        products.append(Product(
+            pk=product_id,
+            search_document=build_search_document(
+                name, category_name, *ingredient_names.get(product_id, []), description
+            ),
+        ))
+    Product.objects.bulk_update(products, ['search_document'])
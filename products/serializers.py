@@ -1,17 +1,43 @@
 from rest_framework import serializers
 from .models import Category, Product, Ingredient, ProductIngredient, IngredientCategory, Promotion, PromotionItem, PromotionReward
 from django.conf import settings as django_settings
+from django.db import transaction
+from app.authentication import require_tenant
+from settings.tenants import request_tenant
+from .catalog import catalog_signals_muted
+from .availability import parse_availability
+from .images import variant_urls
+from .promotions import parse_promotion_items, parse_promotion_rewards, sync_promotion_products
+from .search import normalize_ingredient_name
 import json
 
+def validate_availability_windows(value):
+    """
+    Janelas de disponibilidade do produto ou da categoria; no envio por formulário
+    chegam como texto JSON.
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value) if value.strip() else []
+        except ValueError:
+            raise serializers.ValidationError('Formato inválido')
+    try:
+        return parse_availability(value)
+    except ValueError as e:
+        raise serializers.ValidationError(str(e))
+
 class CategorySerializer(serializers.ModelSerializer):
     """
     Serializer para o modelo Category.
     """
     class Meta:
         model = Category
-        fields = ('id', 'name', 'emoji', 'description', 'is_active', 'created_at', 'updated_at')
+        fields = ('id', 'name', 'emoji', 'description', 'is_active', 'availability', 'created_at', 'updated_at')
         read_only_fields = ('id', 'created_at', 'updated_at')
 
+    def validate_availability(self, value):
+        return validate_availability_windows(value)
+
 class IngredientCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = IngredientCategory
@@ -26,6 +52,20 @@ class IngredientSerializer(serializers.ModelSerializer):
         model = Ingredient
         fields = ['id', 'name', 'price', 'category', 'is_extra']
 
+    def validate_name(self, value):
+        """
+        O nome é único por restaurante, sem diferenciar acentos e maiúsculas.
+        """
+        request = self.context.get('request')
+        tenant = request_tenant(request) if request is not None else None
+        if tenant is not None:
+            duplicates = Ingredient.objects.filter(restaurant_id=tenant.id, normalized_name=normalize_ingredient_name(value))
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError('Já existe um ingrediente com este nome')
+        return value
+
 class ProductIngredientSerializer(serializers.ModelSerializer):
     ingredient = IngredientSerializer(read_only=True)
     price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
@@ -46,24 +86,38 @@ class ProductSerializer(serializers.ModelSerializer):
         source='category'
     )
     available_ingredients = ProductIngredientSerializer(many=True, read_only=True, source='ingredients')
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
         fields = ('id', 'category', 'category_id', 'name',
-                 'description', 'price', 'image', 'is_active',
+                 'description', 'price', 'image', 'image_variants', 'is_active', 'availability',
                  'available_ingredients', 'created_at', 'updated_at')
         read_only_fields = ('id', 'created_at', 'updated_at')
 
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants, self.context.get('request'))
+
+    def validate_availability(self, value):
+        return validate_availability_windows(value)
+
     def to_representation(self, instance):
         """
         Sobrescreve o método para garantir que os ingredientes sejam retornados corretamente.
         """
         representation = super().to_representation(instance)
         # Garante que available_ingredients seja uma lista vazia se não houver ingredientes
-        if not representation.get('available_ingredients'):
+        if 'available_ingredients' in self.fields and not representation.get('available_ingredients'):
             representation['available_ingredients'] = []
         return representation
 
+class ProductCompactSerializer(ProductSerializer):
+    """
+    Listagem enxuta do admin (`?compact=1`), sem a árvore de ingredientes.
+    """
+    class Meta(ProductSerializer.Meta):
+        fields = tuple(field for field in ProductSerializer.Meta.fields if field != 'available_ingredients')
+
 class ProductDetailSerializer(ProductSerializer):
     class Meta(ProductSerializer.Meta):
         fields = ProductSerializer.Meta.fields
@@ -122,10 +176,11 @@ class PromotionSerializer(serializers.ModelSerializer):
     items = PromotionItemSerializer(many=True, read_only=True)
     rewards = PromotionRewardSerializer(many=True, read_only=True)
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Promotion
-        fields = ('id', 'name', 'description', 'price', 'image', 'is_active',
+        fields = ('id', 'name', 'description', 'price', 'image', 'image_variants', 'is_active',
                  'items', 'rewards', 'created_at', 'updated_at')
         read_only_fields = ('id', 'created_at', 'updated_at')
 
@@ -137,6 +192,9 @@ class PromotionSerializer(serializers.ModelSerializer):
             return f"{django_settings.MEDIA_URL}{obj.image}"
         return None
 
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants, self.context.get('request'))
+
     def get_savings_amount(self, obj):
         """
         Calcula quanto o cliente economiza com a promoção.
@@ -169,31 +227,25 @@ class PromotionCreateSerializer(serializers.ModelSerializer):
         fields = ('name', 'description', 'price', 'is_active', 'items', 'rewards', 'image')
 
     def to_internal_value(self, data):
-        print("Dados recebidos no serializer (raw):", data)
-        print("Tipo dos dados:", type(data))
-        
         # Converte os dados para um dicionário mutável
         mutable_data = {}
         for key, value in data.items():
             if key == 'image':
-                # Trata o campo image - remove se for uma URL (já existe)
+                # Trata o campo image - remove se for uma URL (já existe) ou vazio
                 image_value = value[0] if isinstance(value, list) else value
                 if isinstance(image_value, str) and (image_value.startswith('http://') or image_value.startswith('https://')):
-                    print("Removendo campo image que é uma URL existente")
-                    continue  # Não adiciona ao mutable_data
+                    continue
                 elif image_value == '' or image_value is None:
-                    print("Removendo campo image vazio")
-                    continue  # Não adiciona ao mutable_data
+                    continue
                 else:
                     mutable_data[key] = value
             elif key == 'price':
                 try:
                     mutable_data[key] = float(value[0] if isinstance(value, list) else value)
                 except (ValueError, TypeError):
-                    print(f"Erro ao converter price: {value}")
                     raise serializers.ValidationError({'price': 'Preço inválido'})
             elif key == 'is_active':
-                mutable_data[key] = (value[0] if isinstance(value, list) else value).lower() == 'true'
+                mutable_data[key] = str(value[0] if isinstance(value, list) else value).lower() == 'true'
             elif key in ['items', 'rewards']:
                 # Aceita listas de dicionários diretamente
                 if isinstance(value, list) and (not value or isinstance(value[0], dict)):
@@ -207,8 +259,6 @@ class PromotionCreateSerializer(serializers.ModelSerializer):
             else:
                 mutable_data[key] = value[0] if isinstance(value, list) else value
 
-        print("Dados processados:", mutable_data)
-
         # Validação básica dos campos
         if not mutable_data.get('name'):
             raise serializers.ValidationError({'name': 'Nome é obrigatório'})
@@ -216,11 +266,11 @@ class PromotionCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({'description': 'Descrição é obrigatória'})
         if mutable_data.get('price') is None:
             raise serializers.ValidationError({'price': 'Preço é obrigatório'})
-        
+
         # Validação de items e rewards apenas se fornecidos (para atualização)
         items = mutable_data.get('items')
         rewards = mutable_data.get('rewards')
-        
+
         if items is not None and not items:
             raise serializers.ValidationError({'items': 'Adicione pelo menos um item'})
         if rewards is not None and not rewards:
@@ -244,93 +294,63 @@ class PromotionCreateSerializer(serializers.ModelSerializer):
 
         return super().to_internal_value(mutable_data)
 
+    def validate(self, attrs):
+        """
+        Normaliza itens e brindes e confere, em uma única consulta, se todos os
+        produtos existem no restaurante.
+        """
+        errors = {}
+        for field, parse in (('items', parse_promotion_items), ('rewards', parse_promotion_rewards)):
+            if attrs.get(field) is not None:
+                try:
+                    attrs[field] = parse(attrs[field])
+                except ValueError as e:
+                    errors[field] = str(e)
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        product_ids = set(attrs.get('items') or ()) | set(attrs.get('rewards') or ())
+        if product_ids:
+            restaurant_id = require_tenant(self.context['request']).id
+            found = set(
+                Product.objects.filter(restaurant_id=restaurant_id, pk__in=product_ids).values_list('id', flat=True)
+            )
+            for field in ('items', 'rewards'):
+                missing = sorted(set(attrs.get(field) or ()) - found)
+                if missing:
+                    errors[field] = f'Produto(s) não encontrado(s): {", ".join(map(str, missing))}'
+            if errors:
+                raise serializers.ValidationError(errors)
+        return attrs
+
     def create(self, validated_data):
-        print("Dados validados na criação:", validated_data)
-        items_data = validated_data.pop('items', [])
-        rewards_data = validated_data.pop('rewards', [])
-        image = validated_data.pop('image', None)
-        
+        items = validated_data.pop('items', {})
+        rewards = validated_data.pop('rewards', [])
+        if validated_data.get('image') is None:
+            validated_data.pop('image', None)
+
         # Adiciona o restaurant do usuário logado
-        validated_data['restaurant'] = self.context['request'].user.settings
-        
-        try:
+        validated_data['restaurant_id'] = require_tenant(self.context['request']).id
+
+        with transaction.atomic(), catalog_signals_muted():
             promotion = Promotion.objects.create(**validated_data)
-            
-            if image:
-                promotion.image = image
-                promotion.save()
-            
-            # Criar os itens da promoção
-            for item_data in items_data:
-                PromotionItem.objects.create(
-                    promotion=promotion,
-                    product_id=item_data['product_id'],
-                    quantity=item_data.get('quantity', 1)
-                )
-            
-            # Criar os brindes disponíveis
-            for reward_data in rewards_data:
-                PromotionReward.objects.create(
-                    promotion=promotion,
-                    product_id=reward_data['product_id']
-                )
-            
-            return promotion
-        except Exception as e:
-            print("Erro ao criar promoção:", str(e))
-            raise
+            sync_promotion_products(promotion, items, rewards)
+        return promotion
 
     def update(self, instance, validated_data):
-        print("Dados validados na atualização:", validated_data)
-        items_data = validated_data.pop('items', None)
-        rewards_data = validated_data.pop('rewards', None)
+        items = validated_data.pop('items', None)
+        rewards = validated_data.pop('rewards', None)
         image = validated_data.pop('image', None)
 
-        try:
-            print("Atualizando promoção:", instance.id)
-            print("Items data:", items_data)
-            print("Rewards data:", rewards_data)
-            
-            # Atualiza campos simples
-            for attr, value in validated_data.items():
-                print(f"Atualizando campo {attr}: {value}")
-                setattr(instance, attr, value)
-
-            # Atualiza a imagem se fornecida
-            if image is not None:
-                print("Atualizando imagem")
-                instance.image = image
+        # Atualiza campos simples
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+
+        # Atualiza a imagem se fornecida
+        if image is not None:
+            instance.image = image
 
+        with transaction.atomic(), catalog_signals_muted():
             instance.save()
-            print("Promoção salva com sucesso")
-
-            # Atualiza itens da promoção
-            if items_data is not None:
-                print("Atualizando itens da promoção")
-                instance.items.all().delete()
-                for item_data in items_data:
-                    print(f"Criando item: {item_data}")
-                    PromotionItem.objects.create(
-                        promotion=instance,
-                        product_id=item_data['product_id'],
-                        quantity=item_data.get('quantity', 1)
-                    )
-
-            # Atualiza brindes da promoção
-            if rewards_data is not None:
-                print("Atualizando brindes da promoção")
-                instance.rewards.all().delete()
-                for reward_data in rewards_data:
-                    print(f"Criando brinde: {reward_data}")
-                    PromotionReward.objects.create(
-                        promotion=instance,
-                        product_id=reward_data['product_id']
-                    )
-
-            print("Atualização concluída com sucesso")
-            return instance
-        except Exception as e:
-            print("Erro ao atualizar promoção:", str(e))
-            import traceback
-            traceback.print_exc()
-            raise 
\ No newline at end of file
+            sync_promotion_products(instance, items, rewards)
+        return instance
@@ -0,0 +1,113 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from settings.models import Settings, OpeningHour
+from .catalog import bump_catalog_version, signals_muted
+from .images import needs_variants, schedule_variants
+from .search import refresh_search_documents
+from .models import (
+    Category, Product, ProductIngredient, Ingredient, IngredientCategory,
+    Promotion, PromotionItem, PromotionReward
+)
+import functools
+
+
+def unless_muted(handler):
+    """
+    Ignora o signal durante operações em massa (ver catalog_signals_muted).
+    """
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        if not signals_muted():
+            handler(*args, **kwargs)
+    return wrapper
+
+
+@receiver([post_save, post_delete], sender=Settings)
+@unless_muted
+def settings_changed(sender, instance, **kwargs):
+    bump_catalog_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=OpeningHour)
+@unless_muted
+def opening_hour_changed(sender, instance, **kwargs):
+    bump_catalog_version(instance.settings_id)
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Promotion)
+@unless_muted
+def catalog_item_changed(sender, instance, **kwargs):
+    bump_catalog_version(instance.restaurant_id)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Promotion)
+def catalog_image_saved(sender, instance, **kwargs):
+    if needs_variants(instance, 'image'):
+        schedule_variants(instance, 'image', instance.restaurant_id)
+
+
+@receiver(post_save, sender=Settings)
+def business_photo_saved(sender, instance, **kwargs):
+    if needs_variants(instance, 'business_photo'):
+        schedule_variants(instance, 'business_photo', instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@unless_muted
+def product_saved(sender, instance, **kwargs):
+    refresh_search_documents([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@unless_muted
+def category_saved(sender, instance, **kwargs):
+    refresh_search_documents(instance.products.values_list('id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=ProductIngredient)
+@unless_muted
+def product_ingredient_changed(sender, instance, **kwargs):
+    restaurant_ids = Product.objects.filter(pk=instance.product_id).values_list('restaurant_id', flat=True)
+    bump_catalog_version(*restaurant_ids)
+    refresh_search_documents([instance.product_id])
+
+
+@receiver([post_save, post_delete], sender=PromotionItem)
+@receiver([post_save, post_delete], sender=PromotionReward)
+@unless_muted
+def promotion_entry_changed(sender, instance, **kwargs):
+    restaurant_ids = Promotion.objects.filter(pk=instance.promotion_id).values_list('restaurant_id', flat=True)
+    bump_catalog_version(*restaurant_ids)
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+@unless_muted
+def ingredient_changed(sender, instance, **kwargs):
+    if instance.restaurant_id:
+        bump_catalog_version(instance.restaurant_id)
+    else:
+        # Ingredientes antigos sem restaurante: atualiza todos os que os utilizam
+        restaurant_ids = (
+            Product.objects.filter(ingredients__ingredient_id=instance.pk)
+            .values_list('restaurant_id', flat=True)
+            .distinct()
+        )
+        bump_catalog_version(*restaurant_ids)
+    if kwargs.get('created') is False:
+        refresh_search_documents(
+            ProductIngredient.objects.filter(ingredient_id=instance.pk).values_list('product_id', flat=True)
+        )
+
+
+@receiver([post_save, post_delete], sender=IngredientCategory)
+@unless_muted
+def ingredient_category_changed(sender, instance, **kwargs):
+    restaurant_ids = (
+        Product.objects.filter(ingredients__ingredient__category_id=instance.pk)
+        .values_list('restaurant_id', flat=True)
+        .distinct()
+    )
+    bump_catalog_version(*restaurant_ids)
@@ -1,3 +1,565 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from orders.models import OrderItemIngredient
+from settings.models import Settings
+from .availability import compile_availability, effective_availability, intersect_intervals, parse_availability
+from .bulk import bulk_adjust_prices
+from .cloning import CatalogCloneError, clone_catalog
+from .ingredients import sync_ingredients
+from .models import (
+    Category, Product, Ingredient, IngredientCategory, ProductIngredient, Promotion, PromotionItem, PromotionReward,
+)
 
-# Create your tests here.
+
+class ProductListQueryCountTests(TestCase):
+    """
+    A listagem de produtos do admin deve usar um número fixo de consultas,
+    independente da quantidade de produtos e ingredientes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('loja', password='senha')
+        cls.restaurant = Settings.objects.create(
+            owner=cls.user, business_name='Loja', business_phone='', business_address='',
+            business_email='loja@example.com', opening_time='08:00', closing_time='18:00',
+        )
+        sauces = IngredientCategory.objects.create(name='Molhos')
+        ingredients = [
+            Ingredient.objects.create(restaurant=cls.restaurant, name=f'Ingrediente {i}', price=1, category=sauces)
+            for i in range(4)
+        ]
+        categories = [Category.objects.create(restaurant=cls.restaurant, name=f'Categoria {i}') for i in range(3)]
+        for i in range(12):
+            product = Product.objects.create(
+                restaurant=cls.restaurant, category=categories[i % 3],
+                name=f'Produto {i:02d}', description='', price=10 + i,
+            )
+            for ingredient in ingredients:
+                ProductIngredient.objects.create(product=product, ingredient=ingredient, group_name='Extras', price=1)
+
+    def setUp(self):
+        # Sem o restaurante do usuário em cache: a primeira consulta de cada teste o resolve
+        cache.clear()
+        self.client = APIClient()
+        # Usuário recarregado, como na autenticação real, sem o restaurante em cache
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+
+    def test_list_uses_fixed_queries(self):
+        # restaurante do usuário, produtos com categoria, ingredientes com ingrediente e subcategoria
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/products/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 12)
+        self.assertEqual(len(response.data[0]['available_ingredients']), 4)
+        self.assertEqual(response.data[0]['available_ingredients'][0]['ingredient']['category']['name'], 'Molhos')
+
+    def test_tenant_is_cached_between_requests(self):
+        self.client.get('/api/products/products/', {'compact': '1'})
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/products/products/', {'compact': '1'})
+        self.assertEqual(len(response.data), 12)
+
+    def test_compact_list_skips_ingredient_tree(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/products/products/', {'compact': '1'})
+        self.assertEqual(len(response.data), 12)
+        self.assertNotIn('available_ingredients', response.data[0])
+        self.assertEqual(response.data[0]['category']['name'], 'Categoria 0')
+
+    def test_paginated_list(self):
+        # mais a contagem do paginador
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/products/products/', {'page': 2, 'page_size': 5})
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual([product['name'] for product in response.data['results']], [f'Produto {i:02d}' for i in range(5, 10)])
+
+    def test_same_name_is_ordered_by_id(self):
+        category = Category.objects.filter(restaurant=self.restaurant).first()
+        twins = [
+            Product.objects.create(restaurant=self.restaurant, category=category, name='Produto 00', description='', price=1)
+            for _ in range(2)
+        ]
+        response = self.client.get('/api/products/products/', {'compact': '1'})
+        first_three = [product['id'] for product in response.data[:3]]
+        self.assertEqual(first_three[1:], [twin.pk for twin in twins])
+
+
+class BulkPriceTests(TestCase):
+    """
+    Reajuste de preços em massa: percentuais fracionados não podem ser truncados
+    e reajustes que não mudam nenhum preço não invalidam o catálogo.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('loja', password='senha')
+        cls.restaurant = Settings.objects.create(
+            owner=cls.user, business_name='Loja', business_phone='', business_address='',
+            business_email='loja@example.com', opening_time='08:00', closing_time='18:00',
+        )
+        category = Category.objects.create(restaurant=cls.restaurant, name='Lanches')
+        for name, price in (('A', '100.00'), ('B', '10.00'), ('C', '1.00')):
+            Product.objects.create(restaurant=cls.restaurant, category=category, name=name, description='', price=price)
+
+    def prices(self):
+        return dict(Product.objects.values_list('name', 'price'))
+
+    def catalog_version(self):
+        return Settings.objects.values_list('catalog_version', flat=True).get(pk=self.restaurant.pk)
+
+    def test_fractional_percent(self):
+        updated = bulk_adjust_prices(Product.objects.all(), self.restaurant.pk, percent='8.5')
+        self.assertEqual(updated, 3)
+        self.assertEqual(self.prices(), {'A': Decimal('108.50'), 'B': Decimal('10.85'), 'C': Decimal('1.09')})
+
+    def test_small_percent_only_touches_changed_prices(self):
+        version = self.catalog_version()
+        updated = bulk_adjust_prices(Product.objects.all(), self.restaurant.pk, percent='0.4')
+        # 1,00 → 1,004 arredonda para 1,00; só A e B mudam
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.prices(), {'A': Decimal('100.40'), 'B': Decimal('10.04'), 'C': Decimal('1.00')})
+        self.assertEqual(self.catalog_version(), version + 1)
+
+    def test_no_change_keeps_catalog_version(self):
+        version = self.catalog_version()
+        self.assertEqual(bulk_adjust_prices(Product.objects.filter(name='C'), self.restaurant.pk, percent='0.1'), 0)
+        self.assertEqual(self.catalog_version(), version)
+
+
+class IngredientTenantTests(TestCase):
+    """
+    Ingredientes são do restaurante: cada um vê, altera e cria só os seus.
+    """
+    url = '/api/products/ingredients/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('loja', password='senha')
+        cls.restaurant = Settings.objects.create(
+            owner=cls.user, business_name='Loja', business_phone='', business_address='',
+            business_email='loja@example.com', opening_time='08:00', closing_time='18:00',
+        )
+        cls.other = Settings.objects.create(
+            owner=User.objects.create_user('outra', password='senha'), business_name='Outra', business_phone='',
+            business_address='', business_email='outra@example.com', opening_time='08:00', closing_time='18:00',
+        )
+        cls.bacon = Ingredient.objects.create(restaurant=cls.restaurant, name='Bacon', price=3)
+        cls.foreign = Ingredient.objects.create(restaurant=cls.other, name='Cebola', price=1)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_lists_only_own_ingredients(self):
+        response = self.client.get(self.url)
+        self.assertEqual([ingredient['name'] for ingredient in response.data['results']], ['Bacon'])
+        self.assertEqual(self.client.get(f'{self.url}{self.foreign.pk}/').status_code, 404)
+        self.assertEqual(self.client.patch(f'{self.url}{self.foreign.pk}/', {'price': '9.00'}).status_code, 404)
+
+    def test_create_uses_own_restaurant_and_unique_name(self):
+        response = self.client.post(self.url, {'name': 'Cebola', 'price': '1.00'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Ingredient.objects.get(pk=response.data['id']).restaurant_id, self.restaurant.pk)
+        # Mesmo nome sem diferenciar acentos e maiúsculas
+        response = self.client.post(self.url, {'name': 'BACÓN', 'price': '1.00'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.data)
+
+
+class IngredientRestaurantMigrationTests(TransactionTestCase):
+    """
+    Migração 0008: ingredientes compartilhados passam a ser de cada restaurante que
+    os usa, em produtos ou pedidos; os sem uso são removidos.
+    """
+    before = [
+        ('products', '0007_image_variants'),
+        ('orders', '0006_orderitem_promotion_index'),
+        ('settings', '0004_business_photo_variants'),
+    ]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_split_by_usage(self):
+        apps = self.migrate(self.before)
+        Settings_ = apps.get_model('settings', 'Settings')
+        Category_ = apps.get_model('products', 'Category')
+        Product_ = apps.get_model('products', 'Product')
+        Ingredient_ = apps.get_model('products', 'Ingredient')
+        ProductIngredient_ = apps.get_model('products', 'ProductIngredient')
+        Order_ = apps.get_model('orders', 'Order')
+        OrderItem_ = apps.get_model('orders', 'OrderItem')
+        OrderItemIngredient_ = apps.get_model('orders', 'OrderItemIngredient')
+        User_ = apps.get_model('auth', 'User')
+
+        restaurants = [
+            Settings_.objects.create(
+                owner=User_.objects.create(username=name), business_name=name, business_phone='',
+                business_address='', business_email='loja@example.com', opening_time='08:00', closing_time='18:00',
+            )
+            for name in ('a', 'b', 'c')
+        ]
+        a, b, _ = restaurants
+        bacon = Ingredient_.objects.create(name='Bacon', price=3)
+        bacon_dup = Ingredient_.objects.create(name='BACÓN ', price=3)
+        Ingredient_.objects.create(name='Cebola', price=1)
+        product = Product_.objects.create(
+            restaurant=a, category=Category_.objects.create(restaurant=a, name='Lanches'),
+            name='Burger', description='', price=10,
+        )
+        ProductIngredient_.objects.create(product=product, ingredient=bacon, group_name='Extras')
+        ProductIngredient_.objects.create(product=product, ingredient=bacon_dup, group_name='Base')
+        item = OrderItem_.objects.create(
+            order=Order_.objects.create(restaurant=b, customer_name='c', customer_phone='1'),
+            product_name='Burger', quantity=1, unit_price=10,
+        )
+        OrderItemIngredient_.objects.create(order_item=item, ingredient=bacon, group_name='Extras', price=2)
+
+        self.migrate([('products', '0010_ingredient_restaurant_required')])
+        rows = sorted(Ingredient.objects.values_list('restaurant_id', 'normalized_name'))
+        self.assertEqual(rows, [(a.pk, 'bacon'), (b.pk, 'bacon')])
+        own = dict(Ingredient.objects.values_list('restaurant_id', 'id'))
+        self.assertEqual(set(ProductIngredient.objects.values_list('ingredient_id', flat=True)), {own[a.pk]})
+        self.assertEqual(list(OrderItemIngredient.objects.values_list('ingredient_id', flat=True)), [own[b.pk]])
+
+
+class AvailabilityTests(SimpleTestCase):
+    """
+    Janelas de disponibilidade de produtos e categorias (products/availability.py).
+    """
+
+    def test_parse_normalizes_windows(self):
+        self.assertEqual(parse_availability(None), [])
+        self.assertEqual(
+            parse_availability([{'days': ['2', 0, 0], 'start': '6:00', 'end': '10:30'}]),
+            [{'days': [0, 2], 'start': '06:00', 'end': '10:30'}],
+        )
+
+    def test_parse_rejects_invalid_input(self):
+        invalid = [
+            {'days': [0]},
+            [{'days': [0], 'start': '08:00', 'end': '25:00'}],
+            [{'days': [0], 'start': '8h', 'end': '10:00'}],
+            [{'days': [], 'start': '08:00', 'end': '10:00'}],
+            [{'days': [7], 'start': '08:00', 'end': '10:00'}],
+            [{'days': ['seg'], 'start': '08:00', 'end': '10:00'}],
+            ['08:00-10:00'],
+            [{'days': [0], 'start': '08:00', 'end': '10:00'}] * 15,
+        ]
+        for value in invalid:
+            with self.assertRaises(ValueError, msg=value):
+                parse_availability(value)
+
+    def test_overnight_and_whole_day_windows(self):
+        # Sexta 22:00 até sábado 02:00; fim igual ao início vale o dia inteiro
+        self.assertEqual(
+            compile_availability([{'days': [4], 'start': '22:00', 'end': '02:00'}]),
+            [(4 * 1440 + 22 * 60, 5 * 1440 + 2 * 60)],
+        )
+        self.assertEqual(compile_availability([{'days': [1], 'start': '00:00', 'end': '00:00'}]), [(1440, 2880)])
+        self.assertIsNone(compile_availability([]))
+
+    def test_intersection(self):
+        self.assertEqual(
+            intersect_intervals([(0, 100), (200, 300), (400, 500)], [(50, 250), (450, 600)]),
+            [(50, 100), (200, 250), (450, 500)],
+        )
+        self.assertEqual(intersect_intervals([(0, 100)], [(100, 200)]), [])
+        # O produto é limitado pela categoria; sem janelas nos dois, sempre disponível
+        product = [{'days': [0], 'start': '08:00', 'end': '12:00'}]
+        category = [{'days': [0, 1], 'start': '10:00', 'end': '14:00'}]
+        self.assertEqual(effective_availability(product, category), [(600, 720)])
+        self.assertEqual(effective_availability([], category), compile_availability(category))
+        self.assertIsNone(effective_availability([], []))
+
+
+class MenuImportExportTests(TestCase):
+    """
+    Exportação e importação do cardápio (products/menu_io.py) pelas ações do ProductViewSet.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.restaurant = cls.create_restaurant('loja')
+        cls.other_user, cls.other = cls.create_restaurant('outra')
+        burgers = Category.objects.create(restaurant=cls.restaurant, name='Lanches', emoji='🍔')
+        drinks = Category.objects.create(restaurant=cls.restaurant, name='Bebidas')
+        burger = Product.objects.create(restaurant=cls.restaurant, category=burgers, name='Burger', description='Pão e carne', price='25.90')
+        Product.objects.create(restaurant=cls.restaurant, category=drinks, name='Suco', description='', price='8.00', is_active=False)
+        for name, group, price, extra in (('Bacon', 'Extras', '4.00', True), ('Cheddar', 'Extras', '3.50', True), ('Maionese', 'Molho', '0', False)):
+            ingredient = Ingredient.objects.create(restaurant=cls.restaurant, name=name, price=price)
+            ProductIngredient.objects.create(
+                product=burger, ingredient=ingredient, group_name=group, price=price,
+                is_extra=extra, is_required=group == 'Molho', max_quantity=2 if extra else 1,
+            )
+
+    @staticmethod
+    def create_restaurant(username):
+        user = User.objects.create_user(username, password='senha')
+        return user, Settings.objects.create(
+            owner=user, business_name=username.title(), business_phone='', business_address='',
+            business_email=f'{username}@example.com', opening_time='08:00', closing_time='18:00',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def export(self, user, file_format='csv'):
+        response = self.client_for(user).get('/api/products/products/export/', {'file_format': file_format})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def upload(self, user, content, name='cardapio.csv', **data):
+        return self.client_for(user).post(
+            '/api/products/products/import/',
+            {'file': SimpleUploadedFile(name, content), **data},
+            format='multipart',
+        )
+
+    def test_round_trip_into_another_restaurant(self):
+        for file_format in ('csv', 'jsonl', 'json'):
+            with self.subTest(file_format=file_format):
+                Product.objects.filter(restaurant=self.other).delete()
+                exported = self.export(self.user, file_format)
+                response = self.upload(self.other_user, exported, name=f'cardapio.{file_format}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['errors'], [])
+                self.assertEqual(response.data['products_created'], 2)
+                self.assertEqual(self.export(self.other_user, file_format), exported)
+
+    def test_reimport_updates_in_place(self):
+        exported = self.export(self.user)
+        response = self.upload(self.user, exported)
+        self.assertEqual(
+            (response.data['rows'], response.data['products_created'], response.data['products_updated'], response.data['categories_created']),
+            (4, 0, 2, 0),
+        )
+        self.assertEqual(ProductIngredient.objects.filter(product__restaurant=self.restaurant).count(), 3)
+        self.assertEqual(self.export(self.user), exported)
+
+    def test_invalid_rows_are_reported(self):
+        content = (
+            'category,product,price,group,ingredient,ingredient_price,max_quantity\n'
+            'Lanches,X-Salada,18.50,Extras,Ovo,2.00,1\n'
+            ',Sem categoria,10,,,,\n'
+            'Lanches,,10,,,,\n'
+            'Lanches,Preço ruim,abc,,,,\n'
+            'Lanches,Negativo,-1,,,,\n'
+            'Lanches,Só grupo,10,Extras,,,\n'
+            'Lanches,Máximo ruim,10,Extras,Ovo,1,muitos\n'
+        ).encode()
+        response = self.upload(self.user, content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([error['row'] for error in response.data['errors']], [3, 4, 5, 6, 7, 8])
+        self.assertIn('"category" é obrigatório', response.data['errors'][0]['error'])
+        self.assertEqual(response.data['products_created'], 1)
+        product = Product.objects.get(restaurant=self.restaurant, name='X-Salada')
+        self.assertEqual(list(product.ingredients.values_list('ingredient__name', 'price')), [('Ovo', Decimal('2.00'))])
+
+    def test_invalid_json_and_dry_run(self):
+        response = self.upload(self.user, b'{"category": "Lanches", "product": "Novo", "price": "5"}\n{quebrado\n', name='menu.jsonl', dry_run='true')
+        self.assertEqual(response.data['errors'], [{'row': 2, 'error': 'linha não é um objeto'}])
+        self.assertEqual(response.data['products_created'], 1)
+        self.assertFalse(Product.objects.filter(name='Novo').exists())
+        self.assertEqual(self.upload(self.user, b'{"a": 1}', name='menu.json').status_code, 400)
+
+
+class CatalogCloneTests(TestCase):
+    """
+    Cópia do cardápio entre restaurantes (products/cloning.py).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.source = cls.create_restaurant('origem')
+        cls.target = cls.create_restaurant('destino')
+        stray = cls.create_restaurant('terceiro')
+        burgers = Category.objects.create(restaurant=cls.source, name='Lanches')
+        cls.burger = Product.objects.create(restaurant=cls.source, category=burgers, name='Burger', description='', price='20.00')
+        cls.fries = Product.objects.create(restaurant=cls.source, category=burgers, name='Batata', description='', price='9.00')
+        # Categoria de outro restaurante: não há como remapear, o produto fica de fora
+        cls.orphan = Product.objects.create(
+            restaurant=cls.source, category=Category.objects.create(restaurant=stray, name='Outra'),
+            name='Perdido', description='', price='1.00',
+        )
+        bacon = Ingredient.objects.create(restaurant=cls.source, name='Bacon', price='4.00')
+        onion = Ingredient.objects.create(restaurant=cls.source, name='Cebola', price='1.00')
+        Ingredient.objects.create(restaurant=cls.source, name='Ovo', price='2.00')
+        # Registro antigo, sem nome normalizado
+        Ingredient.objects.filter(pk=onion.pk).update(normalized_name='')
+        ProductIngredient.objects.create(product=cls.burger, ingredient=bacon, group_name='Extras', price='4.00', is_extra=True)
+        ProductIngredient.objects.create(product=cls.burger, ingredient=onion, group_name='Extras', price='1.00', is_extra=True)
+        ProductIngredient.objects.create(product=cls.orphan, ingredient=bacon, group_name='Extras', price='4.00')
+        cls.combo = Promotion.objects.create(restaurant=cls.source, name='Combo', description='', price='25.00')
+        PromotionItem.objects.create(promotion=cls.combo, product=cls.burger, quantity=1)
+        PromotionItem.objects.create(promotion=cls.combo, product=cls.fries, quantity=1)
+        PromotionReward.objects.create(promotion=cls.combo, product=cls.orphan)
+        # Ingrediente que o destino já tem, com grafia diferente
+        cls.target_bacon = Ingredient.objects.create(restaurant=cls.target, name='BACON', price='5.00')
+
+    @staticmethod
+    def create_restaurant(username):
+        return Settings.objects.create(
+            owner=User.objects.create_user(username, password='senha'), business_name=username.title(),
+            business_phone='', business_address='', business_email=f'{username}@example.com',
+            opening_time='08:00', closing_time='18:00',
+        )
+
+    def test_clone_remaps_ids(self):
+        report = clone_catalog(self.source, self.target)
+        self.assertEqual(report['products_skipped'], ['Perdido'])
+        self.assertEqual((report['categories'], report['products'], report['product_ingredients'], report['promotions']), (1, 2, 2, 1))
+
+        category = Category.objects.get(restaurant=self.target)
+        burger = Product.objects.get(restaurant=self.target, name='Burger')
+        self.assertEqual(set(Product.objects.filter(restaurant=self.target).values_list('name', 'category_id')), {('Burger', category.pk), ('Batata', category.pk)})
+        self.assertNotEqual(burger.pk, self.burger.pk)
+        options = burger.ingredients.select_related('ingredient')
+        self.assertEqual({option.ingredient.restaurant_id for option in options}, {self.target.pk})
+
+        combo = Promotion.objects.get(restaurant=self.target)
+        self.assertEqual(set(combo.items.values_list('product__restaurant_id', flat=True)), {self.target.pk})
+        self.assertEqual(combo.items.count(), 2)
+        # O brinde era o produto que ficou de fora
+        self.assertFalse(combo.rewards.exists())
+
+    def test_reuses_same_name_ingredients(self):
+        report = clone_catalog(self.source, self.target)
+        # Bacon reaproveitado; Cebola (sem nome normalizado) e Ovo criados
+        self.assertEqual(report['ingredients_created'], 2)
+        burger = Product.objects.get(restaurant=self.target, name='Burger')
+        self.assertIn(self.target_bacon.pk, burger.ingredients.values_list('ingredient_id', flat=True))
+        self.assertEqual(
+            sorted(Ingredient.objects.filter(restaurant=self.target).values_list('normalized_name', flat=True)),
+            ['bacon', 'cebola', 'ovo'],
+        )
+
+    def test_replace(self):
+        clone_catalog(self.source, self.target)
+        with self.assertRaises(CatalogCloneError):
+            clone_catalog(self.source, self.target)
+        self.fries.price = '11.00'
+        self.fries.save()
+        clone_catalog(self.source, self.target, replace=True)
+        self.assertEqual(Product.objects.filter(restaurant=self.target).count(), 2)
+        self.assertEqual(Product.objects.get(restaurant=self.target, name='Batata').price, Decimal('11.00'))
+        self.assertEqual(Promotion.objects.filter(restaurant=self.target).count(), 1)
+        # Ingredientes do destino são mantidos e reaproveitados, sem duplicar
+        self.assertEqual(Ingredient.objects.filter(restaurant=self.target).count(), 3)
+
+    def test_same_restaurant_is_rejected(self):
+        with self.assertRaises(CatalogCloneError):
+            clone_catalog(self.source, self.source)
+
+
+class SyncIngredientsTests(TestCase):
+    """
+    Sincronização dos ingredientes dos produtos por diferença (products/ingredients.py).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Settings.objects.create(
+            owner=User.objects.create_user('loja', password='senha'), business_name='Loja', business_phone='',
+            business_address='', business_email='loja@example.com', opening_time='08:00', closing_time='18:00',
+        )
+        cls.category = Category.objects.create(restaurant=cls.restaurant, name='Lanches')
+        cls.bacon = Ingredient.objects.create(restaurant=cls.restaurant, name='Bacon', price='4.00', is_extra=True)
+        cls.onion = Ingredient.objects.create(restaurant=cls.restaurant, name='Cebola', price='1.00', is_extra=True)
+        cls.sauce = Ingredient.objects.create(restaurant=cls.restaurant, name='Maionese', price='0')
+
+    def setUp(self):
+        cache.clear()
+
+    def product(self, name='Burger'):
+        product = Product.objects.create(restaurant=self.restaurant, category=self.category, name=name, description='', price='20.00')
+        for ingredient, group, extra in ((self.bacon, 'Extras', True), (self.onion, 'Extras', True), (self.sauce, 'Molho', False), (self.bacon, 'Extras', True)):
+            ProductIngredient.objects.create(
+                product=product, ingredient=ingredient, group_name=group, price=ingredient.price, is_extra=extra,
+            )
+        return product
+
+    @staticmethod
+    def rows():
+        extras = {'group_name': 'Extras', 'is_required': False, 'max_quantity': 1, 'is_extra': True}
+        return [
+            {'name': 'bacon', 'price': Decimal('5.00'), **extras},
+            {'name': 'Cebola', 'price': Decimal('1.00'), **extras},
+            {'name': 'Ovo', 'price': Decimal('2.00'), **extras},
+        ]
+
+    def catalog_version(self):
+        return Settings.objects.values_list('catalog_version', flat=True).get(pk=self.restaurant.pk)
+
+    def test_diff_sync(self):
+        product = self.product()
+        bacon_row, onion_row = product.ingredients.order_by('id')[:2]
+        version = self.catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sync_ingredients([(product, self.rows())])
+
+        rows = list(product.ingredients.select_related('ingredient').order_by('id'))
+        self.assertEqual(
+            [(row.ingredient.name, row.group_name, row.price) for row in rows],
+            [('Bacon', 'Extras', Decimal('5.00')), ('Cebola', 'Extras', Decimal('1.00')), ('Ovo', 'Extras', Decimal('2.00'))],
+        )
+        # Linhas existentes são mantidas (a alterada com o mesmo id, a igual sem ser regravada)
+        self.assertEqual(rows[0].pk, bacon_row.pk)
+        self.assertEqual((rows[1].pk, rows[1].updated_at), (onion_row.pk, onion_row.updated_at))
+        # O ingrediente novo é criado no restaurante; o preço do Bacon acompanha
+        self.assertEqual(Ingredient.objects.get(restaurant=self.restaurant, normalized_name='ovo').price, Decimal('2.00'))
+        self.assertEqual(Ingredient.objects.get(pk=self.bacon.pk).price, Decimal('5.00'))
+        self.assertEqual(self.catalog_version(), version + 1)
+        self.assertIn('ovo', Product.objects.get(pk=product.pk).search_document)
+
+    def test_unchanged_rows_write_nothing(self):
+        product = self.product()
+        sync_ingredients([(product, self.rows())])
+        with CaptureQueriesContext(connection) as queries:
+            sync_ingredients([(product, self.rows())])
+        writes = [query['sql'] for query in queries.captured_queries if query['sql'].startswith(('INSERT', 'DELETE'))]
+        self.assertEqual(writes, [])
+
+    def test_query_count_does_not_grow_with_products(self):
+        def count(products):
+            entries = [(product, self.rows()) for product in products]
+            with CaptureQueriesContext(connection) as queries:
+                sync_ingredients(entries)
+            return len(queries.captured_queries)
+
+        # Primeira sincronização cria o Ovo e reajusta o Bacon; as medidas partem daí
+        count([self.product('Inicial')])
+        few = count([self.product(f'Produto {i}') for i in range(2)])
+        many = count([self.product(f'Outro {i}') for i in range(8)])
+        self.assertEqual(few, many)
+        # savepoint, ingredientes, linhas atuais, DELETE (com a coleta), UPDATE, INSERT,
+        # versão do catálogo, índice de busca (2 leituras e 1 UPDATE) e release
+        self.assertEqual(many, 12)
+
+    def test_none_keeps_current_rows(self):
+        product = self.product()
+        with self.assertNumQueries(0):
+            sync_ingredients([(product, None)])
+        self.assertEqual(product.ingredients.count(), 4)
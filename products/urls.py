@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, ProductViewSet, PromotionViewSet
+from .views import CategoryViewSet, ProductViewSet, IngredientViewSet, PromotionViewSet
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet)
 router.register(r'products', ProductViewSet)
+router.register(r'ingredients', IngredientViewSet)
 router.register(r'promotions', PromotionViewSet)
 
 urlpatterns = [
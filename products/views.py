@@ -3,19 +3,38 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Sum, Count
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.db.models import Sum, Count, Prefetch
+from app.authentication import require_tenant
 from .models import Category, Product, Ingredient, ProductIngredient, IngredientCategory, Promotion, PromotionItem, PromotionReward
+from .bulk import BulkUpdateError, bulk_adjust_prices, bulk_set_active, filter_products
+from .ingredients import parse_ingredient_rows, sync_product_ingredients
+from .menu_io import (
+    FORMATS as MENU_FORMATS, MenuImportError, detect_format,
+    import_menu, iter_menu_rows, render_menu_export
+)
+from .search import normalize_ingredient_name
 from .serializers import (
-    CategorySerializer, ProductSerializer,
+    CategorySerializer, ProductSerializer, ProductCompactSerializer,
     ProductDetailSerializer, IngredientSerializer,
     ProductIngredientSerializer, PromotionSerializer,
     PromotionCreateSerializer
 )
-import json
+import csv
 
 
 # Create your views here.
 
+def with_ingredient_tree(queryset):
+    """
+    Pré-carrega ingredientes, ingrediente e subcategoria que o ProductSerializer aninha.
+    """
+    return queryset.prefetch_related(Prefetch(
+        'ingredients',
+        queryset=ProductIngredient.objects.select_related('ingredient', 'ingredient__category').order_by('id'),
+    ))
+
 class CategoryViewSet(viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de categorias.
@@ -26,10 +45,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
 
     def get_queryset(self):
-        return Category.objects.filter(restaurant=self.request.user.settings)
+        return Category.objects.filter(restaurant_id=require_tenant(self.request).id)
 
     def perform_create(self, serializer):
-        serializer.save(restaurant=self.request.user.settings)
+        serializer.save(restaurant_id=require_tenant(self.request).id)
 
     @action(detail=True, methods=['get'])
     def products(self, request, pk=None):
@@ -37,18 +56,34 @@ class CategoryViewSet(viewsets.ModelViewSet):
         Retorna todos os produtos de uma categoria específica.
         """
         category = self.get_object()
-        products = Product.objects.filter(category=category)
-        serializer = ProductSerializer(products, many=True)
+        products = with_ingredient_tree(Product.objects.filter(category=category).select_related('category'))
+        serializer = ProductSerializer(products, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
+class ProductPagination(PageNumberPagination):
+    """
+    Paginação opcional: a listagem só é paginada quando `page` ou `page_size` é
+    informado, para não quebrar quem ainda espera a lista completa.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        if self.page_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+        return super().get_page_size(request)
+
 class ProductViewSet(viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de produtos.
     """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
-    pagination_class = None  # ✅ desativa com segurança e clareza
+    pagination_class = ProductPagination
 
+    def is_compact(self):
+        return self.action == 'list' and self.request.query_params.get('compact') in ('1', 'true')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -61,13 +96,23 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         if self.action == 'retrieve':
             return ProductDetailSerializer
+        if self.is_compact():
+            return ProductCompactSerializer
         return ProductSerializer
 
     def get_queryset(self):
         """
-        Retorna a lista de produtos ordenada por data de criação crescente.
+        Retorna os produtos do restaurante ordenados por nome, a ordenação padrão do modelo,
+        com o id como desempate para a paginação ser estável. A categoria e a árvore de
+        ingredientes são carregadas em consultas fixas (sem a árvore no modo compacto).
         """
-        queryset = Product.objects.filter(restaurant=self.request.user.settings)
+        queryset = (
+            Product.objects.filter(restaurant_id=require_tenant(self.request).id)
+            .select_related('category')
+            .order_by('name', 'id')
+        )
+        if not self.is_compact():
+            queryset = with_ingredient_tree(queryset)
         category_id = self.request.query_params.get('category', None)
         if category_id is not None:
             queryset = queryset.filter(category_id=category_id)
@@ -77,202 +122,102 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         Cria um novo produto e seus ingredientes.
         """
-        print("Iniciando criação do produto...")
-        print(f"Usuário: {self.request.user.username}")
-        print(f"Settings do usuário: {self.request.user.settings}")
-        
-        # Primeiro, salva o produto vinculando à restaurante do usuário
-        product = serializer.save(restaurant=self.request.user.settings)
-        # Forçar produto como ativo por padrão
-        product.is_active = True
-        product.save()
-        print(f"Produto criado: {product.name}, Ativo: {product.is_active}, Restaurant: {product.restaurant.business_slug}")
-        
-        # Processa os ingredientes
-        ingredients = []
-        for key in self.request.data:
-            if key.startswith('ingredients['):
-                ingredients.append(self.request.data[key])
-            
-        print("Ingredientes recebidos:", ingredients)
-        
-        # Agrupa ingredientes por grupo para garantir consistência
-        group_map = {}
-        for ing_data in ingredients:
-            try:
-                # Tenta decodificar o JSON
-                ing_obj = json.loads(ing_data)
-                print("Processando ingrediente:", ing_obj)
-                
-                ing_name = ing_obj.get('name')
-                group_name = ing_obj.get('groupName')  # Mudando de category para groupName
-                is_required = ing_obj.get('isRequired', False)
-                max_quantity = ing_obj.get('maxQuantity', 1)
-                is_extra = bool(ing_obj.get('isExtra', False))
-                price = ing_obj.get('price', 0)
-                print(f"DEBUG: Ingrediente {ing_name} - preço recebido: {price} (tipo: {type(price)})")
-                
-                if not ing_name or not group_name:
-                    print("Nome do ingrediente ou grupo vazio, pulando...")
-                    continue
-                
-                print(f"Processando ingrediente: {ing_name} (grupo: {group_name}, extra: {is_extra}, preço: {price})")
-                
-                # Organiza por grupo
-                if group_name not in group_map:
-                    group_map[group_name] = {
-                        'is_required': is_required,
-                        'max_quantity': max_quantity,
-                        'is_extra': is_extra,
-                        'ingredients': []
-                    }
-                group_map[group_name]['ingredients'].append({
-                    'name': ing_name,
-                    'price': price
-                })
-                print(f"DEBUG: Adicionado ao grupo {group_name}: {ing_name} com preço {price}")
-                
-            except Exception as e:
-                print(f"Erro ao processar ingrediente: {str(e)}")
-                continue
-        
-        # Processa cada grupo
-        for group_name, group_data in group_map.items():
-            for ing_data in group_data['ingredients']:
-                try:
-                    # Cria ou obtém o ingrediente
-                    ingredient, created = Ingredient.objects.get_or_create(
-                        name=ing_data['name'],
-                        defaults={
-                            'category': None,
-                            'price': ing_data['price'],
-                            'is_extra': group_data['is_extra']
-                        }
-                    )
-                    
-                    # Se o ingrediente já existia, atualiza o preço e status de extra
-                    if not created:
-                        ingredient.price = ing_data['price']
-                        ingredient.is_extra = group_data['is_extra']
-                        ingredient.save()
-                    
-                    # Cria o ProductIngredient com o grupo específico do produto
-                    pi = ProductIngredient.objects.create(
-                        product=product,
-                        ingredient=ingredient,
-                        group_name=group_name,  # Usando o nome do grupo diretamente
-                        is_required=group_data['is_required'],
-                        max_quantity=group_data['max_quantity'],
-                        is_extra=group_data['is_extra'],
-                        price=ing_data['price']
-                    )
-                    print(f"DEBUG: ProductIngredient criado - preço salvo: {pi.price} (tipo: {type(pi.price)})")
-                    print(f"ProductIngredient criado: {product.name} - {group_name} - {ingredient.name} (extra: {ingredient.is_extra}, preço: {ingredient.price})")
-                    
-                except Exception as e:
-                    print(f"Erro ao criar ProductIngredient: {str(e)}")
-                    continue
+        rows = parse_ingredient_rows(self.request.data)
+        with transaction.atomic():
+            # Produto vinculado ao restaurante do usuário e ativo por padrão
+            product = serializer.save(restaurant_id=require_tenant(self.request).id, is_active=True)
+            sync_product_ingredients(product, rows)
+
+    def update(self, request, *args, **kwargs):
+        """
+        Igual ao UpdateModelMixin.update, mas sem descartar os ingredientes que
+        perform_update já deixou pré-carregados para a resposta.
+        """
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
 
     def perform_update(self, serializer):
         """
         Atualiza um produto existente e seus ingredientes.
+        Sem ingredientes no envio, os existentes são mantidos.
         """
-        print("Iniciando atualização do produto...")
-        # Primeiro, salva as alterações do produto
-        product = serializer.save()
-        # Forçar produto como ativo por padrão
-        product.is_active = True
-        product.save()
-        print(f"Produto salvo: {product.name}")
-        
-        # Processa os novos ingredientes
-        ingredients = []
-        for key in self.request.data:
-            if key.startswith('ingredients['):
-                ingredients.append(self.request.data[key])
-        
-        print(f"Total de ingredientes recebidos: {len(ingredients)}")
-        
-        if ingredients:  # Só remove e recria se houver novos ingredientes
-            # Remove todos os ingredientes existentes deste produto específico
-            ProductIngredient.objects.filter(product=product).delete()
-            print("Ingredientes antigos removidos")
-            
-            # Agrupa ingredientes por grupo para garantir consistência
-            group_map = {}
-            for ing_data in ingredients:
-                try:
-                    ing_obj = json.loads(ing_data)
-                    ing_name = ing_obj.get('name')
-                    group_name = ing_obj.get('groupName')  # Mudando de category para groupName
-                    is_required = ing_obj.get('isRequired', False)
-                    max_quantity = ing_obj.get('maxQuantity', 1)
-                    is_extra = bool(ing_obj.get('isExtra', False))
-                    price = ing_obj.get('price', 0)
-                    print(f"DEBUG UPDATE: Ingrediente {ing_name} - preço recebido: {price} (tipo: {type(price)})")
-                    
-                    if not ing_name or not group_name:
-                        print("Nome do ingrediente ou grupo vazio, pulando...")
-                        continue
-                    
-                    print(f"Processando ingrediente: {ing_name} (grupo: {group_name}, extra: {is_extra}, preço: {price})")
-                    
-                    # Organiza por grupo
-                    if group_name not in group_map:
-                        group_map[group_name] = {
-                            'is_required': is_required,
-                            'max_quantity': max_quantity,
-                            'is_extra': is_extra,
-                            'ingredients': []
-                        }
-                    group_map[group_name]['ingredients'].append({
-                        'name': ing_name,
-                        'price': price
-                    })
-                    print(f"DEBUG UPDATE: Adicionado ao grupo {group_name}: {ing_name} com preço {price}")
-                    
-                except Exception as e:
-                    print(f"Erro ao processar ingrediente: {str(e)}")
-                    continue
-            
-            # Processa cada grupo
-            for group_name, group_data in group_map.items():
-                for ing_data in group_data['ingredients']:
-                    try:
-                        # Cria ou obtém o ingrediente
-                        ingredient, created = Ingredient.objects.get_or_create(
-                            name=ing_data['name'],
-                            defaults={
-                                'category': None,
-                                'price': ing_data['price'],
-                                'is_extra': group_data['is_extra']
-                            }
-                        )
-                        
-                        # Se o ingrediente já existia, atualiza o preço e status de extra
-                        if not created:
-                            ingredient.price = ing_data['price']
-                            ingredient.is_extra = group_data['is_extra']
-                            ingredient.save()
-                        
-                        # Cria o ProductIngredient com o grupo específico do produto
-                        pi = ProductIngredient.objects.create(
-                            product=product,
-                            ingredient=ingredient,
-                            group_name=group_name,  # Usando o nome do grupo diretamente
-                            is_required=group_data['is_required'],
-                            max_quantity=group_data['max_quantity'],
-                            is_extra=group_data['is_extra'],
-                            price=ing_data['price']
-                        )
-                        print(f"DEBUG UPDATE: ProductIngredient criado - preço salvo: {pi.price} (tipo: {type(pi.price)})")
-                        print(f"ProductIngredient criado: {product.name} - {group_name} - {ingredient.name} (extra: {ingredient.is_extra}, preço: {ingredient.price})")
-                        
-                    except Exception as e:
-                        print(f"Erro ao criar ProductIngredient: {str(e)}")
-                        continue
-        else:
-            print("Nenhum ingrediente recebido, mantendo os existentes")
+        rows = parse_ingredient_rows(self.request.data)
+        with transaction.atomic():
+            # Forçar produto como ativo por padrão
+            product = serializer.save(is_active=True)
+            sync_product_ingredients(product, rows)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_menu(self, request):
+        """
+        Importa o cardápio de um arquivo CSV, JSON Lines ou JSON (campo `file`).
+        Retorna o resumo com os erros por linha; `dry_run=true` apenas valida.
+        """
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'Envie o arquivo do cardápio no campo "file"'}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('file_format') or detect_format(upload.name)
+        if file_format not in MENU_FORMATS:
+            return Response({'error': f'Formato inválido. Use: {", ".join(MENU_FORMATS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        try:
+            report = import_menu(require_tenant(request).restaurant, iter_menu_rows(upload, file_format), dry_run=dry_run)
+        except (MenuImportError, UnicodeDecodeError, csv.Error) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export_menu(self, request):
+        """
+        Exporta o cardápio em CSV (padrão), JSON Lines ou JSON, gerado em streaming.
+        """
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in MENU_FORMATS:
+            return Response({'error': f'Formato inválido. Use: {", ".join(MENU_FORMATS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        content_types = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson', 'json': 'application/json'}
+        response = StreamingHttpResponse(
+            render_menu_export(require_tenant(request).restaurant, file_format),
+            content_type=f'{content_types[file_format]}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="cardapio.{file_format}"'
+        return response
+
+    @action(detail=False, methods=['post'])
+    def bulk_price(self, request):
+        """
+        Reajusta o preço dos produtos filtrados (category, ids, name ou all=true)
+        por `percent` ou `amount`, em um único UPDATE.
+        """
+        try:
+            queryset = filter_products(self.get_queryset(), request.data)
+            updated = bulk_adjust_prices(
+                queryset, require_tenant(request).id,
+                percent=request.data.get('percent'), amount=request.data.get('amount'),
+            )
+        except BulkUpdateError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'updated': updated})
+
+    @action(detail=False, methods=['post'])
+    def bulk_availability(self, request):
+        """
+        Ativa ou desativa (esgotado) os produtos filtrados de uma vez (`is_active`).
+        """
+        is_active = request.data.get('is_active')
+        if is_active in (None, ''):
+            return Response({'error': 'is_active é obrigatório'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(is_active, bool):
+            is_active = str(is_active).lower() in ('1', 'true')
+        try:
+            queryset = filter_products(self.get_queryset(), request.data)
+        except BulkUpdateError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        updated = bulk_set_active(queryset, require_tenant(request).id, is_active)
+        return Response({'updated': updated})
 
     @action(detail=True, methods=['post'])
     def add_ingredient(self, request, pk=None):
@@ -286,7 +231,8 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         try:
             ingredient = Ingredient.objects.get(
-                id=ingredient_id
+                id=ingredient_id,
+                restaurant=product.restaurant
             )
         except Ingredient.DoesNotExist:
             return Response(
@@ -321,7 +267,8 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         try:
             ingredient = Ingredient.objects.get(
-                id=ingredient_id
+                id=ingredient_id,
+                restaurant=product.restaurant
             )
         except Ingredient.DoesNotExist:
             return Response(
@@ -342,25 +289,40 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+class IngredientPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
 class IngredientViewSet(viewsets.ModelViewSet):
     """
-    ViewSet para gerenciamento de ingredientes.
+    ViewSet para gerenciamento de ingredientes do restaurante.
     """
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    pagination_class = IngredientPagination
 
     def get_queryset(self):
-        return Ingredient.objects.all()
+        queryset = Ingredient.objects.filter(restaurant_id=require_tenant(self.request).id).select_related('category')
+        search = self.request.query_params.get('search')
+        if search:
+            # Busca pelo início do nome normalizado (usa o índice restaurant + normalized_name)
+            queryset = queryset.filter(normalized_name__startswith=normalize_ingredient_name(search))
+        return queryset.order_by('normalized_name')
 
     def perform_create(self, serializer):
-        serializer.save()
+        serializer.save(restaurant_id=require_tenant(self.request).id)
 
     @action(detail=False, methods=['get'])
     def available(self, request):
         """
-        Retorna todos os ingredientes disponíveis.
+        Retorna os ingredientes ativos do restaurante, paginados.
         """
-        ingredients = Ingredient.objects.all()
+        ingredients = self.get_queryset().filter(is_active=True)
+        page = self.paginate_queryset(ingredients)
+        if page is not None:
+            serializer = IngredientSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = IngredientSerializer(ingredients, many=True)
         return Response(serializer.data)
 
@@ -383,7 +345,7 @@ class PromotionViewSet(viewsets.ModelViewSet):
         """
         Retorna a lista de promoções, filtrando por status se necessário.
         """
-        queryset = Promotion.objects.filter(restaurant=self.request.user.settings)
+        queryset = Promotion.objects.filter(restaurant_id=require_tenant(self.request).id)
         show_inactive = self.request.query_params.get('show_inactive', 'false').lower() == 'true'
         if not show_inactive:
             queryset = queryset.filter(is_active=True)
@@ -394,18 +356,6 @@ class PromotionViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
-    def update(self, request, *args, **kwargs):
-        print("Dados recebidos na atualização:", request.data)
-        print("Arquivos recebidos:", request.FILES)
-        print("Content-Type:", request.content_type)
-        return super().update(request, *args, **kwargs)
-
-    def create(self, request, *args, **kwargs):
-        print("Dados recebidos na criação:", request.data)
-        print("Arquivos recebidos:", request.FILES)
-        print("Content-Type:", request.content_type)
-        return super().create(request, *args, **kwargs)
-
     @action(detail=True, methods=['post'])
     def toggle_active(self, request, pk=None):
         """
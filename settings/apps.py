@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SettingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'settings'
+
+    def ready(self):
+        # Registra os signals que descartam a agenda compilada
+        from . import signals  # noqa: F401
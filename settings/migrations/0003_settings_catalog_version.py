@@ -0,0 +1,27 @@
+# Generated by Django 4.2.10 on 2026-10-19 06:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("settings", "0002_settings_is_active"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="settings",
+            name="catalog_updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="Catálogo Atualizado em"
+            ),
+        ),
+        migrations.AddField(
+            model_name="settings",
+            name="catalog_version",
+            field=models.PositiveIntegerField(
+                default=1, verbose_name="Versão do Catálogo"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.10 on 2026-10-19 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("settings", "0003_settings_catalog_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="settings",
+            name="business_photo_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name="Variações da Foto",
+            ),
+        ),
+    ]
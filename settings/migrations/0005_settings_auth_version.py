@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-19 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("settings", "0004_business_photo_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="settings",
+            name="auth_version",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Versão de Acesso"
+            ),
+        ),
+    ]
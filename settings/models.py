@@ -3,9 +3,12 @@ from django.utils.text import slugify
 from django.db.models import JSONField
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-import pytz
-from datetime import datetime, time
 from django.contrib.auth.models import User  # import para multi-tenancy
+from .schedule import (
+    compile_intervals, get_schedule, is_open_at, local_now, minute_of_week,
+    minute_to_datetime, next_closing_minute, next_opening_minute
+)
+from .tenants import invalidate_slug, invalidate_user_tenant
 
 class OpeningHour(models.Model):
     DAYS_OF_WEEK = [
@@ -44,34 +47,12 @@ class OpeningHour(models.Model):
         """
         Verifica se o restaurante está aberto no momento atual
         """
-        now = timezone.now().astimezone(pytz.timezone('America/Sao_Paulo'))
-        current_time = now.time()
-        current_day = now.weekday()
-
         if not self.is_open:
             return False
-
-        # Se o fechamento é no dia seguinte
-        if self.next_day_closing:
-            # Se estamos no dia da abertura
-            if current_day == self.day_of_week:
-                # Se já passou do horário de abertura
-                return current_time >= self.opening_time
-            # Se estamos no dia do fechamento
-            elif current_day == (self.day_of_week + 1) % 7:
-                # Se ainda não passou do horário de fechamento
-                return current_time <= self.closing_time
-            # Se estamos em um dia entre a abertura e o fechamento (para casos de múltiplos dias)
-            elif self.day_of_week > current_day:
-                # Se o dia de abertura é depois do dia atual (ex: domingo > segunda)
-                # significa que o período começou no dia anterior
-                return True
-            return False
-        else:
-            # Se o fechamento é no mesmo dia
-            if current_day == self.day_of_week:
-                return self.opening_time <= current_time <= self.closing_time
-            return False
+        intervals = compile_intervals([
+            (self.day_of_week, self.opening_time, self.closing_time, self.next_day_closing)
+        ])
+        return is_open_at(intervals, minute_of_week(local_now()))
 
 class Settings(models.Model):
     """
@@ -83,6 +64,7 @@ class Settings(models.Model):
     business_address = models.CharField(max_length=200, verbose_name='Endereço')
     business_email = models.EmailField(verbose_name='E-mail')
     business_photo = models.ImageField(upload_to='restaurant_photos/', null=True, blank=True, verbose_name='Foto do Restaurante')
+    business_photo_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Variações da Foto')
     business_slug = models.SlugField(max_length=100, unique=True, null=True, blank=True, verbose_name='Link Personalizado')
     opening_time = models.TimeField(verbose_name='Horário de Abertura')
     closing_time = models.TimeField(verbose_name='Horário de Fechamento')
@@ -95,6 +77,13 @@ class Settings(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     payment_methods = JSONField(default=dict, blank=True, null=True, verbose_name='Formas de Pagamento')
     is_active = models.BooleanField(default=True, verbose_name='Ativo')
+    # Versão do catálogo público: incrementada a cada alteração de produtos, categorias,
+    # ingredientes, promoções ou configurações (ver products.catalog)
+    catalog_version = models.PositiveIntegerField(default=1, verbose_name='Versão do Catálogo')
+    catalog_updated_at = models.DateTimeField(default=timezone.now, verbose_name='Catálogo Atualizado em')
+    # Marca de revogação dos tokens JWT: tokens emitidos com outra versão são recusados.
+    # Incrementada quando a empresa é bloqueada/desbloqueada ou troca de dono (ver app.authentication)
+    auth_version = models.PositiveIntegerField(default=0, editable=False, verbose_name='Versão de Acesso')
 
     class Meta:
         verbose_name = 'Configuração'
@@ -112,32 +101,48 @@ class Settings(models.Model):
             existing = Settings.objects.filter(business_slug=self.business_slug).exclude(pk=self.pk)
             if existing.exists():
                 raise ValidationError(f'Já existe um negócio com o slug "{self.business_slug}". Escolha outro nome.')
+
+        # Slug e dono anteriores, para invalidar os caches de resolução caso mudem
+        previous_slug = previous_owner_id = None
+        if self.pk:
+            previous_slug, previous_owner_id, was_active = (
+                Settings.objects.filter(pk=self.pk).values_list('business_slug', 'owner_id', 'is_active').first()
+                or (None, None, None)
+            )
+            # Bloqueio, desbloqueio ou troca de dono revogam os tokens já emitidos
+            if was_active is not None and (was_active != self.is_active or previous_owner_id != self.owner_id):
+                self.auth_version += 1
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'auth_version'}
         
         super().save(*args, **kwargs)
+        invalidate_slug(self.business_slug, previous_slug)
+        invalidate_user_tenant(self.owner_id, previous_owner_id)
+
+    def delete(self, *args, **kwargs):
+        slug = self.business_slug
+        owner_id = self.owner_id
+        result = super().delete(*args, **kwargs)
+        invalidate_slug(slug)
+        invalidate_user_tenant(owner_id)
+        return result
 
     def is_open_now(self):
-        now = timezone.now().astimezone(pytz.timezone('America/Sao_Paulo'))
-        weekday = now.weekday()
-        time_now = now.time()
+        """
+        Verifica pela agenda semanal compilada (em cache) se o restaurante está aberto agora.
+        """
+        return is_open_at(get_schedule(self.pk), minute_of_week(local_now()))
 
-        for oh in self.opening_hours.filter(is_open=True):
-            day = oh.day_of_week
-            open_time = oh.opening_time
-            close_time = oh.closing_time
+    def next_opening(self):
+        """
+        Data/hora da próxima abertura segundo a agenda semanal, ou None sem horários.
+        """
+        now = local_now()
+        return minute_to_datetime(now, next_opening_minute(get_schedule(self.pk), minute_of_week(now)))
 
-            if oh.next_day_closing:
-                # Se hoje é o dia da abertura e já passou da abertura
-                if weekday == day and time_now >= open_time:
-                    return True
-                # Se hoje é o dia do fechamento e ainda não passou do fechamento
-                if weekday == (day + 1) % 7 and time_now <= close_time:
-                    return True
-                # Se estamos em um dia entre a abertura e o fechamento (para casos de múltiplos dias)
-                if day > weekday:
-                    # Se o dia de abertura é depois do dia atual (ex: domingo > segunda)
-                    # significa que o período começou no dia anterior
-                    return True
-            else:
-                if weekday == day and open_time <= time_now <= close_time:
-                    return True
-        return False
+    def next_closing(self):
+        """
+        Data/hora do próximo fechamento segundo a agenda semanal, ou None se nunca fecha.
+        """
+        now = local_now()
+        return minute_to_datetime(now, next_closing_minute(get_schedule(self.pk), minute_of_week(now)))
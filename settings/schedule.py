@@ -0,0 +1,149 @@
+from bisect import bisect_right
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+import pytz
+
+# Fuso usado para interpretar os horários de funcionamento
+STORE_TIMEZONE = pytz.timezone('America/Sao_Paulo')
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# A agenda é descartada pelos signals de OpeningHour; o timeout é só uma rede de segurança
+SCHEDULE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def compile_intervals(rows):
+    """
+    Compila linhas (dia_da_semana, abertura, fechamento, fecha_no_dia_seguinte) em uma
+    lista ordenada de intervalos [início, fim) em minutos desde segunda-feira 00:00.
+    Fechamentos no dia seguinte viram um único intervalo; o que passa do domingo
+    continua na segunda. Intervalos sobrepostos ou contíguos são unidos.
+    """
+    intervals = []
+    for day_of_week, opening_time, closing_time, next_day_closing in rows:
+        start = day_of_week * MINUTES_PER_DAY + _minutes(opening_time)
+        end = day_of_week * MINUTES_PER_DAY + _minutes(closing_time)
+        if next_day_closing or closing_time < opening_time:
+            end += MINUTES_PER_DAY
+        if end <= start:
+            continue
+        if end > MINUTES_PER_WEEK:
+            intervals.append((start, MINUTES_PER_WEEK))
+            intervals.append((0, end - MINUTES_PER_WEEK))
+        else:
+            intervals.append((start, end))
+
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _locate(intervals, minute):
+    """
+    Índice do último intervalo que começa até o minuto informado (-1 se nenhum).
+    """
+    return bisect_right(intervals, (minute, MINUTES_PER_WEEK + 1)) - 1
+
+
+def is_open_at(intervals, minute):
+    """
+    Indica se o minuto da semana cai em algum intervalo. O minuto exato do fechamento
+    já conta como fechado (intervalos [início, fim)); antes ele ainda contava como aberto.
+    """
+    index = _locate(intervals, minute)
+    return index >= 0 and minute < intervals[index][1]
+
+
+def next_opening_minute(intervals, minute):
+    """
+    Minuto (a partir da segunda-feira corrente, podendo passar do fim da semana)
+    da próxima abertura estritamente após o minuto informado.
+    """
+    openings = [start for start, _ in intervals]
+    # Intervalo que começa na segunda 00:00 continuando o de domingo não é uma abertura
+    if openings and openings[0] == 0 and intervals[-1][1] == MINUTES_PER_WEEK:
+        openings = openings[1:]
+    if not openings:
+        return None
+    index = bisect_right(openings, minute)
+    if index < len(openings):
+        return openings[index]
+    return openings[0] + MINUTES_PER_WEEK
+
+
+def next_closing_minute(intervals, minute):
+    """
+    Minuto do próximo fechamento: o fim do intervalo atual se estiver aberto,
+    senão o fim do próximo intervalo. None quando a loja nunca fecha.
+    """
+    if not intervals:
+        return None
+    if intervals == [(0, MINUTES_PER_WEEK)]:
+        return None
+    index = _locate(intervals, minute)
+    if index < 0 or minute >= intervals[index][1]:
+        index += 1
+    offset = 0
+    if index >= len(intervals):
+        index, offset = 0, MINUTES_PER_WEEK
+    end = intervals[index][1] + offset
+    # Intervalo que termina no fim da semana e continua na segunda-feira
+    if intervals[index][1] == MINUTES_PER_WEEK and intervals[0][0] == 0:
+        end = MINUTES_PER_WEEK + intervals[0][1] + offset
+    return end
+
+
+def local_now():
+    return timezone.now().astimezone(STORE_TIMEZONE)
+
+
+def minute_of_week(moment):
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def week_start(moment):
+    """
+    Segunda-feira 00:00 da semana do momento informado.
+    """
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight - timedelta(days=moment.weekday())
+
+
+def minute_to_datetime(moment, minute):
+    if minute is None:
+        return None
+    return STORE_TIMEZONE.normalize(week_start(moment) + timedelta(minutes=minute))
+
+
+def _cache_key(settings_id):
+    return f'settings:schedule:{settings_id}'
+
+
+def get_schedule(settings_id):
+    """
+    Retorna a agenda semanal compilada do restaurante, a partir do cache.
+    """
+    key = _cache_key(settings_id)
+    intervals = cache.get(key)
+    if intervals is None:
+        from .models import OpeningHour
+        rows = OpeningHour.objects.filter(settings_id=settings_id, is_open=True).values_list(
+            'day_of_week', 'opening_time', 'closing_time', 'next_day_closing'
+        )
+        intervals = compile_intervals(rows)
+        cache.set(key, intervals, SCHEDULE_CACHE_TIMEOUT)
+    return intervals
+
+
+def invalidate_schedule(settings_id):
+    cache.delete(_cache_key(settings_id))
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import Settings, OpeningHour
 from datetime import datetime, time
 from django.conf import settings as django_settings
+from products.images import variant_urls
 
 class OpeningHourSerializer(serializers.ModelSerializer):
     class Meta:
@@ -29,10 +30,12 @@ class SettingsSerializer(serializers.ModelSerializer):
     business_photo = serializers.ImageField(required=False, allow_null=True)
     business_slug = serializers.SlugField(required=False, allow_null=True)
     logo_url = serializers.SerializerMethodField()
+    business_photo_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Settings
         fields = '__all__'
+        read_only_fields = ('catalog_version', 'catalog_updated_at')
         extra_kwargs = {
             'business_name': {'required': False},
             'business_phone': {'required': False},
@@ -52,4 +55,7 @@ class SettingsSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.business_photo.url)
             return f"{django_settings.MEDIA_URL}{obj.business_photo}"
-        return None 
\ No newline at end of file
+        return None
+
+    def get_business_photo_variants(self, obj):
+        return variant_urls(obj.business_photo_variants, self.context.get('request')) 
\ No newline at end of file
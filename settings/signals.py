@@ -0,0 +1,18 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import OpeningHour
+from .schedule import invalidate_schedule
+from .tenants import invalidate_user_tenant
+
+
+@receiver([post_save, post_delete], sender=OpeningHour)
+def opening_hour_changed(sender, instance, **kwargs):
+    # A agenda é recompilada na próxima consulta
+    invalidate_schedule(instance.settings_id)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Conta ativa e flags de admin fazem parte do acesso em cache (e da revogação dos tokens)
+    invalidate_user_tenant(instance.pk)
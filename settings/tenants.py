@@ -0,0 +1,221 @@
+from collections import OrderedDict
+from datetime import date
+from django.core.cache import cache
+from typing import NamedTuple, Optional
+import threading
+import time
+
+# Cache local do processo: pequeno e com validade curta, pois só o processo que salvou
+# as configurações consegue invalidá-lo. O cache compartilhado é invalidado em Settings.save.
+LOCAL_CACHE_SIZE = 1024
+LOCAL_CACHE_TTL = 30
+SHARED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Restaurante do usuário autenticado: validade curta, pois a assinatura também expira pela data
+USER_TENANT_TIMEOUT = 60
+
+TENANT_FIELDS = (
+    'id', 'is_active', 'is_open', 'delivery_available', 'delivery_fee', 'minimum_order_value'
+)
+
+# Marca slugs inexistentes no cache (o cache do Django não distingue None de ausência)
+_MISSING = {}
+
+_local = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cache_key(slug):
+    return f'settings:slug:{slug}'
+
+
+def _local_get(slug):
+    with _lock:
+        entry = _local.get(slug)
+        if entry is None:
+            return None
+        expires_at, tenant = entry
+        if expires_at < time.monotonic():
+            del _local[slug]
+            return None
+        _local.move_to_end(slug)
+        return tenant
+
+
+def _local_set(slug, tenant):
+    with _lock:
+        _local[slug] = (time.monotonic() + LOCAL_CACHE_TTL, tenant)
+        _local.move_to_end(slug)
+        while len(_local) > LOCAL_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def resolve_slug(slug):
+    """
+    Resolve o business_slug no restaurante (id e flags básicas) sem consultar
+    o banco a cada requisição. Retorna um dict ou None se o slug não existe.
+    """
+    if not slug:
+        return None
+    tenant = _local_get(slug)
+    if tenant is None:
+        key = _cache_key(slug)
+        tenant = cache.get(key)
+        if tenant is None:
+            from .models import Settings
+            tenant = Settings.objects.filter(business_slug=slug).values(*TENANT_FIELDS).first() or _MISSING
+            cache.set(key, tenant, SHARED_CACHE_TIMEOUT)
+        _local_set(slug, tenant)
+    return tenant or None
+
+
+def resolve_slug_id(slug):
+    tenant = resolve_slug(slug)
+    return tenant['id'] if tenant else None
+
+
+def invalidate_slug(*slugs):
+    slugs = [slug for slug in slugs if slug]
+    if not slugs:
+        return
+    cache.delete_many([_cache_key(slug) for slug in slugs])
+    with _lock:
+        for slug in slugs:
+            _local.pop(slug, None)
+
+
+class Tenant:
+    """
+    Restaurante do usuário autenticado, resolvido uma vez por requisição:
+    id do Settings, se está ativo, a versão de acesso (revogação de tokens)
+    e o plano vigente com a data de término.
+    """
+    __slots__ = ('id', 'is_active', 'auth_version', 'plan', 'plan_end_date', 'plan_active')
+
+    def __init__(self, id, is_active, auth_version=0, plan=None, plan_end_date=None, plan_active=False):
+        self.id = id
+        self.is_active = is_active
+        self.auth_version = auth_version
+        self.plan = plan
+        self.plan_end_date = plan_end_date
+        self.plan_active = plan_active
+
+    @property
+    def has_active_plan(self):
+        return self.plan_active and (self.plan_end_date is None or self.plan_end_date >= date.today())
+
+    @property
+    def restaurant(self):
+        """
+        Settings apenas com o id, para filtros e chaves estrangeiras sem nova consulta.
+        """
+        from .models import Settings
+        return Settings(pk=self.id)
+
+
+def _user_cache_key(user_id):
+    return f'settings:user_access:{user_id}'
+
+
+class UserAccess(NamedTuple):
+    is_active: bool
+    is_staff: bool
+    is_superuser: bool
+    tenant: Optional[Tenant]
+
+
+def _load_user_access(user_id):
+    """
+    Estado de acesso do usuário em uma única consulta: conta ativa, flags de admin e
+    o restaurante dele (com a assinatura ativa), ou _MISSING se o usuário não existe.
+    """
+    from django.contrib.auth.models import User
+    from django.db.models import OuterRef, Subquery
+    from assinaturas.models import Subscription
+    subscription = (
+        Subscription.objects.filter(company=OuterRef('settings__pk'), active=True)
+        .order_by('-end_date')
+    )
+    row = (
+        User.objects.filter(pk=user_id)
+        .annotate(
+            plan=Subquery(subscription.values('plan')[:1]),
+            plan_end_date=Subquery(subscription.values('end_date')[:1]),
+            plan_active=Subquery(subscription.values('active')[:1]),
+        )
+        .values(
+            'is_active', 'is_staff', 'is_superuser', 'settings__id', 'settings__is_active', 'settings__auth_version',
+            'plan', 'plan_end_date', 'plan_active',
+        )
+        .first()
+    )
+    if row is None:
+        return _MISSING
+    tenant = None
+    if row['settings__id'] is not None:
+        tenant = {
+            'id': row['settings__id'],
+            'is_active': row['settings__is_active'],
+            'auth_version': row['settings__auth_version'],
+            'plan': row['plan'],
+            'plan_end_date': row['plan_end_date'],
+            'plan_active': bool(row['plan_active']),
+        }
+    return {
+        'is_active': row['is_active'],
+        'is_staff': row['is_staff'],
+        'is_superuser': row['is_superuser'],
+        'tenant': tenant,
+    }
+
+
+def resolve_user_access(user_id):
+    """
+    Retorna o UserAccess do usuário (tenant None se ele não tem restaurante),
+    ou None se o usuário não existe.
+    O resultado fica no cache compartilhado por USER_TENANT_TIMEOUT segundos e é
+    descartado quando o usuário, a empresa ou a assinatura mudam.
+    """
+    if not user_id:
+        return None
+    key = _user_cache_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = _load_user_access(user_id)
+        cache.set(key, data, USER_TENANT_TIMEOUT)
+    if not data:
+        return None
+    tenant = data['tenant']
+    return UserAccess(
+        data['is_active'], data['is_staff'], data['is_superuser'], Tenant(**tenant) if tenant else None
+    )
+
+
+def resolve_user_tenant(user_id):
+    """
+    Resolve o restaurante do usuário (com a assinatura ativa), a partir do cache.
+    Retorna um Tenant ou None se o usuário não tem restaurante.
+    """
+    access = resolve_user_access(user_id)
+    return access.tenant if access else None
+
+
+def request_tenant(request):
+    """
+    Restaurante da requisição. Normalmente já foi anexado pela autenticação
+    (app.authentication); senão é resolvido aqui e guardado no request.
+    """
+    try:
+        return request.tenant
+    except AttributeError:
+        pass
+    user = getattr(request, 'user', None)
+    tenant = resolve_user_tenant(user.pk) if user is not None and user.is_authenticated else None
+    request.tenant = tenant
+    return tenant
+
+
+def invalidate_user_tenant(*user_ids):
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if user_ids:
+        cache.delete_many([_user_cache_key(user_id) for user_id in user_ids])
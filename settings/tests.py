@@ -1,3 +1,161 @@
-from django.test import TestCase
+from datetime import time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from app.views import CustomTokenObtainPairSerializer
+from .models import Settings
+from .schedule import (
+    MINUTES_PER_DAY, MINUTES_PER_WEEK, compile_intervals, is_open_at, next_closing_minute, next_opening_minute,
+)
+from .tenants import invalidate_user_tenant
 
-# Create your tests here.
+
+class TokenClaimsAuthenticationTests(TestCase):
+    """
+    Autenticação só com o token (app.authentication): sem consultar o usuário a cada
+    requisição, mas recusando tokens de contas inativas, empresas bloqueadas e
+    claims desatualizadas.
+    """
+    url = '/api/products/products/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('loja', password='senha')
+        cls.restaurant = cls.create_restaurant(cls.user, 'Loja')
+        cls.other = cls.create_restaurant(User.objects.create_user('outra', password='senha'), 'Outra')
+
+    @staticmethod
+    def create_restaurant(owner, name):
+        return Settings.objects.create(
+            owner=owner, business_name=name, business_phone='', business_address='',
+            business_email='loja@example.com', opening_time='08:00', closing_time='18:00',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def access_token(self, **claims):
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        for claim, value in claims.items():
+            token[claim] = value
+        return token
+
+    def assertRejected(self, response, code):
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], code)
+
+    def test_valid_token_does_not_query_the_user(self):
+        client = self.client_for(self.access_token())
+        self.assertEqual(client.get(self.url).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.url, {'compact': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries.captured_queries if 'auth_user' in query['sql']])
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_legacy_token_still_authenticates(self):
+        client = self.client_for(RefreshToken.for_user(self.user).access_token)
+        self.assertEqual(client.get(self.url).status_code, 200)
+
+    def test_rejected_after_auth_version_bump(self):
+        client = self.client_for(self.access_token())
+        self.assertEqual(client.get(self.url).status_code, 200)
+        Settings.objects.filter(pk=self.restaurant.pk).update(auth_version=F('auth_version') + 1)
+        invalidate_user_tenant(self.user.pk)
+        self.assertRejected(client.get(self.url), 'token_revoked')
+
+    def test_rejected_after_company_is_blocked(self):
+        client = self.client_for(self.access_token())
+        self.assertEqual(client.get(self.url).status_code, 200)
+        self.restaurant.is_active = False
+        self.restaurant.save()
+        self.assertRejected(client.get(self.url), 'company_blocked')
+        # Um token novo também é recusado enquanto a empresa estiver bloqueada
+        self.assertRejected(self.client_for(self.access_token()).get(self.url), 'company_blocked')
+
+    def test_rejected_when_is_active_claim_is_stale(self):
+        client = self.client_for(self.access_token(is_active=False))
+        self.assertRejected(client.get(self.url), 'token_revoked')
+
+    def test_rejected_on_tenant_mismatch(self):
+        client = self.client_for(self.access_token(tenant_id=self.other.pk))
+        self.assertRejected(client.get(self.url), 'token_revoked')
+
+    def test_rejected_for_inactive_user(self):
+        client = self.client_for(self.access_token())
+        self.user.is_active = False
+        self.user.save()
+        self.assertRejected(client.get(self.url), 'user_inactive')
+
+
+def _at(day, hour, minute=0):
+    """
+    Minuto da semana (segunda-feira = 0).
+    """
+    return day * MINUTES_PER_DAY + hour * 60 + minute
+
+
+class WeeklyScheduleTests(SimpleTestCase):
+    """
+    Agenda semanal compilada (settings/schedule.py): intervalos [abertura, fechamento)
+    em minutos desde segunda-feira 00:00.
+    """
+
+    def test_closing_minute_is_closed(self):
+        intervals = compile_intervals([(0, time(8), time(18), False)])
+        self.assertTrue(is_open_at(intervals, _at(0, 8)))
+        self.assertTrue(is_open_at(intervals, _at(0, 17, 59)))
+        self.assertFalse(is_open_at(intervals, _at(0, 18)))
+        self.assertFalse(is_open_at(intervals, _at(0, 7, 59)))
+        self.assertEqual(next_closing_minute(intervals, _at(0, 9)), _at(0, 18))
+
+    def test_overnight_window(self):
+        # Sexta 18:00 até sábado 02:00, informado com ou sem next_day_closing
+        for next_day in (True, False):
+            intervals = compile_intervals([(4, time(18), time(2), next_day)])
+            self.assertEqual(intervals, [(_at(4, 18), _at(5, 2))])
+            self.assertTrue(is_open_at(intervals, _at(4, 23, 59)))
+            self.assertTrue(is_open_at(intervals, _at(5, 1, 59)))
+            self.assertFalse(is_open_at(intervals, _at(5, 2)))
+            self.assertEqual(next_closing_minute(intervals, _at(4, 20)), _at(5, 2))
+
+    def test_sunday_wraps_into_monday(self):
+        intervals = compile_intervals([(6, time(20), time(3), True), (2, time(10), time(14), False)])
+        self.assertEqual(intervals, [(0, _at(0, 3)), (_at(2, 10), _at(2, 14)), (_at(6, 20), MINUTES_PER_WEEK)])
+        self.assertTrue(is_open_at(intervals, _at(0, 2, 30)))
+        self.assertFalse(is_open_at(intervals, _at(0, 3)))
+        self.assertTrue(is_open_at(intervals, _at(6, 23)))
+        # Aberta no domingo: fecha segunda 03:00 da semana seguinte
+        self.assertEqual(next_closing_minute(intervals, _at(6, 21)), MINUTES_PER_WEEK + _at(0, 3))
+        # Segunda 00:00 é continuação do domingo, não uma abertura
+        self.assertEqual(next_opening_minute(intervals, _at(0, 1)), _at(2, 10))
+        self.assertEqual(next_opening_minute(intervals, _at(3, 0)), _at(6, 20))
+
+    def test_next_opening_wraps_to_next_week(self):
+        intervals = compile_intervals([(1, time(9), time(17), False)])
+        self.assertEqual(next_opening_minute(intervals, _at(0, 12)), _at(1, 9))
+        self.assertEqual(next_opening_minute(intervals, _at(3, 12)), MINUTES_PER_WEEK + _at(1, 9))
+
+    def test_closed_all_week(self):
+        intervals = compile_intervals([])
+        self.assertEqual(intervals, [])
+        self.assertFalse(is_open_at(intervals, _at(2, 12)))
+        self.assertIsNone(next_opening_minute(intervals, _at(2, 12)))
+        self.assertIsNone(next_closing_minute(intervals, _at(2, 12)))
+
+    def test_always_open(self):
+        intervals = compile_intervals([(day, time(0), time(0), True) for day in range(7)])
+        self.assertEqual(intervals, [(0, MINUTES_PER_WEEK)])
+        self.assertTrue(is_open_at(intervals, _at(6, 23, 59)))
+        self.assertIsNone(next_closing_minute(intervals, 0))
+        self.assertIsNone(next_opening_minute(intervals, 0))
@@ -3,6 +3,7 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from .models import Settings, OpeningHour
 from .serializers import SettingsSerializer, OpeningHourSerializer
+from .tenants import request_tenant
 import json
 from datetime import datetime
 
@@ -15,7 +16,12 @@ class SettingsDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = SettingsSerializer
 
     def get_object(self):
-        # Busca ou cria as configurações para o usuário autenticado
+        # Configurações do restaurante já resolvido na autenticação
+        tenant = request_tenant(self.request)
+        obj = Settings.objects.filter(pk=tenant.id).first() if tenant else None
+        if obj:
+            return obj
+        # Usuário ainda sem restaurante: cria as configurações padrão
         obj, created = Settings.objects.get_or_create(
             owner=self.request.user,
             defaults={